@@ -14,46 +14,90 @@ for folder in required_folders:
 
 # Import des modules
 try:
+    import config
     from modules.data_loader import load_data
-    from layouts.main_layout import create_layout
+    from layouts.main_layout import serve_layout
+    from modules.dataset_cache import set_current_dataset
     from callbacks.register_callbacks import register_all_callbacks
+    from callbacks.date_callbacks import register_date_callbacks
+    from callbacks.portfolio_callbacks import register_portfolio_callbacks
 except ImportError as e:
     print(f"Erreur d'importation: {e}")
     print("Création des fichiers manquants...")
     # Création des fichiers manquants si nécessaire
     sys.exit(1)
 
-# Initialisation de l'application Dash
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.DARKLY],  # Utilisation d'un thème sombre
-    suppress_callback_exceptions=True,
-    meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
-)
+def load_portfolio_data():
+    """
+    Charge les données historiques et les transactions
 
-# Configuration du titre
-app.title = "Equity Portfolio Tracker"
+    Returns:
+        tuple: (historical_data, transactions_data), DataFrames vides en cas d'erreur
+    """
+    try:
+        historical_data, transactions_data = load_data()
 
-# Chargement des données
-try:
-    historical_data, transactions_data = load_data()
-    
-    # Informations de débogage
-    print("Colonnes disponibles dans historical_data:", historical_data.columns.tolist())
-    print("Premières lignes de historical_data:")
-    print(historical_data.head())
-except Exception as e:
-    print(f"Erreur lors du chargement des données: {e}")
-    import pandas as pd
-    historical_data = pd.DataFrame()
-    transactions_data = pd.DataFrame()
-
-# Création du layout principal
-app.layout = create_layout(historical_data, transactions_data)
-
-# Enregistrement des callbacks
-register_all_callbacks(app, historical_data, transactions_data)
-
-# Point d'entrée pour l'exécution
+        # Informations de débogage
+        print("Colonnes disponibles dans historical_data:", historical_data.columns.tolist())
+        print("Premières lignes de historical_data:")
+        print(historical_data.head())
+    except Exception as e:
+        print(f"Erreur lors du chargement des données: {e}")
+        import pandas as pd
+        historical_data = pd.DataFrame()
+        transactions_data = pd.DataFrame()
+
+    return historical_data, transactions_data
+
+def create_app(historical_data=None, transactions_data=None, precompute=None):
+    """
+    Crée l'application Dash (fabrique d'application WSGI)
+
+    Args:
+        historical_data (pd.DataFrame, optional): Données historiques déjà chargées
+        transactions_data (pd.DataFrame, optional): Transactions déjà chargées.
+            Les données sont chargées par load_data() si l'un des deux est absent.
+        precompute (bool, optional): Lancer le précalcul des vues en arrière-plan.
+            Par défaut config.PRECOMPUTE_ON_LOAD.
+
+    Returns:
+        dash.Dash: Application (app.server est l'application WSGI Flask)
+    """
+    if historical_data is None or transactions_data is None:
+        historical_data, transactions_data = load_portfolio_data()
+
+    # Initialisation de l'application Dash
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.DARKLY],  # Utilisation d'un thème sombre
+        suppress_callback_exceptions=True,
+        meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
+    )
+
+    # Configuration du titre
+    app.title = "Equity Portfolio Tracker"
+
+    # Jeu de données servi : relu par le layout et les callbacks à chaque requête
+    set_current_dataset(historical_data, transactions_data)
+
+    # Création du layout principal (reconstruit à chaque chargement de page)
+    app.layout = serve_layout
+
+    # Enregistrement des callbacks
+    register_all_callbacks(app)
+    register_date_callbacks(app)
+    register_portfolio_callbacks(app)
+
+    # Précalcul des vues de chaque période en arrière-plan
+    if config.PRECOMPUTE_ON_LOAD if precompute is None else precompute:
+        from modules.precompute import start_precompute
+        start_precompute(historical_data, transactions_data)
+
+    return app
+
+# Point d'entrée pour l'exécution en développement (production: voir wsgi.py)
 if __name__ == "__main__":
-    app.run(debug=True)  # Changed from app.run_server to app.run
\ No newline at end of file
+    import logging
+    logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+    app = create_app()
+    app.run(debug=True)  # Changed from app.run_server to app.run
@@ -0,0 +1,3 @@
+"""
+Scripts de mesure des performances (à lancer depuis la racine du projet)
+"""
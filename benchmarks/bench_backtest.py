@@ -0,0 +1,63 @@
+"""
+Mesure du passage à l'échelle du backtest en nombre de variantes
+
+Sur un scénario synthétique (--symbols titres, --years ans, --transactions
+transactions), simule 1, 2, 4… --max-variants variantes de la stratégie de
+moyennes mobiles (plus le journal des transactions), avec un seul processus puis
+avec --workers processus. Le coût marginal d'une variante reste constant : la durée
+croît linéairement avec le nombre de variantes, et se divise par le nombre de
+processus si autant de cœurs sont disponibles (hors démarrage du pool).
+
+Usage:
+    python -m benchmarks.bench_backtest [--symbols 200] [--years 10]
+        [--transactions 10000] [--max-variants 16] [--workers 4]
+"""
+import time
+import argparse
+import itertools
+
+import config
+from benchmarks.run_benchmarks import build_scenario
+
+def make_variants(n_variants):
+    """Variantes de la stratégie de moyennes mobiles (fenêtres et fréquence de rééquilibrage)"""
+    from modules.backtest import MovingAverageStrategy
+
+    grid = itertools.cycle(itertools.product((5, 10, 20, 50), (100, 150, 200), (5, 21)))
+    variants = {'ledger': 'ledger'}
+    for fast, slow, rebalance_every in itertools.islice(grid, n_variants - 1):
+        variants[f"ma_{fast}_{slow}_{rebalance_every}_{len(variants)}"] = MovingAverageStrategy(
+            fast, slow, rebalance_every, max_positions=20
+        )
+    return variants
+
+def main():
+    from modules.performance import run_backtest_variants
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=200, help="Nombre de symboles")
+    parser.add_argument('--years', type=int, default=10, help="Profondeur de l'historique en années")
+    parser.add_argument('--transactions', type=int, default=10_000, help="Nombre de transactions")
+    parser.add_argument('--max-variants', type=int, default=16, help="Nombre maximal de variantes")
+    parser.add_argument('--workers', type=int, default=config.BACKTEST_WORKERS, help="Processus du pool")
+    args = parser.parse_args()
+
+    historical_data, transactions_data = build_scenario(args.symbols, args.years, args.transactions)
+    # Premier appel : construction de l'historique des prix (hors mesure)
+    run_backtest_variants(historical_data, make_variants(1), transactions_data, workers=1)
+
+    counts = [2 ** power for power in range(args.max_variants.bit_length()) if 2 ** power <= args.max_variants]
+    for workers in sorted({1, args.workers}):
+        first_wall = None
+        for n_variants in counts:
+            start = time.perf_counter()
+            run_backtest_variants(historical_data, make_variants(n_variants), transactions_data, workers=workers)
+            wall = time.perf_counter() - start
+            # Coût marginal : hors coût fixe (données de marché, démarrage du pool) de la première mesure
+            marginal = (wall - first_wall) / (n_variants - counts[0]) if first_wall is not None else float('nan')
+            first_wall = wall if first_wall is None else first_wall
+            print(f"{n_variants:>4} variantes  {workers:>2} processus  {1000 * wall:9.1f} ms"
+                  f"  {1000 * marginal:8.1f} ms/variante supplémentaire")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Profil du temps de démarrage de l'application (python -X importtime)
+
+Importe wsgi.py dans un sous-processus avec -X importtime (démarrage du
+processus maître de production sans démarrer le serveur), puis résume le temps
+propre des imports par paquet et le temps total de l'import, chargement
+des données compris. Le résultat peut être enregistré en JSON et comparé à une
+mesure de référence pour détecter les régressions.
+
+Usage:
+    python -m benchmarks.bench_import_time [--output startup.json]
+        [--baseline startup_ref.json] [--tolerance 0.2]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Racine du projet (dossier parent de benchmarks/)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ligne de sortie de -X importtime : "import time: self | cumulative | module"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+def profile_startup(module='wsgi'):
+    """
+    Importe un module dans un sous-processus et mesure le temps de chaque import
+
+    Args:
+        module (str, optional): Module à importer. Par défaut 'wsgi'.
+
+    Returns:
+        dict: Temps total (ms), temps des imports (ms) et temps par paquet (ms)
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall_ms = 1000 * (time.perf_counter() - start)
+
+    # Temps propre de chaque module attribué à son paquet de premier niveau
+    packages = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, name = int(match.group(1)), match.group(4)
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us / 1000
+
+    return {
+        'module': module,
+        'returncode': completed.returncode,
+        'wall_ms': wall_ms,
+        'imports_ms': sum(packages.values()),
+        'packages_ms': dict(sorted(packages.items(), key=lambda item: -item[1])),
+    }
+
+def compare(result, baseline, tolerance):
+    """
+    Compare une mesure à une mesure de référence
+
+    Args:
+        result (dict): Mesure courante
+        baseline (dict): Mesure de référence
+        tolerance (float): Dégradation relative tolérée (0.2 = +20%)
+
+    Returns:
+        list: Messages décrivant les régressions (vide si aucune)
+    """
+    regressions = []
+    for key in ('wall_ms', 'imports_ms'):
+        if result[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {baseline[key]:.0f} ms -> {result[key]:.0f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='wsgi', help="Module à importer")
+    parser.add_argument('--top', type=int, default=15, help="Nombre de paquets affichés")
+    parser.add_argument('--output', help="Fichier JSON où enregistrer la mesure")
+    parser.add_argument('--baseline', help="Mesure JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Dégradation relative tolérée")
+    args = parser.parse_args()
+
+    result = profile_startup(args.module)
+    if result['returncode'] != 0:
+        print(f"L'import de {args.module} a échoué (code {result['returncode']})")
+        sys.exit(result['returncode'])
+
+    print(f"Démarrage de {args.module}: {result['wall_ms']:.0f} ms (imports: {result['imports_ms']:.0f} ms)")
+    for package, elapsed in list(result['packages_ms'].items())[:args.top]:
+        print(f"  {package:<30} {elapsed:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for message in regressions:
+            print(f"Régression: {message}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
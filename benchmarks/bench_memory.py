@@ -0,0 +1,130 @@
+"""
+Rapport mémoire des données historiques (octets par ligne)
+
+Compare la disposition d'un CSV chargé par pd.read_csv (types par défaut : symboles
+en objets, prix en float64, toutes les colonnes) à celle du jeu de données chargé
+depuis le stockage colonnaire (codes de symboles, dates stockées en numéros de jour,
+prix float32, colonnes inutilisées laissées sur disque). Pour chaque disposition,
+le rapport distingue la mémoire allouée de la mémoire projetée depuis le disque
+(np.memmap, partagée et paginée à la demande).
+
+Usage:
+    python -m benchmarks.bench_memory [--symbols 300] [--years 10] [--csv data/historical_data.csv]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import generate_historical_data, write_csv
+
+def _is_mapped(values):
+    """Indique si un tableau est une vue d'un fichier projeté en mémoire"""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+def frame_memory(data):
+    """
+    Mesure la mémoire d'un DataFrame, colonne par colonne
+
+    Args:
+        data (pd.DataFrame): DataFrame à mesurer
+
+    Returns:
+        dict: Octets alloués, octets projetés depuis le disque et octets par colonne
+    """
+    columns = {}
+    allocated = mapped = 0
+    for column in data.columns:
+        series = data[column]
+        size = int(series.memory_usage(index=False, deep=True))
+        columns[column] = size
+        array = series.array
+        values = array.codes if isinstance(array, pd.Categorical) else series.to_numpy()
+        if _is_mapped(values):
+            # Seules les catégories (et non les codes) sont allouées
+            extra = size - values.nbytes
+            mapped += values.nbytes
+            allocated += extra
+        else:
+            allocated += size
+    return {'allocated': allocated, 'mapped': mapped, 'columns': columns}
+
+def store_size(store_dir):
+    """Taille des fichiers de colonnes d'un stockage (octets)"""
+    return sum(
+        os.path.getsize(os.path.join(store_dir, name))
+        for name in os.listdir(store_dir) if name.endswith('.bin')
+    )
+
+def memory_report(csv_path):
+    """
+    Construit le rapport mémoire d'un fichier CSV de données historiques
+
+    Args:
+        csv_path (str): Fichier CSV au format de historical_data.csv
+
+    Returns:
+        dict: Mesures par disposition ('csv', 'compact') et taille du stockage
+    """
+    from modules.data_loader import (
+        HISTORICAL_COLUMNS,
+        canonicalize_price_store,
+        read_historical_csv,
+        stream_historical_csv,
+    )
+    from modules.price_store import load_price_store
+
+    raw = read_historical_csv(csv_path)
+    report = {'rows': len(raw), 'csv': frame_memory(raw)}
+    del raw
+
+    store_dir = tempfile.mkdtemp(prefix='bench_memory_')
+    try:
+        manifest = stream_historical_csv(csv_path, store_dir, {})
+        compact = canonicalize_price_store(load_price_store(store_dir, manifest, HISTORICAL_COLUMNS), store_dir)
+        report['compact'] = frame_memory(compact)
+        report['compact_rows'] = len(compact)
+        report['store_bytes'] = store_size(store_dir)
+        del compact
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=300, help="Nombre de symboles générés")
+    parser.add_argument('--years', type=int, default=10, help="Années d'historique générées")
+    parser.add_argument('--csv', help="Fichier CSV existant à mesurer (au lieu de données générées)")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    csv_path = args.csv
+    if csv_path is None:
+        tmp_dir = tempfile.mkdtemp(prefix='bench_memory_')
+        csv_path = os.path.join(tmp_dir, 'historical_data.csv')
+        write_csv(generate_historical_data(args.symbols, args.years), csv_path)
+
+    try:
+        report = memory_report(csv_path)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"{report['rows']} lignes")
+    for layout, rows in (('csv', report['rows']), ('compact', report['compact_rows'])):
+        measure = report[layout]
+        print(f"{layout:<8} alloué: {measure['allocated'] / rows:6.1f} o/ligne"
+              f"  projeté: {measure['mapped'] / rows:6.1f} o/ligne")
+        for column, size in measure['columns'].items():
+            print(f"  {column:<10} {size / rows:6.1f} o/ligne")
+    print(f"stockage sur disque: {report['store_bytes'] / report['compact_rows']:.1f} o/ligne")
+
+if __name__ == '__main__':
+    main()
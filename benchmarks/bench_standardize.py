@@ -0,0 +1,69 @@
+"""
+Mesure du coût de standardize_historical_data sur données brutes et canoniques
+
+Le rendu du layout appelle standardize_historical_data depuis plusieurs
+fonctions de calcul. Ce script compare, pour un même nombre d'appels, le temps
+et la mémoire allouée lorsque les données sont brutes (copie, reset_index et
+drop_duplicates à chaque appel) et lorsqu'elles sont canoniques (aucune copie).
+
+Usage:
+    python -m benchmarks.bench_standardize [--calls 7] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from modules.data_loader import load_data, standardize_historical_data, canonicalize_historical_data
+
+def measure(historical_data, calls, repeat):
+    """
+    Mesure le temps moyen et le pic mémoire de `calls` appels successifs
+
+    Args:
+        historical_data (pd.DataFrame): Données passées à standardize_historical_data
+        calls (int): Nombre d'appels par rendu simulé
+        repeat (int): Nombre de répétitions de la mesure
+
+    Returns:
+        dict: Temps moyen (ms) et pic mémoire (Mo) par rendu simulé
+    """
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        # Les messages de débogage de la standardisation ne sont pas mesurés
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(calls):
+                standardize_historical_data(historical_data)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'time_ms': 1000 * sum(timings) / len(timings),
+        'peak_mb': peak / 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=7, help="Appels par rendu (7 fonctions de calcul)")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de répétitions")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        canonical_data, _ = load_data()
+    raw_data = canonical_data.rename(columns={'date': 'Date', 'symbol': 'Symbol', 'close': 'Close'})
+    raw_data.attrs = {}
+
+    raw = measure(raw_data, args.calls, args.repeat)
+    canonical = measure(canonicalize_historical_data(canonical_data), args.calls, args.repeat)
+
+    print(f"{len(canonical_data)} lignes, {args.calls} appels par rendu")
+    print(f"Données brutes     : {raw['time_ms']:8.2f} ms, pic mémoire {raw['peak_mb']:8.2f} Mo")
+    print(f"Données canoniques : {canonical['time_ms']:8.2f} ms, pic mémoire {canonical['peak_mb']:8.2f} Mo")
+
+if __name__ == '__main__':
+    main()
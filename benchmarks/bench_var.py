@@ -0,0 +1,66 @@
+"""
+Mesure de la simulation Monte-Carlo de la valeur en risque
+
+Pour un portefeuille synthétique de --positions titres corrélés, mesure le temps
+et le pic mémoire (tracemalloc, processus courant) de simulate_portfolio_pnl selon
+le nombre de trajectoires, avec un seul processus puis avec --workers processus.
+Le pic mémoire reste borné par la taille d'un lot ; les résultats sont identiques
+quel que soit le nombre de processus.
+
+Usage:
+    python -m benchmarks.bench_var [--positions 50] [--horizon 10] [--workers 4]
+"""
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+import config
+
+def random_factor(n_positions, seed=0):
+    """Facteur d'une covariance journalière aléatoire (volatilités de 1 à 3 %)"""
+    from modules.performance import covariance_factor
+
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_positions, 3))
+    correlation = loadings @ loadings.T + np.eye(n_positions) * n_positions / 10
+    deviations = np.sqrt(np.diag(correlation))
+    correlation = correlation / np.outer(deviations, deviations)
+    volatilities = rng.uniform(0.01, 0.03, size=n_positions)
+    return covariance_factor(correlation * np.outer(volatilities, volatilities))
+
+def measure(factor, values, horizon, n_paths, workers):
+    """
+    Mesure une simulation
+
+    Returns:
+        dict: wall_s, peak_mb, var
+    """
+    from modules.performance import simulate_portfolio_pnl, value_at_risk
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    pnl = simulate_portfolio_pnl(factor, values, horizon, n_paths, workers=workers)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall_s': wall, 'peak_mb': peak / 1024 / 1024, 'var': value_at_risk(pnl, config.VAR_CONFIDENCE)[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--positions', type=int, default=50, help="Nombre de positions")
+    parser.add_argument('--horizon', type=int, default=10, help="Horizon en jours de cotation")
+    parser.add_argument('--workers', type=int, default=config.MONTE_CARLO_WORKERS, help="Processus du pool")
+    args = parser.parse_args()
+
+    factor = random_factor(args.positions)
+    values = np.full(args.positions, 10_000.0)
+    for n_paths in (10_000, 100_000, 1_000_000):
+        for workers in sorted({1, args.workers}):
+            result = measure(factor, values, args.horizon, n_paths, workers)
+            print(f"{n_paths:>9} trajectoires  {workers:>2} processus  {1000 * result['wall_s']:9.1f} ms"
+                  f"  {result['peak_mb']:7.1f} Mo  VaR {result['var']:,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Générateurs de données synthétiques au format des fichiers de la Bourse de Casablanca
+
+- Prix historiques : Date;Symbol;Open;High;Low;Close;Volume
+- Transactions     : Date;Symbol;Type;Quantity;Price
+
+Les données sont générées de façon vectorisée et reproductible (graine fixe).
+L'indice de référence (config.INDICES['MASI']) est inclus dans les prix.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+# Date de fin des séries générées (les séries remontent de n années)
+DEFAULT_END_DATE = '2025-03-18'
+
+def make_symbols(n_symbols):
+    """
+    Génère des symboles fictifs au format des valeurs cotées
+
+    Args:
+        n_symbols (int): Nombre de symboles
+
+    Returns:
+        list: Symboles (ex: 'SYM-0001')
+    """
+    return [f"SYM-{i:04d}" for i in range(n_symbols)]
+
+def generate_historical_data(n_symbols, n_years, end_date=DEFAULT_END_DATE, seed=0):
+    """
+    Génère des prix journaliers (jours ouvrés) suivant un mouvement brownien géométrique
+
+    Args:
+        n_symbols (int): Nombre de valeurs (l'indice de référence est ajouté en plus)
+        n_years (int): Profondeur de l'historique en années
+        end_date (str, optional): Dernière date des séries
+        seed (int, optional): Graine du générateur aléatoire
+
+    Returns:
+        pd.DataFrame: Colonnes [Date, Symbol, Open, High, Low, Close, Volume]
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end_date)
+    dates = pd.bdate_range(end - pd.DateOffset(years=n_years), end)
+    symbols = make_symbols(n_symbols) + [config.INDICES['MASI']]
+    n_dates, n_series = len(dates), len(symbols)
+
+    # Rendements log journaliers (dates × symboles) puis niveaux de prix
+    daily_returns = rng.normal(0.0003, 0.015, size=(n_dates, n_series))
+    initial_prices = rng.uniform(20, 2000, size=n_series)
+    closes = np.round(initial_prices * np.exp(np.cumsum(daily_returns, axis=0)), 2)
+
+    opens = np.round(closes * (1 + rng.normal(0, 0.003, size=closes.shape)), 2)
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.004, size=closes.shape)))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.004, size=closes.shape)))
+    volumes = rng.integers(1, 50_000, size=closes.shape)
+
+    # Format long, trié par symbole puis par date comme les fichiers réels
+    return pd.DataFrame({
+        'Date': np.tile(dates.to_numpy(), n_series),
+        'Symbol': np.repeat(symbols, n_dates),
+        'Open': opens.T.ravel(),
+        'High': np.round(highs, 2).T.ravel(),
+        'Low': np.round(lows, 2).T.ravel(),
+        'Close': closes.T.ravel(),
+        'Volume': volumes.T.ravel(),
+    })
+
+def generate_transactions(n_transactions, symbols, start_date, end_date=DEFAULT_END_DATE,
+                          sell_ratio=0.3, seed=0):
+    """
+    Génère un journal de transactions sans vente à découvert
+
+    Les ventes qui rendraient une position négative sont converties en achats, ce qui
+    garantit en une passe vectorisée une position positive ou nulle à tout instant.
+
+    Args:
+        n_transactions (int): Nombre de transactions
+        symbols (list): Symboles pouvant être traités
+        start_date (str or pd.Timestamp): Première date possible
+        end_date (str or pd.Timestamp, optional): Dernière date possible
+        sell_ratio (float, optional): Proportion de ventes souhaitée
+        seed (int, optional): Graine du générateur aléatoire
+
+    Returns:
+        pd.DataFrame: Colonnes [Date, Symbol, Type, Quantity, Price]
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start_date, end_date)
+
+    transactions = pd.DataFrame({
+        'Date': dates[rng.integers(0, len(dates), size=n_transactions)],
+        'Symbol': np.asarray(symbols, dtype=object)[rng.integers(0, len(symbols), size=n_transactions)],
+        'Quantity': rng.integers(1, 100, size=n_transactions),
+        'Price': np.round(rng.uniform(20, 2000, size=n_transactions), 2),
+    })
+    signs = np.where(rng.random(n_transactions) < sell_ratio, -1, 1)
+
+    transactions = transactions.assign(sign=signs).sort_values(['Symbol', 'Date'], kind='stable')
+    positions = (transactions['sign'] * transactions['Quantity']).groupby(transactions['Symbol']).cumsum()
+    transactions.loc[positions.to_numpy() < 0, 'sign'] = 1
+
+    transactions['Type'] = np.where(transactions['sign'] > 0, 'BUY', 'SELL')
+    transactions = transactions.sort_values('Date', kind='stable').reset_index(drop=True)
+    return transactions[['Date', 'Symbol', 'Type', 'Quantity', 'Price']]
+
+def write_csv(data, path):
+    """
+    Écrit des données au format CSV de l'application (séparateur ';', dates jj/mm/aaaa)
+
+    Args:
+        data (pd.DataFrame): Données générées
+        path (str): Chemin du fichier à écrire
+    """
+    data.to_csv(path, sep=';', index=False, date_format='%d/%m/%Y')
@@ -0,0 +1,255 @@
+"""
+Benchmarks des moteurs de portefeuille et de performance sur données synthétiques
+
+Fait varier un paramètre à la fois autour d'un scénario de référence : nombre de
+symboles (10 → 2 000), profondeur de l'historique (1 → 30 ans) et nombre de
+transactions (10 → 1 000 000). Pour chaque scénario, mesure le temps d'exécution
+(meilleur de --repeat) et le pic mémoire (tracemalloc) de chaque fonction, cache
+des métriques vidé. Le résultat JSON peut être comparé à celui d'un autre commit.
+
+Usage:
+    python -m benchmarks.run_benchmarks [--quick] [--output bench.json]
+        [--baseline bench_ref.json] [--tolerance 0.2]
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import pandas as pd
+
+import config
+from benchmarks.generators import (
+    DEFAULT_END_DATE, make_symbols, generate_historical_data, generate_transactions
+)
+from benchmarks.bench_import_time import PROJECT_ROOT
+
+# Scénario de référence autour duquel chaque paramètre varie
+BASE_SCENARIO = {'symbols': 50, 'years': 3, 'transactions': 1_000}
+
+SWEEPS = {
+    'symbols': [10, 100, 500, 2_000],
+    'years': [1, 5, 10, 30],
+    'transactions': [10, 1_000, 100_000, 1_000_000],
+}
+
+# Grille réduite pour une vérification rapide
+QUICK_SWEEPS = {
+    'symbols': [10, 100],
+    'years': [1, 5],
+    'transactions': [10, 10_000],
+}
+
+def build_scenario(symbols, years, transactions, seed=0):
+    """
+    Génère et met au format de l'application les données d'un scénario
+
+    Args:
+        symbols (int): Nombre de symboles
+        years (int): Profondeur de l'historique en années
+        transactions (int): Nombre de transactions
+        seed (int, optional): Graine du générateur
+
+    Returns:
+        tuple: (historical_data, transactions_data) canoniques
+    """
+    from modules.data_loader import canonicalize_historical_data, canonicalize_transactions_data
+
+    historical_data = generate_historical_data(symbols, years, seed=seed)
+    start_date = pd.Timestamp(DEFAULT_END_DATE) - pd.DateOffset(years=years)
+    transactions_data = generate_transactions(transactions, make_symbols(symbols), start_date, seed=seed)
+    return canonicalize_historical_data(historical_data), canonicalize_transactions_data(transactions_data)
+
+def benchmark_cases(historical_data, transactions_data):
+    """
+    Liste les fonctions mesurées pour un scénario
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques canoniques
+        transactions_data (pd.DataFrame): Transactions canoniques
+
+    Returns:
+        list: (nom, fonction sans argument)
+    """
+    from modules.data_loader import PriceHistory, get_current_prices
+    from modules.portfolio import calculate_portfolio_metrics, calculate_best_worst_performers
+    from modules.performance import calculate_comparative_performance, calculate_missed_profit
+    from modules.risk import calculate_risk_metrics
+
+    as_of_date = historical_data['date'].max()
+    benchmark = config.INDICES['MASI']
+
+    return [
+        ('PriceHistory.from_frame', lambda: PriceHistory.from_frame(historical_data)),
+        ('get_current_prices', lambda: get_current_prices(historical_data, as_of_date)),
+        ('calculate_portfolio_metrics', lambda: calculate_portfolio_metrics(transactions_data, historical_data)),
+        ('calculate_comparative_performance',
+         lambda: calculate_comparative_performance(historical_data, transactions_data, benchmark, '1Y')),
+        ('calculate_best_worst_performers',
+         lambda: calculate_best_worst_performers(transactions_data, historical_data, '1Y')),
+        ('calculate_missed_profit', lambda: calculate_missed_profit(historical_data, transactions_data)),
+        ('calculate_risk_metrics', lambda: calculate_risk_metrics(historical_data, transactions_data, '1Y')),
+    ]
+
+def measure(func, repeat):
+    """
+    Mesure le temps et le pic mémoire d'une fonction, cache des métriques vidé
+
+    Le temps retenu est le meilleur des répétitions ; le pic mémoire est mesuré
+    lors d'une exécution distincte sous tracemalloc, qui ralentit les allocations.
+
+    Args:
+        func (callable): Fonction à mesurer
+        repeat (int): Nombre de répétitions chronométrées
+
+    Returns:
+        dict: wall_s, peak_mb, error
+    """
+    from modules.cache import metrics_cache
+
+    timings = []
+    try:
+        for _ in range(repeat):
+            metrics_cache.clear()
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        metrics_cache.clear()
+        gc.collect()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    except Exception as e:
+        return {'wall_s': None, 'peak_mb': None, 'error': f"{type(e).__name__}: {e}"}
+    finally:
+        tracemalloc.stop()
+
+    return {'wall_s': min(timings), 'peak_mb': peak / 1024 / 1024, 'error': None}
+
+def scenarios(sweeps):
+    """
+    Énumère les scénarios : un paramètre varie, les autres restent à la référence
+
+    Args:
+        sweeps (dict): Valeurs à parcourir par paramètre
+
+    Returns:
+        list: Scénarios (dictionnaires symbols, years, transactions), sans doublon
+    """
+    seen, result = set(), []
+    for parameter, values in sweeps.items():
+        for value in values:
+            scenario = dict(BASE_SCENARIO, **{parameter: value})
+            key = tuple(scenario.values())
+            if key not in seen:
+                seen.add(key)
+                result.append(scenario)
+    return result
+
+def git_revision():
+    """Retourne le commit courant (None hors d'un dépôt git)"""
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+def run(sweeps, repeat):
+    """
+    Exécute tous les scénarios et retourne les mesures
+
+    Args:
+        sweeps (dict): Valeurs à parcourir par paramètre
+        repeat (int): Nombre de répétitions chronométrées
+
+    Returns:
+        dict: Contexte d'exécution et liste des mesures
+    """
+    results = []
+    for scenario in scenarios(sweeps):
+        historical_data, transactions_data = build_scenario(**scenario)
+        print(f"Scénario {scenario}: {len(historical_data)} prix, {len(transactions_data)} transactions")
+
+        for name, func in benchmark_cases(historical_data, transactions_data):
+            measurement = measure(func, repeat)
+            results.append(dict(scenario, function=name, **measurement))
+            if measurement['error']:
+                print(f"  {name:<36} erreur: {measurement['error']}")
+            else:
+                print(f"  {name:<36} {1000 * measurement['wall_s']:10.1f} ms {measurement['peak_mb']:9.1f} Mo")
+
+        del historical_data, transactions_data
+        gc.collect()
+
+    return {
+        'commit': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeat': repeat,
+        'results': results,
+    }
+
+def compare(report, baseline, tolerance):
+    """
+    Compare des mesures à celles d'une exécution de référence
+
+    Args:
+        report (dict): Mesures courantes
+        baseline (dict): Mesures de référence
+        tolerance (float): Dégradation relative tolérée (0.2 = +20%)
+
+    Returns:
+        list: Messages décrivant les régressions (vide si aucune)
+    """
+    def key(result):
+        return (result['function'], result['symbols'], result['years'], result['transactions'])
+
+    reference = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        previous = reference.get(key(result))
+        if previous is None or result['error'] or previous['error']:
+            continue
+        for metric, unit in (('wall_s', 's'), ('peak_mb', 'Mo')):
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['function']} {key(result)[1:]} {metric}: "
+                    f"{previous[metric]:.3f} {unit} -> {result[metric]:.3f} {unit}"
+                )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true', help="Grille réduite")
+    parser.add_argument('--repeat', type=int, default=3, help="Répétitions chronométrées")
+    parser.add_argument('--output', help="Fichier JSON où enregistrer les mesures")
+    parser.add_argument('--baseline', help="Mesures JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Dégradation relative tolérée")
+    args = parser.parse_args()
+
+    report = run(QUICK_SWEEPS if args.quick else SWEEPS, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"Régression: {message}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,32 @@
 """Callbacks pour les sélecteurs de date"""
 from dash import Input, Output, State, callback_context
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from modules.data_loader import get_price_history
+from modules.dataset_cache import get_current_dataset
+from modules.utils import get_period_start
+
+# Période associée à chaque bouton (voir layouts.main_layout)
+PERIOD_BUTTONS = {
+    'btn-1y': '1Y',
+    'btn-6m': '6M',
+    'btn-3m': '3M',
+    'btn-1m': '1M',
+    'btn-60d': 'Last 60 Days',
+    'btn-mtd': 'MTD',
+    'btn-ytd': 'YTD',
+}
+
+def get_clicked_period():
+    """
+    Retourne la période du bouton à l'origine du callback en cours
+
+    Returns:
+        str: Période (clé de config.TIME_PERIODS), '1Y' sans clic (chargement de la page)
+    """
+    ctx = callback_context
+    button_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    return PERIOD_BUTTONS.get(button_id, '1Y')
 
 def register_date_callbacks(app):
     """Enregistre les callbacks pour les sélecteurs de date"""
@@ -10,88 +36,39 @@ def register_date_callbacks(app):
             Output('start-date-picker', 'date'),
             Output('end-date-picker', 'date')
         ],
-        [
-            Input('btn-1y', 'n_clicks'),
-            Input('btn-6m', 'n_clicks'),
-            Input('btn-60d', 'n_clicks'),
-            Input('btn-mtd', 'n_clicks'),
-            Input('btn-ytd', 'n_clicks')
-        ],
+        [Input(button_id, 'n_clicks') for button_id in PERIOD_BUTTONS],
         [State('end-date-picker', 'date')]
     )
-    def update_date_range(n1y, n6m, n60d, nmtd, nytd, end_date):
+    def update_date_range(*args):
         """
         Met à jour les sélecteurs de date en fonction du bouton de période cliqué
         
         Args:
-            n1y (int): Nombre de clics sur le bouton 1Y
-            n6m (int): Nombre de clics sur le bouton 6M
-            n60d (int): Nombre de clics sur le bouton 60D
-            nmtd (int): Nombre de clics sur le bouton MTD
-            nytd (int): Nombre de clics sur le bouton YTD
-            end_date (str): Date de fin actuelle
+            *args: Nombre de clics de chaque bouton de PERIOD_BUTTONS, puis la date
+                de fin actuelle (str)
         
         Returns:
             tuple: (date_debut, date_fin) au format YYYY-MM-DD
         """
-        ctx = callback_context
-        if not ctx.triggered:
-            # Valeurs par défaut : 1 an
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            return start_date.date().isoformat(), end_date.date().isoformat()
-        
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        end_date = datetime.now() if end_date is None else datetime.strptime(end_date.split('T')[0], '%Y-%m-%d')
-        
-        if button_id == 'btn-1y':
-            start_date = end_date - timedelta(days=365)
-        elif button_id == 'btn-6m':
-            start_date = end_date - timedelta(days=180)
-        elif button_id == 'btn-60d':
-            start_date = end_date - timedelta(days=60)
-        elif button_id == 'btn-mtd':
-            start_date = end_date.replace(day=1)
-        elif button_id == 'btn-ytd':
-            start_date = end_date.replace(month=1, day=1)
+        end_date = args[-1]
+        if end_date is None:
+            # Par défaut : dernière date de cotation du jeu de données servi
+            end_date = get_price_history(get_current_dataset()[0]).last_date
         else:
-            start_date = end_date - timedelta(days=365)
+            end_date = datetime.strptime(end_date.split('T')[0], '%Y-%m-%d')
         
-        # Mettre à jour le store pour la période
+        start_date = get_period_start(get_clicked_period(), end_date)
         return start_date.date().isoformat(), end_date.date().isoformat()
     
     @app.callback(
         Output('store-current-period', 'data'),
-        [
-            Input('btn-1y', 'n_clicks'),
-            Input('btn-6m', 'n_clicks'),
-            Input('btn-60d', 'n_clicks'),
-            Input('btn-mtd', 'n_clicks'),
-            Input('btn-ytd', 'n_clicks')
-        ]
+        [Input(button_id, 'n_clicks') for button_id in PERIOD_BUTTONS]
     )
-    def update_current_period(n1y, n6m, n60d, nmtd, nytd):
+    def update_current_period(*n_clicks):
         """
         Met à jour la période actuelle dans le store
         
         Returns:
-            str: Période actuelle ('1Y', '6M', 'Last 60 Days', 'MTD', 'YTD')
+            str: Période actuelle (valeur de PERIOD_BUTTONS, '1Y' par défaut)
         """
-        ctx = callback_context
-        if not ctx.triggered:
-            return '1Y'  # Valeur par défaut
-        
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if button_id == 'btn-1y':
-            return '1Y'
-        elif button_id == 'btn-6m':
-            return '6M'
-        elif button_id == 'btn-60d':
-            return 'Last 60 Days'
-        elif button_id == 'btn-mtd':
-            return 'MTD'
-        elif button_id == 'btn-ytd':
-            return 'YTD'
-        else:
-            return '1Y'  # Valeur par défaut
\ No newline at end of file
+        return get_clicked_period()
@@ -5,12 +5,11 @@ Callbacks pour le portefeuille
 from dash import Input, Output, State
 import pandas as pd
 import json
-import plotly.graph_objects as go
-import plotly.express as px
 
 from modules.portfolio import calculate_portfolio_metrics, calculate_best_worst_performers
 from modules.performance import calculate_comparative_performance, calculate_missed_profit
 from modules.data_loader import get_current_prices
+from modules.dataset_cache import get_current_dataset
 from modules.utils import format_currency, format_percentage
 
 def register_portfolio_callbacks(app):
@@ -26,27 +25,14 @@ def register_portfolio_callbacks(app):
             Input('store-current-period', 'data'),
             Input('start-date-picker', 'date'),
             Input('end-date-picker', 'date')
-        ],
-        [
-            State('store-historical-data', 'data'),
-            State('store-transactions-data', 'data')
         ]
     )
-    def update_portfolio_table(period, start_date, end_date, historical_data_json, transactions_data_json):
+    def update_portfolio_table(period, start_date, end_date):
         """
         Met à jour le tableau du portefeuille en fonction de la période sélectionnée
         """
-        # Convertir les données JSON en DataFrames
-        try:
-            historical_data = pd.read_json(historical_data_json, orient='split')
-            transactions_data = pd.read_json(transactions_data_json, orient='split')
-            
-            # Convertir les dates
-            historical_data['date'] = pd.to_datetime(historical_data['Date'])
-            transactions_data['purchase_date'] = pd.to_datetime(transactions_data['Date_Acquisition'])
-        except Exception as e:
-            # En cas d'erreur, retourner un tableau vide
-            return []
+        # Jeu de données servi (complété par les ajouts de prix)
+        historical_data, transactions_data = get_current_dataset()
         
         # Filtrer les données selon la période
         end_date = pd.to_datetime(end_date)
@@ -95,18 +81,18 @@ def register_portfolio_callbacks(app):
                 'missed_profit': 'Missed Profit'
             })
         
-            # Formatage des valeurs
-            table_data['Current Price'] = table_data['Current Price'].apply(lambda x: format_currency(x, ""))
-            table_data['Missed Profit'] = table_data['Missed Profit'].apply(lambda x: format_currency(x))
-            
-            # Calcul du total
+            # Calcul du total (avant formatage)
             total_row = {
                 'Symbol': 'Total',
-                'Current Price': format_currency(table_data['Current Price'].apply(lambda x: float(x.replace('₹', '').replace(',', ''))).sum(), ""),
+                'Current Price': format_currency(table_data['Current Price'].sum(), ""),
                 'Quantity': int(table_data['Quantity'].sum()),
-                'Missed Profit': format_currency(table_data['Missed Profit'].apply(lambda x: float(x.replace('₹', '').replace(',', ''))).sum())
+                'Missed Profit': format_currency(table_data['Missed Profit'].sum())
             }
             
+            # Formatage des valeurs
+            table_data['Current Price'] = table_data['Current Price'].apply(lambda x: format_currency(x, ""))
+            table_data['Missed Profit'] = table_data['Missed Profit'].apply(lambda x: format_currency(x))
+            
             # Ajouter la ligne de total
             table_data = pd.concat([table_data, pd.DataFrame([total_row])], ignore_index=True)
             
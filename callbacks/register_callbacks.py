@@ -1,13 +1,15 @@
 from dash import Input, Output, State, html, dcc, dash_table, callback
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
 
-def register_all_callbacks(app, historical_data, transactions_data):
+def register_all_callbacks(app):
     """
     Enregistre tous les callbacks de l'application
+
+    Chaque callback relit le jeu de données servi (get_current_dataset) : les prix
+    ajoutés par ingest_prices sont pris en compte sans redémarrer l'application.
     """
+    from modules.dataset_cache import get_current_dataset
     
     # Callback pour changer le contenu des onglets
     @app.callback(
@@ -16,12 +18,13 @@ def register_all_callbacks(app, historical_data, transactions_data):
     )
     def render_tab_content(active_tab):
         """Affiche le contenu de l'onglet sélectionné"""
+        historical_data, transactions_data = get_current_dataset()
         try:
-            if active_tab == "tab-overview":
+            if active_tab == "overview":
                 return render_overview_tab(historical_data, transactions_data)
-            elif active_tab == "tab-transactions":
+            elif active_tab == "transactions":
                 return render_transactions_tab(transactions_data)
-            elif active_tab == "tab-analysis":
+            elif active_tab == "analysis":
                 return render_analysis_tab(historical_data, transactions_data)
             else:
                 return html.Div("Onglet non reconnu")
@@ -34,6 +37,113 @@ def register_all_callbacks(app, historical_data, transactions_data):
                 html.P(f"Détails de l'erreur: {str(e)}")
             ])
 
+    # Callback de zoom : recharge la plage visible du graphique des prix à pleine résolution
+    @app.callback(
+        Output("analysis-price-chart", "figure"),
+        Input("analysis-price-chart", "relayoutData"),
+        prevent_initial_call=True,
+    )
+    def zoom_price_chart(relayout_data):
+        """Réduit les cours de la plage visible à la largeur du graphique"""
+        from dash.exceptions import PreventUpdate
+        
+        x_range = get_relayout_x_range(relayout_data)
+        if x_range is None:
+            raise PreventUpdate
+        historical_data, _ = get_current_dataset()
+        return create_price_figure(historical_data, *x_range)
+
+    # Callback de la simulation de rééquilibrage : relance l'optimisation à chaque paramètre
+    @app.callback(
+        Output("rebalancing-results", "children"),
+        Input("rebalancing-method", "value"),
+        Input("rebalancing-max-weight", "value"),
+        Input("rebalancing-risk-aversion", "value"),
+        prevent_initial_call=True,
+    )
+    def update_rebalancing(method, max_weight, risk_aversion):
+        """Recalcule les poids cibles et les ordres de rééquilibrage"""
+        from layouts.buy_high_sell_low import create_rebalancing_results
+        
+        historical_data, transactions_data = get_current_dataset()
+        try:
+            return create_rebalancing_results(
+                historical_data,
+                transactions_data,
+                method,
+                None if max_weight is None else max_weight / 100,
+                risk_aversion,
+            )
+        except ValueError as e:
+            print(f"Erreur dans le callback update_rebalancing: {e}")
+            return html.Div([
+                html.P(f"Paramètres invalides : {e}", className="no-data-message")
+            ], className="no-data-container")
+
+def get_relayout_x_range(relayout_data):
+    """
+    Extrait la plage de l'axe des x d'un événement relayoutData
+    
+    Args:
+        relayout_data (dict): Événement de zoom ou de déplacement du graphique
+    
+    Returns:
+        tuple: (début, fin), (None, None) pour revenir à tout l'historique, ou None si
+            l'événement ne modifie pas l'axe des x
+    """
+    if not relayout_data:
+        return None
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'][:2])
+    return None
+
+def create_price_figure(historical_data, start_date=None, end_date=None):
+    """
+    Crée le graphique des prix de clôture réduit à la largeur d'affichage
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        start_date (str, optional): Début de la plage visible (tout l'historique si None)
+        end_date (str, optional): Fin de la plage visible (tout l'historique si None)
+    
+    Returns:
+        plotly.graph_objects.Figure: Graphique des prix
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+    from modules.downsampling import get_chart_series
+    
+    start_date = None if start_date is None else pd.Timestamp(start_date)
+    end_date = None if end_date is None else pd.Timestamp(end_date)
+    chart_data = get_chart_series(historical_data, start_date, end_date)
+    
+    # Une trace WebGL par symbole (les lignes sont groupées par symbole)
+    symbols = chart_data['symbol'].to_numpy()
+    dates = chart_data['date'].to_numpy()
+    closes = chart_data['close'].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True]) if len(symbols) else [0]
+    traces = [
+        go.Scattergl(x=dates[start:end], y=closes[start:end], mode='lines', name=symbols[start])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    
+    fig = go.Figure(traces)
+    
+    # Conserver le zoom et les séries masquées lors des mises à jour
+    fig.update_layout(
+        title='Évolution des prix de clôture',
+        xaxis_title='date',
+        yaxis_title='close',
+        uirevision='analysis-price-chart',
+    )
+    if start_date is not None and end_date is not None:
+        fig.update_xaxes(range=[start_date, end_date])
+    return fig
+
 def render_overview_tab(historical_data, transactions_data):
     """Affiche l'onglet Vue d'ensemble"""
     from dash import html, dcc
@@ -49,49 +159,23 @@ def render_overview_tab(historical_data, transactions_data):
             html.P("Veuillez charger des données historiques et des transactions.")
         ])
     
-    # Calculer la valeur actuelle du portefeuille
-    # Obtenir les derniers prix pour chaque action
-    latest_prices = {}
-    for symbol in historical_data['Symbol'].unique():
-        symbol_data = historical_data[historical_data['Symbol'] == symbol]
-        latest_date = symbol_data['Date'].max()
-        latest_price = symbol_data[symbol_data['Date'] == latest_date]['Close'].values[0]
-        latest_prices[symbol] = latest_price
-    
-    # Calculer les positions actuelles basées sur les transactions
-    positions = {}
-    for symbol in transactions_data['Symbol'].unique():
-        symbol_transactions = transactions_data[transactions_data['Symbol'] == symbol]
-        quantity = 0
-        cost_basis = 0
-        
-        for _, transaction in symbol_transactions.iterrows():
-            if transaction['Type'] == 'BUY':
-                cost_basis += transaction['Quantity'] * transaction['Price']
-                quantity += transaction['Quantity']
-            elif transaction['Type'] == 'SELL':
-                # Méthode FIFO simplifiée pour le coût
-                cost_basis = cost_basis * (1 - transaction['Quantity'] / quantity)
-                quantity -= transaction['Quantity']
-        
-        if quantity > 0:
-            current_value = quantity * latest_prices[symbol]
-            profit_loss = current_value - cost_basis
-            profit_loss_pct = (profit_loss / cost_basis) * 100 if cost_basis > 0 else 0
-            
-            positions[symbol] = {
-                'Quantité': quantity,
-                'Prix moyen': cost_basis / quantity if quantity > 0 else 0,
-                'Prix actuel': latest_prices[symbol],
-                'Valeur actuelle': current_value,
-                'Gain/Perte': profit_loss,
-                'Gain/Perte %': profit_loss_pct
-            }
+    # Positions ouvertes et plus-values (appariement des lots, voir match_lots)
+    from modules.portfolio import calculate_portfolio_metrics
+    portfolio_metrics = calculate_portfolio_metrics(transactions_data, historical_data)
+    details = portfolio_metrics['portfolio_details']
+    details = details[details['quantity'] > 0]
     
     # Créer un DataFrame des positions
-    positions_df = pd.DataFrame.from_dict(positions, orient='index')
-    positions_df.reset_index(inplace=True)
-    positions_df.rename(columns={'index': 'Symbole'}, inplace=True)
+    positions_df = pd.DataFrame({
+        'Symbole': details['symbol'],
+        'Quantité': details['quantity'],
+        'Prix moyen': details['avg_purchase_price'],
+        'Prix actuel': details['close'],
+        'Valeur actuelle': details['current_value'],
+        'Gain/Perte': details['profit_loss'],
+        'Gain/Perte %': details['profit_loss_percent'],
+        'Gain réalisé': details['realized_pl'],
+    }).reset_index(drop=True)
     
     # Calculer la valeur totale du portefeuille
     total_value = positions_df['Valeur actuelle'].sum()
@@ -137,7 +221,7 @@ def render_overview_tab(historical_data, transactions_data):
                 dbc.Card([
                     dbc.CardBody([
                         html.H5("Nombre d'actions", className="card-title"),
-                        html.H3(f"{len(positions)}", className="card-text text-info")
+                        html.H3(f"{len(positions_df)}", className="card-text text-info")
                     ])
                 ]),
                 width=4
@@ -147,8 +231,8 @@ def render_overview_tab(historical_data, transactions_data):
                     dbc.CardBody([
                         html.H5("Gain/Perte totale", className="card-title"),
                         html.H3(
-                            f"{positions_df['Gain/Perte'].sum():.2f} €", 
-                            className=f"card-text {'text-success' if positions_df['Gain/Perte'].sum() >= 0 else 'text-danger'}"
+                            f"{portfolio_metrics['total_profit_loss']:.2f} €", 
+                            className=f"card-text {'text-success' if portfolio_metrics['total_profit_loss'] >= 0 else 'text-danger'}"
                         )
                     ])
                 ]),
@@ -173,7 +257,8 @@ def render_overview_tab(historical_data, transactions_data):
                 {"name": "Prix actuel", "id": "Prix actuel", "type": "numeric", "format": {"specifier": ".2f"}},
                 {"name": "Valeur actuelle", "id": "Valeur actuelle", "type": "numeric", "format": {"specifier": ".2f"}},
                 {"name": "Gain/Perte", "id": "Gain/Perte", "type": "numeric", "format": {"specifier": ".2f"}},
-                {"name": "Gain/Perte %", "id": "Gain/Perte %", "type": "numeric", "format": {"specifier": ".2f"}}
+                {"name": "Gain/Perte %", "id": "Gain/Perte %", "type": "numeric", "format": {"specifier": ".2f"}},
+                {"name": "Gain réalisé", "id": "Gain réalisé", "type": "numeric", "format": {"specifier": ".2f"}}
             ],
             data=positions_df.to_dict('records'),
             style_table={'overflowX': 'auto'},
@@ -259,11 +344,15 @@ def render_analysis_tab(historical_data, transactions_data):
             html.P("Veuillez charger des données historiques.")
         ])
     
-    # Sinon, afficher un graphique simple
-    fig = px.line(historical_data, x='Date', y='Close', color='Symbol',
-                 title='Évolution des prix de clôture')
+    from layouts.portfolio_breakdown import create_portfolio_breakdown_layout
+    from layouts.buy_high_sell_low import create_buy_high_sell_low_layout
+    
+    # Sinon, afficher les prix réduits à la largeur du graphique (affinés au zoom)
+    fig = create_price_figure(historical_data)
     
     return html.Div([
         html.H3("Analyse du portefeuille"),
-        dcc.Graph(figure=fig)
+        dcc.Graph(id='analysis-price-chart', figure=fig),
+        create_portfolio_breakdown_layout(historical_data, transactions_data),
+        create_buy_high_sell_low_layout(historical_data, transactions_data)
     ])
\ No newline at end of file
@@ -6,11 +6,14 @@ import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
-from modules.performance import calculate_comparative_performance
 
-def create_performance_chart(historical_data, transactions_data, period='1Y'):
+import config
+from modules.performance import (
+    calculate_comparative_performance, calculate_portfolio_performance, has_benchmark_data,
+)
+
+def create_performance_chart(historical_data, transactions_data, period='1Y', return_mode=None):
     """
     Crée un graphique de performance comparative
     
@@ -18,18 +21,32 @@ def create_performance_chart(historical_data, transactions_data, period='1Y'):
         historical_data (pd.DataFrame): Données historiques des prix
         transactions_data (pd.DataFrame): Données des transactions
         period (str): Période d'analyse ('1Y', '6M', 'MTD', 'YTD', 'Last 60 Days')
+        return_mode (str, optional): 'price' ou 'total'. Par défaut
+            config.PERFORMANCE_RETURN_MODE.
     
     Returns:
         dash.html.Div: Composant de graphique de performance
     """
-    # Calculer les performances comparatives
-    comp_performance = calculate_comparative_performance(historical_data, transactions_data, '^NSEI', period)
+    return_mode = return_mode or config.PERFORMANCE_RETURN_MODE
+    
+    # Calculer les performances comparatives ; sans cotations de l'indice, la
+    # performance du portefeuille est affichée seule (pas de courbe de référence)
+    benchmark_symbol = config.INDICES['MASI']
+    with_benchmark = has_benchmark_data(historical_data, benchmark_symbol)
+    if with_benchmark:
+        comp_performance = calculate_comparative_performance(
+            historical_data, transactions_data, benchmark_symbol, period, return_mode
+        )
+    else:
+        comp_performance = calculate_portfolio_performance(historical_data, transactions_data, period, return_mode)
     
     # Si aucune donnée n'est disponible, créer un graphique vide
     if comp_performance.empty:
         fig = go.Figure()
         fig.update_layout(
             title="No performance data available",
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
             template="plotly_dark",
             paper_bgcolor="#333333",
             plot_bgcolor="#333333",
@@ -39,10 +56,7 @@ def create_performance_chart(historical_data, transactions_data, period='1Y'):
     else:
         # Rebaser les performances à 0% au début de la période
         first_portfolio_value = comp_performance['cumulative_portfolio_return'].iloc[0] or 0
-        first_benchmark_value = comp_performance['cumulative_benchmark_return'].iloc[0] or 0
-        
         comp_performance['portfolio_return_rebased'] = comp_performance['cumulative_portfolio_return'] - first_portfolio_value
-        comp_performance['benchmark_return_rebased'] = comp_performance['cumulative_benchmark_return'] - first_benchmark_value
         
         # Créer le graphique
         fig = go.Figure()
@@ -57,17 +71,20 @@ def create_performance_chart(historical_data, transactions_data, period='1Y'):
         ))
         
         # Ajouter la courbe de l'indice de référence
-        fig.add_trace(go.Scatter(
-            x=comp_performance['date'],
-            y=comp_performance['benchmark_return_rebased'],
-            mode='lines',
-            name='NIFTY',
-            line=dict(color='#FFA15A', width=2),
-        ))
+        if with_benchmark:
+            first_benchmark_value = comp_performance['cumulative_benchmark_return'].iloc[0] or 0
+            fig.add_trace(go.Scatter(
+                x=comp_performance['date'],
+                y=comp_performance['cumulative_benchmark_return'] - first_benchmark_value,
+                mode='lines',
+                name='MASI',
+                line=dict(color='#FFA15A', width=2),
+            ))
         
         # Mise en page du graphique
+        title = "Performance Comparison" if with_benchmark else "Portfolio Performance"
         fig.update_layout(
-            title="Performance Comparison",
+            title=f"{title} (Total Return)" if return_mode == 'total' else title,
             template="plotly_dark",
             paper_bgcolor="#333333",
             plot_bgcolor="#333333",
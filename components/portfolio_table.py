@@ -42,18 +42,18 @@ def create_portfolio_table(portfolio_data, missed_profits_data):
             'missed_profit': 'Missed Profit'
         })
     
-        # Formatage des valeurs
-        table_data['Current Price'] = table_data['Current Price'].apply(lambda x: format_currency(x, ""))
-        table_data['Missed Profit'] = table_data['Missed Profit'].apply(format_currency)
-        
-        # Calcul du total
+        # Calcul du total (avant formatage)
         total_row = pd.DataFrame({
             'Symbol': ['Total'],
             'Current Price': [format_currency(table_data['Current Price'].sum(), "")],
             'Quantity': [table_data['Quantity'].sum()],
-            'Missed Profit': [format_currency(table_data['Missed Profit'].sum())]
+            'Missed Profit': [format_currency(table_data['Missed Profit'].fillna(0).sum())]
         })
         
+        # Formatage des valeurs
+        table_data['Current Price'] = table_data['Current Price'].apply(lambda x: format_currency(x, ""))
+        table_data['Missed Profit'] = table_data['Missed Profit'].fillna(0).apply(format_currency)
+        
         # Ajout de la ligne de total
         table_data = pd.concat([table_data, total_row])
     else:
@@ -109,11 +109,11 @@ def create_portfolio_table(portfolio_data, missed_profits_data):
                     },
                     'color': '#FF4500',
                 },
-                # Style pour les profits manqués positifs (avec "$" mais pas "-")
+                # Style pour les profits manqués positifs (avec "DH" mais pas "-")
                 {
                     'if': {
                         'column_id': 'Missed Profit',
-                        'filter_query': '{Missed Profit} contains "₹" && !({Missed Profit} contains "-")'
+                        'filter_query': '{Missed Profit} contains "DH" && !({Missed Profit} contains "-")'
                     },
                     'color': '#00FF7F',
                 },
@@ -12,6 +12,7 @@ def create_summary_cards(
     masi_change,
     profit,
     profit_change,
+    profit_change_value,
     missed_profit,
     trades_done,
     portfolio_value,
@@ -27,10 +28,11 @@ def create_summary_cards(
     Crée les cartes récapitulatives pour l'application
     
     Args:
-        masi_value (float): Valeur actuelle de l'indice MASI
-        masi_change (float): Changement en pourcentage de l'indice MASI
+        masi_value (float): Valeur actuelle de l'indice MASI (None si non coté)
+        masi_change (float): Changement en pourcentage de l'indice MASI (None si non coté)
         profit (float): Profit total du portefeuille
-        profit_change (float): Changement du profit sur la période
+        profit_change (float): Changement du profit mois sur mois en pourcentage
+        profit_change_value (float): Changement du profit mois sur mois en valeur
         missed_profit (float): Profit manqué (actions vendues)
         trades_done (int): Nombre de transactions effectuées
         portfolio_value (float): Valeur actuelle du portefeuille
@@ -38,7 +40,7 @@ def create_summary_cards(
         mom_change (float): Changement mois sur mois en pourcentage
         mom_value (float): Changement mois sur mois en valeur
         returns_percent (float): Rendement total en pourcentage
-        masi_yoy (float): Rendement de l'indice MASI sur un an
+        masi_yoy (float): Rendement de l'indice MASI sur un an (None si non coté)
         best_performer (dict): Meilleure performance {'symbol': str, 'return': float}
         worst_performer (dict): Pire performance {'symbol': str, 'return': float}
     
@@ -47,6 +49,8 @@ def create_summary_cards(
     """
     # Fonction pour formater les changements avec flèche
     def format_change_with_arrow(change):
+        if change is None:
+            return [html.Span("N/A", style={"color": "#FFFFFF"})]
         if change > 0:
             arrow = "↑"
             color = "#00FF7F"  # Vert
@@ -68,10 +72,9 @@ def create_summary_cards(
             dbc.Col(
                 dbc.Card([
                     html.H4("MASI", className="card-title"),
-                    html.H2(f"{masi_value:,}", className="card-value"),
+                    html.H2("N/A" if masi_value is None else f"{masi_value:,.2f}", className="card-value"),
                     html.Div([
                         *format_change_with_arrow(masi_change),
-                        html.Span(f"{masi_change:.2f}", className="change-value")
                     ], className="change-container")
                 ], className="summary-card"),
                 width=12, md=6, lg=3
@@ -86,7 +89,7 @@ def create_summary_cards(
                         html.Div([
                             html.Span("Variation (MoM): "),
                             *format_change_with_arrow(profit_change),
-                            html.Span(format_currency(24.86e3), className="mom-value")
+                            html.Span(format_currency(profit_change_value), className="mom-value")
                         ], className="profit-change"),
                         html.Div([
                             html.Span("Profits Manqués (Actions Vendues): "),
@@ -3,19 +3,38 @@ Configuration de l'application
 """
 import os
 
-# Chemin de base de l'application
-BASE_PATH = "E:\\Dash_Claude"
+# Chemin de base de l'application (dossier contenant ce fichier)
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 
 # Chemins des fichiers de données
 DATA_PATH = os.path.join(BASE_PATH, "data")
 HISTORICAL_DATA_PATH = os.path.join(DATA_PATH, "all_historical_data.csv")
 TRANSACTIONS_DATA_PATH = os.path.join(DATA_PATH, "transactions.csv")
+CORPORATE_ACTIONS_PATH = os.path.join(DATA_PATH, "corporate_actions.csv")
 PROCESSED_DATA_PATH = os.path.join(DATA_PATH, "processed")
 
 # Créer le dossier processed s'il n'existe pas
 if not os.path.exists(PROCESSED_DATA_PATH):
     os.makedirs(PROCESSED_DATA_PATH)
 
+# Cache disque des résultats dérivés (valeurs quotidiennes, rendements, profits manqués)
+RESULTS_CACHE_PATH = os.path.join(PROCESSED_DATA_PATH, "results")
+RESULTS_CACHE_ENABLED = True
+
+# Nombre de lignes du CSV historique analysées par bloc lors de la compilation du stockage
+CSV_CHUNK_ROWS = 500_000
+
+# Correspondance des codes de transaction vers les symboles des cotations
+SYMBOL_ALIASES = {
+    "AKT": "AKDITAL",
+    "IAM": "ITISSALAT-AL-MAGHRIB",
+    "JET": "JET-CONTRACTORS",
+    "MNG": "MANAGEM",
+    "MSA": "SODEP-Marsa-Maroc",
+    "TGC": "TGCC",
+    "TQM": "TAQA-MOROCCO",
+}
+
 # Configuration des couleurs de l'application
 COLORS = {
     "background": "#1E1E1E",
@@ -29,13 +48,75 @@ COLORS = {
 
 # Configuration des périodes disponibles
 TIME_PERIODS = {
+    "1M": 30,
+    "3M": 90,
     "1Y": 365,
     "6M": 180,
     "Last 60 Days": 60,
-    "MTD": 30,  # Month to date
+    "MTD": 0,   # Month to date (calculé dynamiquement)
     "YTD": 0,   # Year to date (calculé dynamiquement)
 }
 
+# Taille maximale du cache des métriques calculées (en octets)
+METRICS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Précalculer en arrière-plan les vues de chaque période après le chargement des données
+PRECOMPUTE_ON_LOAD = True
+
+# Journalisation des modules (précalcul, indicateurs de risque) : niveau et format
+# des messages écrits sur la sortie d'erreur par app.py et wsgi.py
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# Méthode d'appariement des lots pour le coût de revient ('fifo', 'lifo' ou 'average')
+LOT_MATCHING_METHOD = "fifo"
+
+# Rendements du graphique de performance : 'price' (cours seuls, rapportés au coût
+# investi) ou 'total' (dividendes réinvestis, rendement pondéré par le temps)
+PERFORMANCE_RETURN_MODE = "total"
+
+# Indicateurs de risque : jours de cotation par an, taux sans risque annuel, fenêtre
+# de la volatilité glissante (jours de cotation) et nombre minimal de rendements
+TRADING_DAYS_PER_YEAR = 252
+RISK_FREE_RATE = 0.03
+RISK_ROLLING_WINDOW = 63
+RISK_MIN_OBSERVATIONS = 20
+
+# Durée de vie (jours de cotation) de la moyenne exponentielle des covariances
+COVARIANCE_SPAN = 60
+
+# Valeur en risque : méthode par défaut ('historical', 'parametric' ou 'monte_carlo'),
+# niveau de confiance, horizon (jours de cotation) et historique des scénarios
+VAR_METHOD = "historical"
+VAR_CONFIDENCE = 0.95
+VAR_HORIZON_DAYS = 1
+VAR_LOOKBACK_PERIOD = "1Y"
+
+# Simulation Monte-Carlo : trajectoires, trajectoires par lot (mémoire bornée),
+# graine et nombre de processus (1 : dans le processus courant)
+MONTE_CARLO_PATHS = 100_000
+MONTE_CARLO_CHUNK_PATHS = 10_000
+MONTE_CARLO_SEED = 42
+MONTE_CARLO_WORKERS = os.cpu_count() or 1
+
+# Optimisation du rééquilibrage : méthode par défaut ('mean_variance' ou 'risk_parity'),
+# poids maximal d'une position, aversion au risque (moyenne-variance), historique des
+# rendements attendus, tolérance et nombre maximal d'itérations des solveurs
+OPTIMIZER_METHOD = "mean_variance"
+OPTIMIZER_MAX_WEIGHT = 0.25
+OPTIMIZER_RISK_AVERSION = 5.0
+OPTIMIZER_LOOKBACK_PERIOD = "1Y"
+OPTIMIZER_TOLERANCE = 1e-8
+OPTIMIZER_MAX_ITERATIONS = 2000
+
+# Backtest : frais en proportion du montant échangé et nombre de processus du pool
+# des variantes (1 : dans le processus courant)
+BACKTEST_COMMISSION_RATE = 0.0
+BACKTEST_WORKERS = os.cpu_count() or 1
+
+# Largeur de référence des graphiques (en pixels) : nombre maximal de points par série
+CHART_PIXEL_WIDTH = 1200
+
 # Configuration des indices de référence
 INDICES = {
     "MASI": "^MASI",
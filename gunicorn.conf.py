@@ -0,0 +1,46 @@
+"""
+Configuration gunicorn du serveur de production
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Le maître charge l'application (preload_app), précalcule les vues puis fige ses
+objets (gc.freeze) avant de créer les workers : les index de prix et les caches
+sont partagés en copie à l'écriture, et les prix eux-mêmes sont des projections
+en mémoire (np.memmap) du stockage colonnaire, partagées par le cache du système.
+"""
+import gc
+import os
+import multiprocessing
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+timeout = 120
+
+# Charger l'application une seule fois dans le maître, avant le fork
+preload_app = True
+
+def when_ready(server):
+    """Précalcule les vues dans le maître : les workers héritent des caches remplis"""
+    if not server.cfg.preload_app:
+        return
+    import wsgi
+    from modules.precompute import run_precompute
+    run_precompute(wsgi.historical_data, wsgi.transactions_data)
+
+def pre_fork(server, worker):
+    """Fige les objets du maître : les collectes des workers ne touchent plus leurs pages"""
+    # Aucune collecte pendant le gel ; le maître reste ensuite collecté normalement
+    gc.disable()
+    try:
+        gc.freeze()
+    finally:
+        gc.enable()
+
+def post_fork(server, worker):
+    """Lance le précalcul dans le worker lorsque l'application n'est pas préchargée"""
+    if not server.cfg.preload_app:
+        import wsgi
+        from modules.precompute import start_precompute
+        start_precompute(wsgi.historical_data, wsgi.transactions_data)
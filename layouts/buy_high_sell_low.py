@@ -1 +1,178 @@
 # Page stratégie d'achat/vente
+"""
+Layout pour la simulation de rééquilibrage des positions actuelles
+"""
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+
+import config
+from modules.optimizer import optimize_portfolio
+from modules.utils import format_currency, format_percentage
+
+# Libellés des méthodes d'optimisation
+METHOD_LABELS = {
+    'mean_variance': "Moyenne-variance",
+    'risk_parity': "Parité des risques",
+}
+
+def create_weights_figure(trades):
+    """
+    Crée le graphique des poids actuels et cibles
+
+    Args:
+        trades (pd.DataFrame): Ordres de rééquilibrage (voir optimize_portfolio)
+
+    Returns:
+        plotly.graph_objects.Figure: Graphique en barres groupées
+    """
+    fig = go.Figure([
+        go.Bar(x=trades['symbol'], y=trades['current_weight'] * 100, name="Actuel"),
+        go.Bar(x=trades['symbol'], y=trades['target_weight'] * 100, name="Cible"),
+    ])
+    fig.update_layout(
+        title="Poids actuels et cibles",
+        template="plotly_dark",
+        paper_bgcolor="#333333",
+        plot_bgcolor="#333333",
+        margin=dict(l=20, r=20, t=40, b=20),
+        yaxis_title="Poids (%)",
+        barmode='group',
+        height=400,
+    )
+    return fig
+
+def create_rebalancing_results(historical_data, transactions_data, method=None, max_weight=None, risk_aversion=None):
+    """
+    Crée le résultat d'une simulation de rééquilibrage (synthèse, graphique et ordres)
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        method (str, optional): Méthode d'optimisation (voir modules.optimizer)
+        max_weight (float, optional): Poids maximal d'une position
+        risk_aversion (float, optional): Aversion au risque ('mean_variance')
+
+    Returns:
+        dash.html.Div: Résultat de la simulation
+    """
+    result = optimize_portfolio(historical_data, transactions_data, method, max_weight, risk_aversion)
+    trades = result['trades']
+    if trades.empty:
+        return html.Div([
+            html.P("Aucune position ouverte.", className="no-data-message")
+        ], className="no-data-container")
+
+    table_data = trades.assign(
+        current_weight=(trades['current_weight'] * 100).map(format_percentage),
+        target_weight=(trades['target_weight'] * 100).map(format_percentage),
+        target_value=trades['target_value'].map(format_currency),
+        trade_value=trades['trade_value'].map(format_currency),
+        trade_quantity=trades['trade_quantity'].round(),
+    ).to_dict('records')
+
+    summary = [
+        ("Rendement attendu", result['current_return'], result['target_return']),
+        ("Volatilité", result['current_volatility'], result['target_volatility']),
+    ]
+    summary_lines = [
+        html.P(f"{label} : {format_percentage(current * 100)} → {format_percentage(target * 100)}")
+        for label, current, target in summary
+    ]
+    if result['effective_max_weight'] > result['max_weight']:
+        summary_lines.append(html.P(
+            f"Poids maximal relevé à {format_percentage(result['effective_max_weight'] * 100)} : "
+            f"{format_percentage(result['max_weight'] * 100)} ne suffit pas à répartir le portefeuille "
+            f"entre les positions optimisées.",
+            className="rebalancing-warning",
+        ))
+    return html.Div([
+        html.Div(summary_lines, className="rebalancing-summary"),
+        dbc.Row([
+            dbc.Col(
+                dcc.Graph(figure=create_weights_figure(trades), config={'displayModeBar': False, 'responsive': True}),
+                width=12, lg=6
+            ),
+            dbc.Col(
+                dash_table.DataTable(
+                    id='rebalancing-table',
+                    columns=[
+                        {'name': 'Symbole', 'id': 'symbol'},
+                        {'name': 'Poids actuel', 'id': 'current_weight'},
+                        {'name': 'Poids cible', 'id': 'target_weight'},
+                        {'name': 'Valeur cible', 'id': 'target_value'},
+                        {'name': 'Montant à échanger', 'id': 'trade_value'},
+                        {'name': 'Titres', 'id': 'trade_quantity', 'type': 'numeric'},
+                    ],
+                    data=table_data,
+                    style_header={'backgroundColor': '#444444', 'color': 'white', 'fontWeight': 'bold'},
+                    style_cell={'backgroundColor': '#333333', 'color': 'white', 'border': 'none', 'textAlign': 'right'},
+                    style_cell_conditional=[{'if': {'column_id': 'symbol'}, 'textAlign': 'left'}],
+                    style_data_conditional=[
+                        {'if': {'filter_query': '{trade_quantity} > 0', 'column_id': 'trade_quantity'},
+                         'color': config.COLORS['positive']},
+                        {'if': {'filter_query': '{trade_quantity} < 0', 'column_id': 'trade_quantity'},
+                         'color': config.COLORS['negative']},
+                    ],
+                ),
+                width=12, lg=6
+            ),
+        ]),
+    ])
+
+def create_buy_high_sell_low_layout(historical_data, transactions_data):
+    """
+    Crée le layout de la simulation de rééquilibrage
+
+    Les paramètres (méthode, plafond, aversion au risque) relancent l'optimisation
+    par le callback de register_all_callbacks.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        dash.html.Div: Layout de la simulation de rééquilibrage
+    """
+    controls = dbc.Row([
+        dbc.Col([
+            html.Label("Méthode"),
+            dcc.Dropdown(
+                id='rebalancing-method',
+                options=[{'label': label, 'value': value} for value, label in METHOD_LABELS.items()],
+                value=config.OPTIMIZER_METHOD,
+                clearable=False,
+            ),
+        ], width=12, md=4),
+        dbc.Col([
+            html.Label("Poids maximal (%)"),
+            dcc.Slider(
+                id='rebalancing-max-weight',
+                min=5,
+                max=100,
+                step=5,
+                value=config.OPTIMIZER_MAX_WEIGHT * 100,
+                marks={value: str(value) for value in range(0, 101, 25)},
+            ),
+        ], width=12, md=5),
+        dbc.Col([
+            html.Label("Aversion au risque"),
+            dcc.Input(
+                id='rebalancing-risk-aversion',
+                type='number',
+                min=0.1,
+                step=0.5,
+                value=config.OPTIMIZER_RISK_AVERSION,
+                debounce=True,
+            ),
+        ], width=12, md=3),
+    ], className="mb-3")
+
+    return html.Div([
+        html.H3("Simulation de rééquilibrage", className="rebalancing-title"),
+        controls,
+        dcc.Loading(html.Div(
+            create_rebalancing_results(historical_data, transactions_data),
+            id='rebalancing-results',
+        )),
+    ], className="rebalancing-container")
@@ -4,17 +4,29 @@ Layout principal de l'application
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-from datetime import datetime
 
-from components.header import create_header
+import config
 from components.date_selector import create_date_selector
 from components.summary_cards import create_summary_cards
 from components.portfolio_table import create_portfolio_table
 from components.performance_chart import create_performance_chart
-from components.tabs import create_tab_navigation
 
-from modules.data_loader import calculate_portfolio_value, get_missed_profits
-from modules.portfolio import calculate_portfolio_metrics, calculate_best_worst_performers, calculate_index_performance
+from modules.data_loader import get_missed_profits, get_price_history
+from modules.dataset_cache import get_current_dataset
+from modules.portfolio import (
+    calculate_portfolio_metrics, calculate_best_worst_performers, calculate_index_performance,
+    calculate_month_over_month, get_index_quote,
+)
+from modules.utils import get_period_start
+
+def serve_layout():
+    """
+    Crée le layout à chaque chargement de page, à partir du jeu de données servi
+
+    Returns:
+        dash.html.Div: Layout principal (voir create_layout)
+    """
+    return create_layout(*get_current_dataset())
 
 def create_layout(historical_data, transactions_data):
     """
@@ -27,62 +39,31 @@ def create_layout(historical_data, transactions_data):
     Returns:
         dash.html.Div: Layout principal
     """
-    return html.Div([
-        # Navbar
-        dbc.Navbar(
-            dbc.Container([
-                html.A(
-                    dbc.Row([
-                        dbc.Col(html.Img(src="/assets/logo.png", height="30px"), width="auto"),
-                        dbc.Col(dbc.NavbarBrand("Equity Portfolio Tracker", className="ms-2")),
-                    ], align="center", className="g-0"),
-                    href="/",
-                    style={"textDecoration": "none"},
-                ),
-            ]),
-            color="dark",
-            dark=True,
-            className="mb-4",
-        ),
-        
-        # Contenu principal
-        dbc.Container([
-            # Titre
-            html.H1("Tableau de bord du portefeuille", className="text-center mb-4"),
-            
-            # Onglets
-            dbc.Tabs([
-                dbc.Tab(label="Vue d'ensemble", tab_id="overview"),
-                dbc.Tab(label="Transactions", tab_id="transactions"),
-                dbc.Tab(label="Analyse", tab_id="analysis"),
-            ], id="tabs", active_tab="overview"),
-            
-            # Contenu des onglets
-            html.Div(id="tab-content", className="p-4"),
-            
-        ], fluid=True)
-    ])
     # Calcul des métriques du portefeuille
     portfolio_metrics = calculate_portfolio_metrics(transactions_data, historical_data)
     
     # Calcul des meilleures et pires performances
     best_performer, worst_performer = calculate_best_worst_performers(transactions_data, historical_data, '1Y')
     
-    # Calcul de la performance de l'indice MASI
-    masi_performance = calculate_index_performance(historical_data, '^MASI', '1Y')
+    # Cours et performance de l'indice MASI (None s'il n'est pas coté)
+    masi_symbol = config.INDICES['MASI']
+    masi_value, masi_change = get_index_quote(historical_data, masi_symbol)
+    masi_performance = None if masi_value is None else calculate_index_performance(historical_data, masi_symbol, '1Y')
+    
+    # Variations mois sur mois de la valeur et du profit
+    last_date = get_price_history(historical_data).last_date
+    month_over_month = calculate_month_over_month(transactions_data, historical_data, last_date)
     
     # Calcul des profits manqués
     missed_profits_data = get_missed_profits(historical_data, transactions_data)
     
-    # Dates par défaut pour les sélecteurs
-    start_date = datetime.now().replace(year=datetime.now().year - 1).strftime('%Y-%m-%d')
-    end_date = datetime.now().strftime('%Y-%m-%d')
+    # Dates par défaut pour les sélecteurs : l'année précédant la dernière cotation
+    start_date = get_period_start('1Y', last_date).strftime('%Y-%m-%d')
+    end_date = last_date.strftime('%Y-%m-%d')
     
-    # Création du layout
-    layout = html.Div([
-        # Header
-        create_header(),
-        
+    # Tableau de bord : dates et périodes (register_date_callbacks), cartes
+    # récapitulatives, tableau du portefeuille (register_portfolio_callbacks)
+    dashboard = html.Div([
         # Sélecteur de dates
         create_date_selector(start_date, end_date),
         
@@ -90,6 +71,8 @@ def create_layout(historical_data, transactions_data):
         html.Div([
             dbc.Button('1Y', id='btn-1y', color='light', className='period-btn'),
             dbc.Button('6M', id='btn-6m', color='light', className='period-btn'),
+            dbc.Button('3M', id='btn-3m', color='light', className='period-btn'),
+            dbc.Button('1M', id='btn-1m', color='light', className='period-btn'),
             dbc.Button('Last 60 Days', id='btn-60d', color='light', className='period-btn'),
             dbc.Button('MTD', id='btn-mtd', color='light', className='period-btn'),
             dbc.Button('YTD', id='btn-ytd', color='light', className='period-btn'),
@@ -97,16 +80,17 @@ def create_layout(historical_data, transactions_data):
         
         # Cartes récapitulatives (MASI, Profit, Valeur, Rendements)
         create_summary_cards(
-            masi_value=22378,  # À remplacer par la valeur réelle
-            masi_change=0.18,  # À remplacer par la valeur réelle
+            masi_value=masi_value,
+            masi_change=masi_change,
             profit=portfolio_metrics['total_profit_loss'],
-            profit_change=0.00,  # À calculer
+            profit_change=month_over_month['profit_change_percent'],
+            profit_change_value=month_over_month['profit_change'],
             missed_profit=missed_profits_data['missed_profit'].sum() if not missed_profits_data.empty else 0,
             trades_done=portfolio_metrics['num_transactions'],
             portfolio_value=portfolio_metrics['total_value'],
             invested_amount=portfolio_metrics['total_investment'],
-            mom_change=441.75,  # À calculer
-            mom_value=43.67e3,  # À calculer
+            mom_change=month_over_month['value_change_percent'],
+            mom_value=month_over_month['value_change'],
             returns_percent=portfolio_metrics['total_profit_loss_percent'],
             masi_yoy=masi_performance,
             best_performer=best_performer,
@@ -128,13 +112,44 @@ def create_layout(historical_data, transactions_data):
             ),
         ], className='app-content'),
         
-        # Navigation par onglets
-        create_tab_navigation(),
-        
-        # Store pour les données
-        dcc.Store(id='store-historical-data', data=historical_data.to_json(date_format='iso', orient='split')),
-        dcc.Store(id='store-transactions-data', data=transactions_data.to_json(date_format='iso', orient='split')),
         dcc.Store(id='store-current-period', data='1Y'),
     ], className='main-container')
     
-    return layout
+    return html.Div([
+        # Navbar
+        dbc.Navbar(
+            dbc.Container([
+                html.A(
+                    dbc.Row([
+                        dbc.Col(html.Img(src="/assets/logo.png", height="30px"), width="auto"),
+                        dbc.Col(dbc.NavbarBrand("Equity Portfolio Tracker", className="ms-2")),
+                    ], align="center", className="g-0"),
+                    href="/",
+                    style={"textDecoration": "none"},
+                ),
+            ]),
+            color="dark",
+            dark=True,
+            className="mb-4",
+        ),
+        
+        # Contenu principal
+        dbc.Container([
+            # Titre
+            html.H1("Tableau de bord du portefeuille", className="text-center mb-4"),
+            
+            # Tableau de bord
+            dashboard,
+            
+            # Onglets
+            dbc.Tabs([
+                dbc.Tab(label="Vue d'ensemble", tab_id="overview"),
+                dbc.Tab(label="Transactions", tab_id="transactions"),
+                dbc.Tab(label="Analyse", tab_id="analysis"),
+            ], id="tabs", active_tab="overview"),
+            
+            # Contenu des onglets
+            html.Div(id="tab-content", className="p-4"),
+            
+        ], fluid=True)
+    ])
@@ -7,7 +7,6 @@ from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
 
 from modules.performance import calculate_missed_profit
 from modules.utils import format_currency, format_percentage
@@ -23,6 +22,9 @@ def create_missed_profit_layout(historical_data, transactions_data):
     Returns:
         dash.html.Div: Layout de la vue des profits manqués
     """
+    # plotly.express est coûteux à importer : chargé uniquement pour cette vue
+    import plotly.express as px
+    
     # Calculer les profits manqués
     missed_profits = calculate_missed_profit(historical_data, transactions_data)
     
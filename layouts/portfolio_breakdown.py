@@ -1 +1,144 @@
 # Page de répartition du portefeuille
+"""
+Layout pour la vue de répartition du risque du portefeuille
+"""
+import numpy as np
+import pandas as pd
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+
+from modules.portfolio import calculate_portfolio_metrics
+from modules.covariance import get_correlation_matrix, get_covariance_matrix
+from modules.utils import format_percentage
+
+def calculate_risk_breakdown(historical_data, transactions_data, span=None):
+    """
+    Répartit le risque du portefeuille entre ses positions ouvertes
+
+    La contribution d'une position est w_i × (Σw)_i / w'Σw : les contributions
+    s'additionnent à 100 % de la variance du portefeuille.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        span (int, optional): Durée de vie des covariances (voir modules.covariance)
+
+    Returns:
+        tuple: (DataFrame [symbol, weight, volatility, risk_contribution] en
+            pourcentages, volatilité annualisée du portefeuille en pourcentage)
+    """
+    details = calculate_portfolio_metrics(transactions_data, historical_data)['portfolio_details']
+    details = details[details['current_value'] > 0]
+    if details.empty:
+        return pd.DataFrame(columns=['symbol', 'weight', 'volatility', 'risk_contribution']), np.nan
+
+    symbols = details['symbol'].astype(str).to_numpy()
+    weights = details['current_value'].to_numpy(dtype='float64')
+    weights = weights / weights.sum()
+
+    covariance = get_covariance_matrix(historical_data, symbols, span)
+    # Paires sans historique commun suffisant : considérées non corrélées
+    values = np.nan_to_num(covariance.to_numpy())
+    marginal = values @ weights
+    variance = float(weights @ marginal)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contributions = weights * marginal / variance if variance > 0 else np.full(len(weights), np.nan)
+
+    breakdown = pd.DataFrame({
+        'symbol': symbols,
+        'weight': weights * 100,
+        'volatility': np.sqrt(np.diag(covariance.to_numpy())) * 100,
+        'risk_contribution': contributions * 100,
+    }).sort_values('risk_contribution', ascending=False, ignore_index=True)
+    return breakdown, np.sqrt(variance) * 100
+
+def create_correlation_figure(correlation):
+    """
+    Crée la carte de chaleur des corrélations des positions
+
+    Args:
+        correlation (pd.DataFrame): Matrice de corrélation des positions
+
+    Returns:
+        plotly.graph_objects.Figure: Carte de chaleur
+    """
+    fig = go.Figure(go.Heatmap(
+        z=correlation.to_numpy(),
+        x=list(correlation.columns),
+        y=list(correlation.index),
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu_r',
+        hovertemplate='%{y} / %{x}: %{z:.2f}<extra></extra>',
+    ))
+    fig.update_layout(
+        title="Correlation of Daily Returns",
+        template="plotly_dark",
+        paper_bgcolor="#333333",
+        plot_bgcolor="#333333",
+        margin=dict(l=20, r=20, t=40, b=20),
+        height=500,
+        yaxis=dict(autorange='reversed'),
+    )
+    return fig
+
+def create_portfolio_breakdown_layout(historical_data, transactions_data, span=None):
+    """
+    Crée le layout de la vue de répartition du portefeuille
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        span (int, optional): Durée de vie des covariances (voir modules.covariance)
+
+    Returns:
+        dash.html.Div: Layout de la vue de répartition
+    """
+    breakdown, portfolio_volatility = calculate_risk_breakdown(historical_data, transactions_data, span)
+
+    if breakdown.empty:
+        return html.Div([
+            html.H3("Portfolio Breakdown", className="breakdown-title"),
+            html.Div([
+                html.P("No open positions.", className="no-data-message")
+            ], className="no-data-container")
+        ], className="breakdown-container")
+
+    table_data = breakdown.assign(**{
+        column: breakdown[column].map(lambda value: format_percentage(value) if pd.notna(value) else 'N/A')
+        for column in ['weight', 'volatility', 'risk_contribution']
+    }).to_dict('records')
+
+    return html.Div([
+        html.H3("Portfolio Breakdown", className="breakdown-title"),
+        html.P(f"Annualized volatility: {format_percentage(portfolio_volatility)}", className="breakdown-volatility"),
+        dbc.Row([
+            dbc.Col(
+                dcc.Graph(
+                    id='correlation-heatmap',
+                    figure=create_correlation_figure(
+                        get_correlation_matrix(historical_data, breakdown['symbol'].to_numpy(), span)
+                    ),
+                    config={'displayModeBar': False, 'responsive': True},
+                ),
+                width=12, lg=7
+            ),
+            dbc.Col(
+                dash_table.DataTable(
+                    id='risk-breakdown-table',
+                    columns=[
+                        {'name': 'Symbol', 'id': 'symbol'},
+                        {'name': 'Weight', 'id': 'weight'},
+                        {'name': 'Volatility', 'id': 'volatility'},
+                        {'name': 'Risk Contribution', 'id': 'risk_contribution'},
+                    ],
+                    data=table_data,
+                    style_header={'backgroundColor': '#444444', 'color': 'white', 'fontWeight': 'bold'},
+                    style_cell={'backgroundColor': '#333333', 'color': 'white', 'border': 'none', 'textAlign': 'right'},
+                    style_cell_conditional=[{'if': {'column_id': 'symbol'}, 'textAlign': 'left'}],
+                ),
+                width=12, lg=5
+            ),
+        ]),
+    ], className="breakdown-container")
@@ -7,7 +7,7 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
+from plotly.colors import qualitative
 
 from modules.portfolio import calculate_portfolio_metrics
 from modules.utils import format_currency, format_percentage
@@ -42,7 +42,7 @@ def create_portfolio_value_layout(historical_data, transactions_data, period='1Y
             hole=.4,
             textinfo='label+percent',
             marker=dict(
-                colors=px.colors.qualitative.Bold,
+                colors=qualitative.Bold,
                 line=dict(color='#333333', width=2)
             )
         )])
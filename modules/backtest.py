@@ -0,0 +1,288 @@
+"""
+Moteur de backtest : rejoue un journal de transactions ou une stratégie à règles
+sur l'historique des prix
+
+Le moteur est piloté par les événements (journées où la stratégie peut passer des
+ordres) mais repose sur des tableaux numpy : l'état du portefeuille (positions,
+prix de revient moyens, liquidités) est un vecteur par symbole, et seules les
+journées d'événement sont parcourues. Entre deux événements les positions sont
+constantes : la valeur quotidienne, les dividendes encaissés et les liquidités
+sont ensuite calculés pour tout le calendrier en quelques opérations vectorisées.
+
+Module volontairement léger (numpy seul) : run_backtest est exécuté dans les
+processus du pool des variantes, démarrés sans copier l'application ('spawn').
+"""
+import numpy as np
+
+class MarketData:
+    """
+    Données de marché d'un backtest
+
+    Args:
+        dates (np.ndarray): Calendrier des journées de cotation (datetime64[ns])
+        symbols (np.ndarray): Symboles (colonnes des matrices)
+        prices (np.ndarray): Derniers cours connus (dates × symboles), NaN avant la
+            première cotation
+        dividends (np.ndarray): Dividendes par titre (dates × symboles), à la date
+            de détachement
+    """
+
+    def __init__(self, dates, symbols, prices, dividends):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.prices = np.asarray(prices, dtype='float64')
+        self.dividends = np.asarray(dividends, dtype='float64')
+
+class Strategy:
+    """
+    Stratégie de backtest : ordres passés aux journées d'événement
+
+    Les sous-classes définissent event_days et orders ; prepare permet de calculer
+    en une fois (de façon vectorisée) les signaux de tout le calendrier.
+
+    Attributes:
+        initial_capital (float): Apport initial, versé à la première journée d'événement
+    """
+    initial_capital = 0.0
+
+    def prepare(self, market):
+        """Précalcule les signaux de la stratégie (appelé une fois avant la simulation)"""
+
+    def event_days(self, market):
+        """
+        Retourne les journées où la stratégie peut passer des ordres
+
+        Returns:
+            np.ndarray: Positions dans market.dates
+        """
+        raise NotImplementedError
+
+    def orders(self, day, positions, cash, value, market):
+        """
+        Retourne les ordres d'une journée d'événement
+
+        Args:
+            day (int): Position de la journée dans market.dates
+            positions (np.ndarray): Quantités détenues avant les ordres
+            cash (float): Liquidités avant les ordres
+            value (float): Valeur du portefeuille avant les ordres
+            market (MarketData): Données de marché
+
+        Returns:
+            tuple: (positions des symboles, quantités signées, prix d'exécution ;
+                NaN pour le cours de clôture). Un symbole apparaît au plus une fois
+                par sens (achat ou vente).
+        """
+        raise NotImplementedError
+
+class LedgerStrategy(Strategy):
+    """
+    Rejoue un journal de transactions
+
+    Les transactions d'une même journée, d'un même symbole et d'un même sens sont
+    regroupées en un ordre au prix moyen pondéré.
+
+    Args:
+        codes (np.ndarray): Position du symbole de chaque transaction
+        days (np.ndarray): Journée d'exécution de chaque transaction (position dans
+            le calendrier)
+        quantities (np.ndarray): Quantités signées (ventes négatives)
+        prices (np.ndarray): Prix des transactions
+    """
+
+    def __init__(self, codes, days, quantities, prices):
+        codes, days = np.asarray(codes, dtype='int64'), np.asarray(days, dtype='int64')
+        quantities, prices = np.asarray(quantities, dtype='float64'), np.asarray(prices, dtype='float64')
+
+        # Regroupement par (journée, symbole, sens), trié par journée
+        sides = (quantities < 0).astype('int64')
+        keys, inverse = np.unique(np.stack([days, codes, sides]), axis=1, return_inverse=True)
+        inverse = inverse.ravel()
+        self.days, self.codes = keys[0], keys[1]
+        self.quantities = np.bincount(inverse, weights=quantities, minlength=keys.shape[1])
+        amounts = np.bincount(inverse, weights=quantities * prices, minlength=keys.shape[1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.prices = amounts / self.quantities
+
+    def event_days(self, market):
+        return np.unique(self.days)
+
+    def orders(self, day, positions, cash, value, market):
+        start, end = np.searchsorted(self.days, [day, day + 1])
+        return self.codes[start:end], self.quantities[start:end], self.prices[start:end]
+
+def _moving_average(prices, window):
+    """Moyenne mobile de chaque colonne sur `window` lignes (NaN tant que la fenêtre est incomplète)"""
+    valid = ~np.isnan(prices)
+    sums = np.vstack([np.zeros((1, prices.shape[1])), np.cumsum(np.where(valid, prices, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, prices.shape[1])), np.cumsum(valid, axis=0)])
+    starts = np.maximum(np.arange(1, len(prices) + 1) - window, 0)
+    window_counts = counts[1:] - counts[starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(window_counts >= window, (sums[1:] - sums[starts]) / window_counts, np.nan)
+
+class MovingAverageStrategy(Strategy):
+    """
+    Stratégie de tendance : détient à poids égaux les titres dont la moyenne mobile
+    courte est au-dessus de la moyenne mobile longue
+
+    Le portefeuille est rééquilibré toutes les `rebalance_every` journées, en titres
+    entiers ; les liquidités non investies ne sont pas rémunérées.
+
+    Args:
+        fast (int, optional): Fenêtre de la moyenne courte (jours de cotation)
+        slow (int, optional): Fenêtre de la moyenne longue (jours de cotation)
+        rebalance_every (int, optional): Journées entre deux rééquilibrages
+        max_positions (int, optional): Nombre maximal de titres détenus (les plus
+            forts écarts entre moyennes) ; tous les titres en tendance si None
+        initial_capital (float, optional): Apport initial
+    """
+
+    def __init__(self, fast=20, slow=100, rebalance_every=21, max_positions=None, initial_capital=100_000.0):
+        if not 0 < fast < slow:
+            raise ValueError(f"Fenêtres de moyennes mobiles invalides: {fast}, {slow}")
+        self.fast = fast
+        self.slow = slow
+        self.rebalance_every = rebalance_every
+        self.max_positions = max_positions
+        self.initial_capital = initial_capital
+        self.weights = None
+
+    def prepare(self, market):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = _moving_average(market.prices, self.fast) / _moving_average(market.prices, self.slow)
+        selected = strength > 1
+        if self.max_positions is not None:
+            # Rang de chaque titre dans sa journée, du plus fort écart au plus faible
+            ranks = np.argsort(np.argsort(-np.where(selected, strength, -np.inf), axis=1), axis=1)
+            selected &= ranks < self.max_positions
+        counts = selected.sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.weights = np.where(selected, 1.0 / counts, 0.0)
+
+    def event_days(self, market):
+        return np.arange(self.slow - 1, len(market.dates), self.rebalance_every)
+
+    def orders(self, day, positions, cash, value, market):
+        prices = market.prices[day]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            targets = np.where(self.weights[day] > 0, np.floor(self.weights[day] * value / prices), 0.0)
+        quantities = targets - positions
+        codes = np.flatnonzero(quantities)
+        return codes, quantities[codes], np.full(len(codes), np.nan)
+
+def run_backtest(market, strategy, commission_rate=0.0):
+    """
+    Simule une stratégie sur les données de marché
+
+    Les ordres d'une journée sont exécutés en clôture, ventes avant achats. Les
+    frais valent commission_rate × montant échangé. Un achat que les liquidités ne
+    couvrent pas est financé par un apport, enregistré comme flux externe (comme
+    pour le journal des transactions de l'application). Les dividendes sont versés
+    en liquidités, sur les positions détenues la veille du détachement.
+
+    Args:
+        market (MarketData): Données de marché
+        strategy (Strategy): Stratégie
+        commission_rate (float, optional): Frais en proportion du montant échangé
+
+    Returns:
+        dict: Séries quotidiennes (value, cash, flows, dividends, turnover, fees)
+            et transactions exécutées (trades : day, code, quantity, price, fee,
+            realized), sous forme de tableaux numpy
+    """
+    n_dates, n_symbols = market.prices.shape
+    strategy.prepare(market)
+    days = np.unique(np.asarray(strategy.event_days(market), dtype='int64'))
+    days = days[(days >= 0) & (days < n_dates)]
+
+    # Dividendes cumulés par titre : encaissés entre deux événements en une opération
+    dividend_totals = np.vstack([np.zeros((1, n_symbols)), np.cumsum(market.dividends, axis=0)])
+    valuation = np.nan_to_num(market.prices)
+
+    positions = np.zeros(n_symbols)
+    average_costs = np.zeros(n_symbols)
+    snapshots = np.zeros((len(days) + 1, n_symbols))
+    trade_cash = np.zeros(n_dates)
+    flows = np.zeros(n_dates)
+    cash, last_day = 0.0, -1
+    trades = []
+
+    for event, day in enumerate(days):
+        cash += positions @ (dividend_totals[day + 1] - dividend_totals[last_day + 1])
+        if event == 0 and strategy.initial_capital > 0:
+            flows[day] += strategy.initial_capital
+            cash += strategy.initial_capital
+        value = cash + positions @ valuation[day]
+
+        codes, quantities, prices = strategy.orders(day, positions, cash, value, market)
+        codes = np.asarray(codes, dtype='int64')
+        quantities = np.asarray(quantities, dtype='float64')
+        prices = np.asarray(prices, dtype='float64')
+        prices = np.where(np.isnan(prices), market.prices[day, codes], prices)
+        executable = (quantities != 0) & (prices > 0)
+
+        day_cash = 0.0
+        for side in (executable & (quantities < 0), executable & (quantities > 0)):
+            side_codes, side_quantities, side_prices = codes[side], quantities[side], prices[side]
+            amounts = side_quantities * side_prices
+            fees = commission_rate * np.abs(amounts)
+            held = np.maximum(positions[side_codes], 0.0)
+            realized = np.where(side_quantities < 0, -side_quantities * (side_prices - average_costs[side_codes]), 0.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                average_costs[side_codes] = np.where(
+                    side_quantities > 0,
+                    (held * average_costs[side_codes] + amounts) / (held + side_quantities),
+                    average_costs[side_codes],
+                )
+            positions[side_codes] += side_quantities
+            day_cash -= amounts.sum() + fees.sum()
+            trades.append((np.full(len(side_codes), day), side_codes, side_quantities, side_prices, fees, realized))
+
+        cash += day_cash
+        trade_cash[day] = day_cash
+        if cash < 0:
+            flows[day] -= cash
+            cash = 0.0
+        snapshots[event + 1] = positions
+        last_day = day
+
+    # Positions de chaque journée : dernier instantané, zéro avant le premier événement
+    holdings = snapshots[np.searchsorted(days, np.arange(n_dates), side='right')]
+    previous_holdings = np.vstack([np.zeros((1, n_symbols)), holdings[:-1]])
+    dividends = (previous_holdings * market.dividends).sum(axis=1)
+    cash_balance = np.cumsum(flows + trade_cash + dividends)
+
+    if trades:
+        day_index, codes, quantities, prices, fees, realized = (np.concatenate(values) for values in zip(*trades))
+    else:
+        day_index, codes, quantities, prices, fees, realized = (np.zeros(0) for _ in range(6))
+    day_index = day_index.astype('int64')
+    return {
+        'value': cash_balance + (holdings * valuation).sum(axis=1),
+        'cash': cash_balance,
+        'flows': flows,
+        'dividends': dividends,
+        'turnover': np.bincount(day_index, weights=np.abs(quantities * prices), minlength=n_dates),
+        'fees': np.bincount(day_index, weights=fees, minlength=n_dates),
+        'trades': {
+            'day': day_index,
+            'code': codes.astype('int64'),
+            'quantity': quantities,
+            'price': prices,
+            'fee': fees,
+            'realized': realized,
+        },
+    }
+
+# Données de marché des processus du pool (transmises une fois par processus)
+_WORKER_MARKET = None
+
+def init_worker(market):
+    """Initialise un processus du pool avec les données de marché"""
+    global _WORKER_MARKET
+    _WORKER_MARKET = market
+
+def run_worker_backtest(strategy, commission_rate=0.0):
+    """Simule une stratégie sur les données de marché du processus (voir init_worker)"""
+    return run_backtest(_WORKER_MARKET, strategy, commission_rate)
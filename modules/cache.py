@@ -0,0 +1,300 @@
+"""
+Mémoïsation des calculs de portefeuille et de performance
+
+Les fonctions de calcul sont des fonctions pures des transactions, de
+l'historique des prix et de leurs paramètres (date, période...). Leurs résultats
+sont conservés dans un cache LRU borné en taille, indexé par l'empreinte du
+contenu des DataFrames et par la valeur normalisée des autres arguments.
+"""
+import sys
+import copy
+import hashlib
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+from modules.dataset_cache import frame_fingerprint
+from modules.data_loader import register_ingest_listener
+
+def estimate_size(value):
+    """
+    Estime la taille mémoire d'un résultat (en octets)
+
+    Args:
+        value (object): Résultat à mesurer
+
+    Returns:
+        int: Taille estimée
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def copy_result(value):
+    """
+    Copie les parties modifiables d'un résultat (DataFrames, dictionnaires...)
+
+    Les appelants peuvent ainsi modifier le résultat retourné sans altérer le cache.
+
+    Args:
+        value (object): Résultat à copier
+
+    Returns:
+        object: Copie du résultat
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: copy_result(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_result(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(copy_result(v) for v in value)
+    return copy.copy(value)
+
+class MetricsCache:
+    """
+    Cache LRU borné par la taille totale estimée des résultats
+
+    Attributes:
+        max_bytes (int): Taille totale maximale des résultats conservés
+        hits (int): Nombre de résultats trouvés dans le cache
+        misses (int): Nombre de résultats calculés
+        evictions (int): Nombre de résultats évincés pour libérer de la place
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """
+        Recherche un résultat dans le cache
+
+        Args:
+            key (tuple): Clé du résultat
+
+        Returns:
+            tuple: (trouvé, résultat)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, as_of=None):
+        """
+        Ajoute un résultat au cache en évinçant les moins récemment utilisés
+
+        Args:
+            key (tuple): Clé du résultat
+            value (object): Résultat à conserver
+            as_of (pd.Timestamp, optional): Date au-delà de laquelle le résultat ne
+                dépend pas des prix (None si le résultat dépend des derniers prix)
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, as_of)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def rebase(self, old_fingerprint, new_fingerprint, since):
+        """
+        Reporte les résultats d'un jeu de données sur sa version complétée
+
+        Après l'ajout de barres à partir de la date `since`, les résultats calculés à
+        une date antérieure restent valides et sont associés à la nouvelle version ;
+        les autres résultats de l'ancienne version sont invalidés.
+
+        Args:
+            old_fingerprint (str): Empreinte de l'ancien jeu de données
+            new_fingerprint (str): Empreinte du nouveau jeu de données
+            since (pd.Timestamp): Première date des barres ajoutées
+
+        Returns:
+            tuple: (résultats conservés, résultats invalidés)
+        """
+        old_arg = ('frame', old_fingerprint)
+        new_arg = ('frame', new_fingerprint)
+        kept = dropped = 0
+
+        with self._lock:
+            for key in list(self._entries):
+                if not any(arg == old_arg for _, arg in key[2:]):
+                    continue
+                value, size, as_of = self._entries.pop(key)
+                if as_of is not None and as_of < since:
+                    new_key = key[:2] + tuple(
+                        (name, new_arg if arg == old_arg else arg) for name, arg in key[2:]
+                    )
+                    self._entries[new_key] = (value, size, as_of)
+                    kept += 1
+                else:
+                    self._bytes -= size
+                    dropped += 1
+
+        return kept, dropped
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Retourne les statistiques du cache
+
+        Returns:
+            dict: entries, bytes, max_bytes, hits, misses, evictions, hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+# Cache partagé par toutes les fonctions mémoïsées
+metrics_cache = MetricsCache(config.METRICS_CACHE_MAX_BYTES)
+
+def array_fingerprint(values):
+    """
+    Calcule l'empreinte du contenu d'un tableau ou d'un index
+
+    Args:
+        values (np.ndarray or pd.Index): Valeurs (dates, symboles...)
+
+    Returns:
+        str: Empreinte stable d'un processus à l'autre (type, forme et contenu)
+    """
+    values = np.asarray(values)
+    if values.dtype == object:
+        # Objets Python (chaînes) : empreinte de chaque valeur, indépendante des adresses
+        values = pd.util.hash_array(values.ravel())
+    digest = hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+    return f"{values.dtype.str}:{values.shape}:{digest}"
+
+def argument_key(value):
+    """
+    Normalise un argument en une valeur hachable et stable pour la clé du cache
+
+    Les DataFrames sont représentés par l'empreinte de leur contenu, les index et
+    tableaux numpy (dates d'évaluation...) par celle de leurs valeurs ; les dates
+    (chaîne, datetime, Timestamp) par leur Timestamp équivalent.
+
+    Args:
+        value (object): Argument d'une fonction mémoïsée
+
+    Returns:
+        object: Valeur hachable
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('frame', frame_fingerprint(value))
+    if isinstance(value, (pd.Index, np.ndarray)):
+        return ('array', array_fingerprint(value))
+    if isinstance(value, (datetime, date, np.datetime64)):
+        return ('date', pd.Timestamp(value).isoformat())
+    if isinstance(value, (list, tuple)):
+        return tuple(argument_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, argument_key(v)) for k, v in value.items()))
+    return value
+
+def memoize(func=None, as_of=None):
+    """
+    Décorateur mémoïsant une fonction de calcul dans metrics_cache
+
+    Les résultats retournés sont des copies : les modifier n'altère pas le cache.
+
+    Args:
+        func (callable): Fonction pure de ses arguments
+        as_of (str, optional): Nom de l'argument date au-delà de laquelle le résultat
+            ne dépend pas des prix. Les résultats calculés à une date explicite
+            survivent alors à l'ajout de barres plus récentes.
+
+    Returns:
+        callable: Fonction mémoïsée
+    """
+    if func is None:
+        return lambda f: memoize(f, as_of=as_of)
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            key = (func.__module__, func.__qualname__) + tuple(
+                (name, argument_key(value)) for name, value in bound.arguments.items()
+            )
+            hash(key)
+        except TypeError:
+            # Argument non hachable : calcul direct, sans cache
+            return func(*args, **kwargs)
+
+        found, result = metrics_cache.get(key)
+        if not found:
+            result = func(*args, **kwargs)
+            as_of_date = bound.arguments.get(as_of) if as_of else None
+            metrics_cache.put(key, result, None if as_of_date is None else pd.Timestamp(as_of_date))
+        return copy_result(result)
+
+    return wrapper
+
+def cache_stats():
+    """
+    Retourne les statistiques du cache des métriques
+
+    Returns:
+        dict: Statistiques (voir MetricsCache.stats)
+    """
+    return metrics_cache.stats()
+
+def _on_prices_ingested(old_data, new_data, new_bars):
+    """Reporte sur le nouveau jeu de données les résultats antérieurs aux barres ajoutées"""
+    kept, dropped = metrics_cache.rebase(
+        frame_fingerprint(old_data), frame_fingerprint(new_data), new_bars['date'].min()
+    )
+    print(f"Cache des métriques: {kept} résultats conservés, {dropped} invalidés")
+
+register_ingest_listener(_on_prices_ingested)
@@ -0,0 +1,265 @@
+"""
+Opérations sur titres (divisions de titres et dividendes)
+
+La table config.CORPORATE_ACTIONS_PATH (Date;Symbol;Type;Value) liste les
+opérations à leur date de détachement :
+- SPLIT : nombre de titres nouveaux par titre ancien (2 pour une division par deux,
+  0.5 pour un regroupement) ;
+- DIVIDEND : dividende par titre, dans la base de titres de la date de détachement.
+
+Les prix antérieurs à une opération sont ajustés en arrière par un facteur cumulé
+par symbole (produit des facteurs des opérations postérieures), calculé en une
+passe vectorisée. Les transactions sont ramenées à la base de titres actuelle
+avec les mêmes facteurs de division : quantités et prix restent cohérents avec
+les cours ajustés.
+"""
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import config
+from modules.schemas import normalize_symbols
+from modules.results_cache import register_context_dependency
+
+# Types d'opérations reconnus
+ACTION_TYPES = ('SPLIT', 'DIVIDEND')
+
+# Colonnes de la table canonique des opérations
+ACTION_COLUMNS = ['date', 'symbol', 'type', 'value']
+
+# Décalage rendant positifs les numéros de jour antérieurs à 1970 dans les clés
+_DAY_OFFSET = 1 << 31
+
+# Table chargée, par (chemin, mtime, taille) du fichier
+_ACTIONS = {}
+
+def load_corporate_actions(path):
+    """
+    Charge la table des opérations sur titres
+
+    Les lignes sans date, de type inconnu ou de valeur non positive sont écartées.
+
+    Args:
+        path (str): Chemin du fichier CSV (séparateur point-virgule)
+
+    Returns:
+        pd.DataFrame: Colonnes date, symbol, type, value (vide si le fichier est absent)
+    """
+    empty = pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'symbol': pd.Series(dtype=object),
+        'type': pd.Series(dtype=object),
+        'value': pd.Series(dtype='float64'),
+    })
+    if not os.path.exists(path):
+        return empty
+
+    actions = pd.read_csv(path, sep=';', encoding='utf-8-sig', dtype={'Symbol': str, 'Type': str})
+    if actions.empty:
+        return empty
+
+    actions = pd.DataFrame({
+        'date': pd.to_datetime(actions['Date'], format='%d/%m/%Y', errors='coerce'),
+        'symbol': normalize_symbols(actions['Symbol'].astype(str)).astype(str),
+        'type': actions['Type'].astype(str).str.strip().str.upper(),
+        'value': pd.to_numeric(actions['Value'], errors='coerce'),
+    })
+    valid = actions['date'].notna() & actions['type'].isin(ACTION_TYPES) & (actions['value'] > 0)
+    if not valid.all():
+        print(f"Opérations sur titres ignorées: {int((~valid).sum())} lignes invalides")
+    return actions[valid].reset_index(drop=True)
+
+def get_corporate_actions():
+    """
+    Retourne la table des opérations sur titres, relue seulement si le fichier change
+
+    Returns:
+        pd.DataFrame: Opérations sur titres (voir load_corporate_actions)
+    """
+    path = config.CORPORATE_ACTIONS_PATH
+    try:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = (path, None, None)
+
+    actions = _ACTIONS.get(key)
+    if actions is None:
+        actions = load_corporate_actions(path)
+        _ACTIONS.clear()
+        _ACTIONS[key] = actions
+    return actions
+
+def corporate_actions_fingerprint():
+    """
+    Empreinte du contenu de la table des opérations sur titres
+
+    Returns:
+        str: Empreinte hexadécimale ('none' si la table est vide)
+    """
+    actions = get_corporate_actions()
+    if actions.empty:
+        return 'none'
+    return hashlib.sha1(pd.util.hash_pandas_object(actions, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+# Les résultats conservés sur disque dépendent des ajustements appliqués
+register_context_dependency('corporate_actions', corporate_actions_fingerprint)
+
+def _day_keys(codes, dates):
+    """Clés composites (code << 32 | numéro de jour) ordonnées par symbole puis date"""
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]').astype('int64')
+    return (np.asarray(codes, dtype='int64') << 32) | (days + _DAY_OFFSET)
+
+def cumulative_factors(action_codes, action_dates, action_factors, codes, dates):
+    """
+    Calcule le facteur d'ajustement cumulé de chaque (symbole, date)
+
+    Le facteur d'une date est le produit des facteurs des opérations du même symbole
+    dont la date de détachement est strictement postérieure. Les produits cumulés
+    sont calculés une fois par symbole (de la dernière opération à la première),
+    puis chaque date est rattachée à la première opération suivante par recherche
+    dichotomique.
+
+    Args:
+        action_codes (np.ndarray): Code du symbole de chaque opération
+        action_dates (np.ndarray): Date de détachement de chaque opération
+        action_factors (np.ndarray): Facteur de chaque opération
+        codes (np.ndarray): Codes des symboles à ajuster
+        dates (np.ndarray): Dates à ajuster
+
+    Returns:
+        np.ndarray: Facteurs cumulés (1.0 sans opération postérieure)
+    """
+    if len(action_codes) == 0:
+        return np.ones(len(codes))
+
+    action_keys = _day_keys(action_codes, action_dates)
+    order = np.argsort(action_keys, kind='stable')
+    action_keys = action_keys[order]
+    action_codes = np.asarray(action_codes, dtype='int64')[order]
+    action_factors = np.asarray(action_factors, dtype='float64')[order]
+
+    # Produit des facteurs de chaque opération et des suivantes du même symbole
+    suffix = pd.Series(action_factors[::-1]).groupby(action_codes[::-1]).cumprod().to_numpy()[::-1]
+
+    following = np.searchsorted(action_keys, _day_keys(codes, dates), side='right')
+    clipped = np.minimum(following, len(action_keys) - 1)
+    found = (following < len(action_keys)) & (action_codes[clipped] == np.asarray(codes, dtype='int64'))
+    return np.where(found, suffix[clipped], 1.0)
+
+def _action_codes(actions, symbols):
+    """Codes des symboles des opérations dans une liste de symboles (-1 si absent)"""
+    return pd.Index(symbols, dtype=object).get_indexer(actions['symbol'].to_numpy(dtype=object))
+
+def adjust_price_history(price_history, actions, include_dividends=False):
+    """
+    Ajuste en arrière les prix d'un index PriceHistory
+
+    Une division de titres de rapport r multiplie les prix antérieurs par 1/r ; un
+    dividende D multiplie les prix antérieurs par (P - D) / P, P étant le dernier
+    cours avant la date de détachement.
+
+    Args:
+        price_history (PriceHistory): Index des prix bruts
+        actions (pd.DataFrame): Opérations sur titres (voir load_corporate_actions)
+        include_dividends (bool, optional): Ajuster aussi des dividendes (rendement
+            total). Par défaut False.
+
+    Returns:
+        PriceHistory: Index des prix ajustés (l'index d'origine sans opération)
+    """
+    if not include_dividends:
+        actions = actions[actions['type'] == 'SPLIT']
+    codes = _action_codes(actions, price_history.symbols)
+    known = codes >= 0
+    if not known.any():
+        return price_history
+
+    actions, codes = actions[known], codes[known]
+    dates = actions['date'].to_numpy(dtype='datetime64[ns]')
+    values = actions['value'].to_numpy(dtype='float64')
+    factors = 1.0 / values
+
+    dividends = (actions['type'] == 'DIVIDEND').to_numpy()
+    if dividends.any():
+        previous = price_history.last_before(codes[dividends], dates[dividends])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dividend_factors = (previous - values[dividends]) / previous
+        # Dividende sans cours antérieur ou supérieur au cours : ignoré
+        factors[dividends] = np.where(dividend_factors > 0, dividend_factors, 1.0)
+
+    bar_codes, bar_dates, _ = price_history.window()
+    return price_history.adjusted(cumulative_factors(codes, dates, factors, bar_codes, bar_dates))
+
+def adjust_transactions(transactions_data, actions):
+    """
+    Ramène les transactions à la base de titres actuelle (divisions de titres)
+
+    Pour une transaction antérieure à des divisions de facteur cumulé f (produit des
+    1/r), la quantité est divisée par f et le prix multiplié par f : le montant est
+    inchangé et le prix est comparable aux cours ajustés. Les valeurs d'origine sont
+    conservées dans les colonnes raw_quantity et raw_price.
+
+    Args:
+        transactions_data (pd.DataFrame): Transactions canoniques
+        actions (pd.DataFrame): Opérations sur titres (voir load_corporate_actions)
+
+    Returns:
+        pd.DataFrame: Transactions ajustées (l'original sans division applicable)
+    """
+    splits = actions[actions['type'] == 'SPLIT']
+    if splits.empty or transactions_data.empty:
+        return transactions_data
+
+    symbols = pd.Index(pd.unique(splits['symbol']), dtype=object)
+    codes = symbols.get_indexer(transactions_data['symbol'].to_numpy(dtype=object))
+    factors = cumulative_factors(
+        symbols.get_indexer(splits['symbol'].to_numpy(dtype=object)),
+        splits['date'].to_numpy(dtype='datetime64[ns]'),
+        1.0 / splits['value'].to_numpy(dtype='float64'),
+        codes,
+        transactions_data['purchase_date'].to_numpy(dtype='datetime64[ns]'),
+    )
+    factors[codes < 0] = 1.0
+    if np.all(factors == 1.0):
+        return transactions_data
+
+    adjusted = transactions_data.copy()
+    adjusted['raw_quantity'] = transactions_data['quantity']
+    adjusted['raw_price'] = transactions_data['purchase_price']
+    adjusted['quantity'] = transactions_data['quantity'].to_numpy() / factors
+    adjusted['purchase_price'] = transactions_data['purchase_price'].to_numpy() * factors
+    adjusted.attrs = dict(transactions_data.attrs)
+    return adjusted
+
+def dividend_events(actions, symbols):
+    """
+    Retourne les dividendes des symboles donnés, exprimés dans la base de titres actuelle
+
+    Le montant d'un dividende est multiplié par le facteur des divisions de titres
+    postérieures à sa date de détachement : il est ainsi comparable aux prix ajustés
+    des divisions et aux quantités des transactions ajustées.
+
+    Args:
+        actions (pd.DataFrame): Opérations sur titres (voir load_corporate_actions)
+        symbols (array-like): Symboles retenus
+
+    Returns:
+        tuple: (codes dans symbols, dates de détachement, montants par titre)
+    """
+    all_codes = _action_codes(actions, symbols)
+    all_dates = actions['date'].to_numpy(dtype='datetime64[ns]')
+    values = actions['value'].to_numpy(dtype='float64')
+    types = actions['type'].to_numpy(dtype=object)
+
+    dividends = (types == 'DIVIDEND') & (all_codes >= 0)
+    codes, dates, amounts = all_codes[dividends], all_dates[dividends], values[dividends]
+
+    splits = (types == 'SPLIT') & (all_codes >= 0)
+    if splits.any() and len(codes):
+        amounts = amounts * cumulative_factors(
+            all_codes[splits], all_dates[splits], 1.0 / values[splits], codes, dates
+        )
+    return codes, dates, amounts
@@ -0,0 +1,284 @@
+"""
+Matrices de covariance et de corrélation des rendements journaliers
+
+Les matrices couvrent tous les symboles de l'historique des prix (ajustés en
+rendement total). Elles sont estimées par moyenne mobile exponentielle à moyenne
+nulle (méthode RiskMetrics) : pour une durée de vie `span`, le poids d'un jour
+décroît d'un facteur λ = 1 - 2 / (span + 1) par jour plus récent.
+
+L'estimateur ne conserve que deux sommes pondérées N × N : les produits croisés des
+rendements et le poids des jours où chaque paire de symboles est cotée. Le calcul
+initial est un produit matriciel ; chaque nouvelle barre ne coûte ensuite qu'une
+mise à jour O(N²) (ingest_prices), au lieu d'un recalcul sur tout l'historique.
+Les estimateurs sont conservés par jeu de prix et par durée de vie.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+from modules.data_loader import get_price_history, register_ingest_listener
+from modules.utils import FrameCache
+
+def _daily_returns(prices, last_prices):
+    """
+    Rendements journaliers d'une matrice de cours, depuis la cotation précédente
+
+    Args:
+        prices (np.ndarray): Cours (dates × symboles), NaN les jours sans cotation
+        last_prices (np.ndarray): Dernier cours connu de chaque symbole avant la
+            première date (NaN si inconnu)
+
+    Returns:
+        tuple: (rendements, dernier cours connu de chaque symbole après la dernière date)
+    """
+    filled = pd.DataFrame(np.vstack([last_prices, prices])).ffill().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices / filled[:-1] - 1
+    return returns, filled[-1]
+
+class EwmCovariance:
+    """
+    Estimateur exponentiel de la covariance des rendements journaliers
+
+    Args:
+        symbols (array-like): Symboles (ordre des lignes et colonnes)
+        span (int): Durée de vie de la moyenne exponentielle (jours de cotation)
+    """
+
+    def __init__(self, symbols, span):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        n_symbols = len(self.symbols)
+        self.cross = np.zeros((n_symbols, n_symbols))
+        self.weights = np.zeros((n_symbols, n_symbols))
+        self.last_prices = np.full(n_symbols, np.nan)
+        self.last_date = None
+
+    @classmethod
+    def from_prices(cls, symbols, dates, prices, span):
+        """
+        Construit l'estimateur sur un historique complet, en un produit matriciel
+
+        Args:
+            symbols (array-like): Symboles (colonnes de prices)
+            dates (np.ndarray): Dates (lignes de prices), croissantes
+            prices (np.ndarray): Cours (dates × symboles), NaN les jours sans cotation
+            span (int): Durée de vie de la moyenne exponentielle
+
+        Returns:
+            EwmCovariance: Estimateur
+        """
+        estimator = cls(symbols, span)
+        if len(dates) == 0:
+            return estimator
+
+        returns, estimator.last_prices = _daily_returns(prices, estimator.last_prices)
+        valid = ~np.isnan(returns)
+        observed = valid.astype('float64')
+        filled = np.where(valid, returns, 0.0)
+
+        # Poids λ^(T-1-t) : le jour le plus récent pèse 1
+        day_weights = estimator.decay ** np.arange(len(dates) - 1, -1, -1, dtype='float64')
+        estimator.cross = (filled * day_weights[:, np.newaxis]).T @ filled
+        estimator.weights = (observed * day_weights[:, np.newaxis]).T @ observed
+        estimator.last_date = pd.Timestamp(dates[-1])
+        return estimator
+
+    def copy(self):
+        """Retourne une copie indépendante de l'estimateur"""
+        result = EwmCovariance.__new__(EwmCovariance)
+        result.__dict__.update(self.__dict__)
+        result.cross = self.cross.copy()
+        result.weights = self.weights.copy()
+        result.last_prices = self.last_prices.copy()
+        return result
+
+    def append(self, symbols, dates, prices):
+        """
+        Ajoute des journées de cotation, en O(N²) par journée
+
+        Args:
+            symbols (array-like): Symboles des colonnes de prices ; ils prolongent
+                self.symbols (nouveaux symboles ajoutés à la fin)
+            dates (np.ndarray): Nouvelles dates, croissantes et postérieures à last_date
+            prices (np.ndarray): Cours (dates × symboles), NaN les jours sans cotation
+        """
+        symbols = np.asarray(symbols, dtype=object)
+        added = len(symbols) - len(self.symbols)
+        if added > 0:
+            self.cross = np.pad(self.cross, (0, added))
+            self.weights = np.pad(self.weights, (0, added))
+            self.last_prices = np.concatenate([self.last_prices, np.full(added, np.nan)])
+            self.symbols = symbols
+        if len(dates) == 0:
+            return
+
+        returns, self.last_prices = _daily_returns(prices, self.last_prices)
+        for day_returns in returns:
+            valid = ~np.isnan(day_returns)
+            filled = np.where(valid, day_returns, 0.0)
+            self.cross *= self.decay
+            self.cross += np.outer(filled, filled)
+            self.weights *= self.decay
+            self.weights += np.outer(valid, valid)
+        self.last_date = pd.Timestamp(dates[-1])
+
+    def _positions(self, symbols):
+        """Positions de symboles dans self.symbols (-1 si absent)"""
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return pd.Index(self.symbols).get_indexer(pd.Index(symbols, dtype=object))
+
+    def covariance(self, symbols=None):
+        """
+        Retourne la matrice de covariance annualisée
+
+        Une paire cotée ensemble sur moins de la moitié du poids des jours récents
+        (poids cumulé inférieur à la moitié de 1 / (1 - λ)) vaut NaN.
+
+        Args:
+            symbols (array-like, optional): Symboles retenus (tous si None)
+
+        Returns:
+            pd.DataFrame: Covariances (symboles × symboles)
+        """
+        min_weight = 0.5 / (1 - self.decay)
+        positions = self._positions(symbols)
+        found = positions >= 0
+        labels = self.symbols[positions[found]] if symbols is None else pd.Index(symbols, dtype=object)
+
+        values = np.full((len(positions), len(positions)), np.nan)
+        selected = np.ix_(positions[found], positions[found])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = self.cross[selected] / self.weights[selected] * config.TRADING_DAYS_PER_YEAR
+        values[np.ix_(found, found)] = np.where(self.weights[selected] >= min_weight, covariance, np.nan)
+        return pd.DataFrame(values, index=labels, columns=labels)
+
+    def correlation(self, symbols=None):
+        """
+        Retourne la matrice de corrélation
+
+        Args:
+            symbols (array-like, optional): Symboles retenus (tous si None)
+
+        Returns:
+            pd.DataFrame: Corrélations (symboles × symboles), dans [-1, 1]
+        """
+        covariance = self.covariance(symbols)
+        values = covariance.to_numpy()
+        deviations = np.sqrt(np.diag(values))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.clip(values / np.outer(deviations, deviations), -1, 1)
+        return pd.DataFrame(correlation, index=covariance.index, columns=covariance.columns)
+
+# Estimateurs par jeu de prix (libérés avec le DataFrame) : {span: EwmCovariance}
+_COVARIANCES = FrameCache()
+_COVARIANCES_LOCK = threading.Lock()
+
+def get_ewm_covariance(historical_data, span=None):
+    """
+    Retourne l'estimateur de covariance d'un jeu de prix, construit une seule fois par durée de vie
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        span (int, optional): Durée de vie en jours de cotation. Par défaut
+            config.COVARIANCE_SPAN.
+
+    Returns:
+        EwmCovariance: Estimateur (à ne pas modifier)
+    """
+    span = span or config.COVARIANCE_SPAN
+    with _COVARIANCES_LOCK:
+        estimators = _COVARIANCES.get(historical_data)
+        if estimators is None:
+            estimators = {}
+            _COVARIANCES.set(historical_data, estimators)
+        estimator = estimators.get(span)
+    if estimator is not None:
+        return estimator
+
+    price_history = get_price_history(historical_data, 'total')
+    dates, prices = price_history.close_matrix()
+    estimator = EwmCovariance.from_prices(price_history.symbols, dates, prices, span)
+    with _COVARIANCES_LOCK:
+        estimators[span] = estimator
+    return estimator
+
+def get_covariance_matrix(historical_data, symbols=None, span=None):
+    """
+    Retourne la matrice de covariance annualisée des rendements journaliers
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        symbols (array-like, optional): Symboles retenus (tous si None)
+        span (int, optional): Durée de vie en jours de cotation
+
+    Returns:
+        pd.DataFrame: Covariances (symboles × symboles)
+    """
+    return get_ewm_covariance(historical_data, span).covariance(symbols)
+
+def get_correlation_matrix(historical_data, symbols=None, span=None):
+    """
+    Retourne la matrice de corrélation des rendements journaliers
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        symbols (array-like, optional): Symboles retenus (tous si None)
+        span (int, optional): Durée de vie en jours de cotation
+
+    Returns:
+        pd.DataFrame: Corrélations (symboles × symboles)
+    """
+    return get_ewm_covariance(historical_data, span).correlation(symbols)
+
+def _needs_rebuild(estimator, first_date):
+    """
+    Indique si un estimateur doit être reconstruit plutôt que prolongé
+
+    Seules des barres postérieures à la dernière date intégrée peuvent être ajoutées ;
+    des barres corrigées ou antérieures modifient des rendements déjà cumulés.
+
+    Args:
+        estimator (EwmCovariance): Estimateur du jeu de prix précédent
+        first_date (pd.Timestamp): Première date des nouvelles barres
+
+    Returns:
+        bool: True si l'estimateur doit être reconstruit sur tout l'historique
+    """
+    return estimator.last_date is None or first_date <= estimator.last_date
+
+def _on_prices_ingested(old_data, new_data, new_bars):
+    """
+    Prolonge les estimateurs du jeu de prix précédent avec les nouvelles barres
+
+    Un estimateur à reconstruire (voir _needs_rebuild) n'est pas repris pour le
+    nouveau jeu de prix : get_ewm_covariance le recalcule à la première demande.
+    """
+    estimators = _COVARIANCES.get(old_data)
+    if not estimators:
+        return
+
+    first_date = new_bars['date'].min()
+    price_history = get_price_history(new_data, 'total')
+    updated = {}
+    for span, estimator in list(estimators.items()):
+        if _needs_rebuild(estimator, first_date):
+            continue
+        next_day = estimator.last_date + pd.Timedelta(days=1)
+        estimator = estimator.copy()
+        # Une opération sur titres postérieure à last_date multiplie tous les cours
+        # antérieurs d'un même facteur : les rendements cumulés sont inchangés, seul le
+        # dernier cours connu est ramené à la base d'ajustement du nouveau jeu de prix
+        codes = np.arange(len(estimator.symbols))
+        estimator.last_prices = price_history.last_before(codes, np.full(len(codes), np.datetime64(next_day, 'ns')))
+        dates, prices = price_history.close_matrix(next_day)
+        estimator.append(price_history.symbols, dates, prices)
+        updated[span] = estimator
+    with _COVARIANCES_LOCK:
+        _COVARIANCES.set(new_data, updated)
+
+register_ingest_listener(_on_prices_ingested)
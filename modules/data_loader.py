@@ -1,98 +1,226 @@
 """Chargement et préparation des données"""
 import pandas as pd
+import numpy as np
 import os
-import yfinance as yf
 from datetime import datetime, timedelta
 
-def standardize_historical_data(historical_data):
+import hashlib
+
+import config
+from modules.price_store import (
+    PriceStoreWriter,
+    compact_price_store,
+    load_or_build_price_store,
+    load_price_store,
+    append_to_price_store,
+    get_store_dir,
+    read_manifest,
+    widen_prices,
+)
+from modules.dataset_cache import frame_fingerprint, set_frame_fingerprint, update_current_dataset
+from modules.schemas import clean_header, detect_schema, normalize_symbols, read_header
+from modules.corporate_actions import adjust_price_history, adjust_transactions, get_corporate_actions
+from modules.utils import FrameCache
+
+# Marqueur (DataFrame.attrs) des jeux de données déjà canoniques
+CANONICAL_ATTR = 'canonical'
+
+# Colonnes des jeux de données canoniques
+HISTORICAL_COLUMNS = ['date', 'symbol', 'close']
+TRANSACTIONS_COLUMNS = ['purchase_date', 'symbol', 'Type', 'quantity', 'purchase_price']
+
+# Types des colonnes du stockage colonnaire compilé par blocs
+# (dates en numéros de jour int32, prix en float32 tant que la précision le permet)
+HISTORICAL_STORE_DTYPES = {
+    'date': 'datetime64[D]',
+    'symbol': 'category',
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'adjusted_close': 'float32',
+    'volume': 'int32',
+}
+
+def is_canonical(data, kind, required_columns):
     """
-    Standardise les noms de colonnes pour les données historiques
+    Vérifie qu'un DataFrame porte le marqueur canonique et les colonnes attendues
+    
+    Args:
+        data (pd.DataFrame): Données à vérifier
+        kind (str): Type de jeu de données ('historical' ou 'transactions')
+        required_columns (list): Colonnes obligatoires
+    
+    Returns:
+        bool: True si le DataFrame peut être utilisé sans standardisation
+    """
+    return (
+        isinstance(data, pd.DataFrame)
+        and data.attrs.get(CANONICAL_ATTR) == kind
+        and all(col in data.columns for col in required_columns)
+    )
+
+def canonical_row_mask(historical_data):
+    """
+    Identifie les lignes conservées dans le jeu de données historiques canonique
+    
+    Sont écartées les lignes invalides (date manquante, prix nul ou manquant) puis
+    les doublons (symbol, date), la dernière ligne valide l'emportant.
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques typées (date, symbol, close)
+    
+    Returns:
+        np.ndarray: Masque booléen des lignes conservées
+    """
+    keep = historical_data['date'].notna().to_numpy() & (historical_data['close'].to_numpy() > 0)
+    positions = np.flatnonzero(keep)
+    duplicates = historical_data.iloc[positions].duplicated(subset=['symbol', 'date'], keep='last').to_numpy()
+    keep[positions[duplicates]] = False
+    return keep
+
+def canonicalize_historical_data(historical_data):
+    """
+    Construit le jeu de données historiques canonique, validé et typé
+    
+    Colonnes: date (datetime64[ns]), symbol (category), close (float32 ou float64),
+    ainsi que open, high, low, adjusted_close et volume lorsqu'elles existent. Le
+    format des colonnes est reconnu par modules.schemas et les symboles sont
+    normalisés. Les lignes sans date ou avec un prix de clôture nul et les doublons
+    (symbol, date) sont supprimés une fois pour toutes, et le DataFrame est marqué
+    comme canonique afin que standardize_historical_data le retourne tel quel,
+    sans copie.
+    
+    Les tableaux déjà au bon type ne sont pas copiés : un DataFrame issu du stockage
+    colonnaire reste projeté en mémoire.
     
     Args:
         historical_data (pd.DataFrame): Données historiques des prix
     
     Returns:
-        pd.DataFrame: DataFrame avec les colonnes standardisées
+        pd.DataFrame: Données historiques canoniques (à ne pas modifier en place)
     """
-    # Créer une copie pour éviter de modifier l'original
-    df = historical_data.copy()
+    if is_canonical(historical_data, 'historical', HISTORICAL_COLUMNS):
+        return historical_data
     
-    # Réinitialiser l'index pour éviter les problèmes d'index dupliqués
-    df = df.reset_index(drop=True)
+    schema = detect_schema(historical_data.columns)
+    rename_dict = schema.rename_map(historical_data.columns) if schema is not None else {}
+    df = historical_data.rename(columns=rename_dict, copy=False)
     
-    # Supprimer les doublons éventuels
-    if 'symbol' in df.columns and 'date' in df.columns:
-        df = df.drop_duplicates(subset=['symbol', 'date'])
+    if 'close' not in df.columns and 'adjusted_close' in df.columns:
+        df['close'] = df['adjusted_close']
     
-    # Afficher les colonnes disponibles pour le débogage
-    print(f"Colonnes dans standardize_historical_data: {df.columns.tolist()}")
+    for col in HISTORICAL_COLUMNS:
+        if col not in df.columns:
+            if not df.empty:
+                raise ValueError(f"Colonne '{col}' absente des données historiques")
+            df[col] = pd.Series(dtype='float64')
     
-    # Vérifier et renommer les colonnes si elles existent
-    rename_dict = {}
+    if not pd.api.types.is_datetime64_ns_dtype(df['date']):
+        date_format = schema.date_format if schema is not None else None
+        df['date'] = pd.to_datetime(df['date'], format=date_format, errors='coerce')
+    symbols = normalize_symbols(df['symbol'], schema.symbol_suffix if schema is not None else None)
+    if symbols is not df['symbol']:
+        df['symbol'] = symbols
+    for col in ['open', 'high', 'low', 'close', 'adjusted_close']:
+        if col in df.columns and df[col].dtype not in ('float32', 'float64'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
     
-    # Mappings standard
-    column_mappings = {
-        'Date': 'date',
-        'date': 'date',
-        'Ticker': 'symbol',
-        'symbol': 'symbol',
-        'Close': 'close',
-        'close': 'close',
-        'adjusted_close': 'close'
-    }
+    # Écarter les lignes invalides et les doublons éventuels
+    keep = canonical_row_mask(df)
+    if not keep.all():
+        df = df[keep]
     
-    # Appliquer les mappings
-    for old_col, new_col in column_mappings.items():
-        if old_col in df.columns:
-            rename_dict[old_col] = new_col
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        df = df.reset_index(drop=True)
     
-    # Renommer les colonnes existantes
-    df = df.rename(columns=rename_dict)
+    df.attrs[CANONICAL_ATTR] = 'historical'
+    return df
+
+def canonicalize_transactions_data(transactions_data):
+    """
+    Construit le jeu de transactions canonique, validé et typé
+    
+    Colonnes: purchase_date (datetime64[ns]), symbol (str), Type ('BUY' ou 'SELL'),
+    quantity et purchase_price (float64). Le DataFrame est marqué comme canonique
+    afin que standardize_transactions_data le retourne tel quel.
+    
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+    
+    Returns:
+        pd.DataFrame: Transactions canoniques (à ne pas modifier en place)
+    """
+    if is_canonical(transactions_data, 'transactions', TRANSACTIONS_COLUMNS):
+        return transactions_data
+    
+    df = standardize_transactions_data(transactions_data).reset_index(drop=True)
+    
+    df['purchase_date'] = pd.to_datetime(df['purchase_date'], errors='coerce')
+    # Codes de transaction ramenés aux symboles des cotations (config.SYMBOL_ALIASES)
+    df['symbol'] = normalize_symbols(df['symbol'].astype(str)).astype(str)
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').astype('float64')
+    df['purchase_price'] = pd.to_numeric(df['purchase_price'], errors='coerce').astype('float64')
+    if 'Type' in df.columns:
+        df['Type'] = df['Type'].map(standardize_transaction_type)
+    else:
+        df['Type'] = 'BUY'
+    
+    df.attrs[CANONICAL_ATTR] = 'transactions'
+    return df
+
+def standardize_historical_data(historical_data):
+    """
+    Standardise les noms de colonnes pour les données historiques
+    
+    Le format des données est reconnu par le registre des formats (modules.schemas)
+    à partir des seuls noms de colonnes : les colonnes sont renommées et les symboles
+    normalisés sans deviner les colonnes à chaque appel.
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+    
+    Returns:
+        pd.DataFrame: DataFrame avec les colonnes standardisées
+    """
+    # Les données canoniques sont déjà standardisées : aucune copie nécessaire
+    if is_canonical(historical_data, 'historical', HISTORICAL_COLUMNS):
+        return historical_data
+    
+    # Réinitialiser l'index (copie : l'original n'est pas modifié)
+    df = historical_data.reset_index(drop=True)
+    
+    schema = detect_schema(df.columns)
+    if schema is None:
+        print(f"Attention: format des données historiques non reconnu ({df.columns.tolist()})")
+    else:
+        df = df.rename(columns=schema.rename_map(df.columns))
+    
+    if 'close' not in df.columns and 'adjusted_close' in df.columns:
+        df['close'] = df['adjusted_close']
     
     # S'assurer que les colonnes requises existent
     if 'date' not in df.columns:
         print("Attention: Colonne 'date' non trouvée dans les données historiques")
         df['date'] = pd.NaT
-        
+    elif not pd.api.types.is_datetime64_any_dtype(df['date']):
+        date_format = schema.date_format if schema is not None else None
+        df['date'] = pd.to_datetime(df['date'], format=date_format, errors='coerce')
+    
     if 'symbol' not in df.columns:
         print("Attention: Colonne 'symbol' non trouvée dans les données historiques")
-        # Essayer de trouver une colonne qui pourrait contenir le symbole
-        if any('symbol' in col.lower() for col in df.columns):
-            symbol_col = next(col for col in df.columns if 'symbol' in col.lower())
-            df['symbol'] = df[symbol_col]
-        else:
-            df['symbol'] = ''
-        
+        df['symbol'] = ''
+    else:
+        df['symbol'] = normalize_symbols(df['symbol'], schema.symbol_suffix if schema is not None else None)
+    
     if 'close' not in df.columns:
         print("Attention: Colonne 'close' non trouvée dans les données historiques")
-        # Essayer de trouver une colonne qui pourrait contenir le prix de clôture
-        if any('close' in col.lower() for col in df.columns):
-            close_col = next(col for col in df.columns if 'close' in col.lower())
-            try:
-                df['close'] = pd.to_numeric(df[close_col], errors='coerce')
-            except TypeError:
-                print(f"Erreur lors de la conversion de la colonne {close_col} en numérique")
-                df['close'] = 0.0
-        else:
-            df['close'] = 0.0
+        df['close'] = 0.0
     else:
-        # Convertir la colonne close en numérique
-        try:
-            df['close'] = pd.to_numeric(df['close'], errors='coerce')
-        except TypeError:
-            print("Erreur lors de la conversion de la colonne 'close' en numérique")
-            # Vérifier le type de la colonne close
-            print(f"Type de la colonne 'close': {type(df['close'])}")
-            # Si c'est un objet, essayer de le convertir en liste puis en série
-            if isinstance(df['close'], object):
-                try:
-                    close_values = list(df['close'])
-                    df['close'] = pd.Series(close_values, index=df.index)
-                    df['close'] = pd.to_numeric(df['close'], errors='coerce')
-                except:
-                    df['close'] = 0.0
-            else:
-                df['close'] = 0.0
+        df['close'] = pd.to_numeric(df['close'], errors='coerce')
+    
+    # Supprimer les doublons éventuels
+    df = df.drop_duplicates(subset=['symbol', 'date'])
     
     return df
 
@@ -106,6 +234,10 @@ def standardize_transactions_data(transactions_data):
     Returns:
         pd.DataFrame: DataFrame avec les colonnes standardisées
     """
+    # Les données canoniques sont déjà standardisées : aucune copie nécessaire
+    if is_canonical(transactions_data, 'transactions', TRANSACTIONS_COLUMNS):
+        return transactions_data
+    
     # Créer une copie pour éviter de modifier l'original
     df = transactions_data.copy()
     
@@ -120,6 +252,17 @@ def standardize_transactions_data(transactions_data):
     if 'Date_Acquisition' in df.columns:
         rename_dict['Date_Acquisition'] = 'purchase_date'
     
+    # Format du journal des transactions (Date;Symbol;Type;Quantity;Price)
+    ledger_mappings = {
+        'Symbol': 'symbol',
+        'Quantity': 'quantity',
+        'Price': 'purchase_price',
+        'Date': 'purchase_date',
+    }
+    for old_col, new_col in ledger_mappings.items():
+        if old_col in df.columns and new_col not in df.columns and new_col not in rename_dict.values():
+            rename_dict[old_col] = new_col
+    
     # Renommer les colonnes existantes
     df = df.rename(columns=rename_dict)
     
@@ -142,6 +285,155 @@ def standardize_transactions_data(transactions_data):
     
     return df
 
+def read_historical_csv(historical_file):
+    """
+    Analyse un fichier CSV de données historiques (séparateur point-virgule)
+    
+    Args:
+        historical_file (str): Chemin du fichier CSV
+    
+    Returns:
+        pd.DataFrame: Données historiques (colonnes du fichier) avec les dates converties
+    """
+    schema = detect_schema(read_header(historical_file))
+    
+    # Utiliser sep=';' pour les fichiers CSV avec séparateur point-virgule
+    historical_data = pd.read_csv(historical_file, sep=';', decimal=schema.decimal if schema is not None else '.')
+    historical_data.columns = clean_header(historical_data.columns)
+    
+    # Convertir la colonne des dates au format du fichier
+    if schema is not None:
+        date_column = next((col for col, new_col in schema.columns.items()
+                            if new_col == 'date' and col in historical_data.columns), None)
+        if date_column is not None:
+            historical_data[date_column] = pd.to_datetime(
+                historical_data[date_column], format=schema.date_format, errors='coerce'
+            )
+    
+    return historical_data
+
+def stream_historical_csv(historical_file, store_dir, fingerprint, chunk_rows=None):
+    """
+    Compile un fichier CSV de données historiques dans le stockage colonnaire, par blocs
+    
+    Le format du fichier est reconnu à partir de son en-tête (modules.schemas). Le
+    fichier est lu par blocs de chunk_rows lignes : les dates de chaque bloc sont
+    analysées au format du fichier, les symboles normalisés, les lignes invalides (date manquante, prix nul) sont
+    écartées et le bloc est écrit directement dans le stockage, aux types de
+    HISTORICAL_STORE_DTYPES (élargis au besoin). La mémoire utilisée est bornée par
+    la taille des blocs, quelle que soit la taille du fichier. Les doublons
+    (symbol, date) sont écartés au chargement par canonicalize_historical_data.
+    
+    Args:
+        historical_file (str): Chemin du fichier CSV (séparateur point-virgule)
+        store_dir (str): Dossier du stockage
+        fingerprint (dict): Empreinte du fichier source
+        chunk_rows (int, optional): Lignes par bloc. Par défaut config.CSV_CHUNK_ROWS.
+    
+    Returns:
+        dict: Manifeste du stockage écrit
+    """
+    header = read_header(historical_file)
+    schema = detect_schema(header)
+    if schema is None:
+        raise ValueError(f"Format de données historiques non reconnu: {header}")
+    columns = schema.canonical_columns(header)
+    if 'close' not in columns and 'adjusted_close' in columns:
+        columns.append('close')
+    for col in HISTORICAL_COLUMNS:
+        if col not in columns:
+            raise ValueError(f"Colonne '{col}' absente des données historiques")
+    
+    reader = pd.read_csv(
+        historical_file,
+        sep=';',
+        header=0,
+        names=columns[:len(header)],
+        chunksize=chunk_rows or config.CSV_CHUNK_ROWS,
+        dtype={'symbol': str},
+        decimal=schema.decimal,
+    )
+    
+    writer = None
+    for chunk in reader:
+        if 'close' not in chunk.columns:
+            chunk['close'] = chunk['adjusted_close']
+        
+        if writer is None:
+            # Colonnes inconnues : numériques en float64, texte en catégories
+            dtypes = {}
+            for col in columns:
+                if col in HISTORICAL_STORE_DTYPES:
+                    dtypes[col] = HISTORICAL_STORE_DTYPES[col]
+                elif pd.api.types.is_numeric_dtype(chunk[col]):
+                    dtypes[col] = 'float64'
+                else:
+                    dtypes[col] = 'category'
+            writer = PriceStoreWriter(store_dir, dtypes)
+        
+        chunk['date'] = pd.to_datetime(chunk['date'], format=schema.date_format, errors='coerce')
+        chunk['symbol'] = normalize_symbols(chunk['symbol'], schema.symbol_suffix)
+        close = pd.to_numeric(chunk['close'], errors='coerce').to_numpy()
+        valid = chunk['date'].notna().to_numpy() & (close > 0)
+        writer.append(chunk if valid.all() else chunk[valid])
+    
+    if writer is None:
+        writer = PriceStoreWriter(store_dir, {col: HISTORICAL_STORE_DTYPES.get(col, 'float64') for col in columns})
+    return writer.close(fingerprint)
+
+def canonicalize_price_store(historical_data, store_dir, manifest=None):
+    """
+    Rend canonique un DataFrame chargé depuis le stockage, sans le copier
+    
+    Les lignes invalides ou en double sont retirées du stockage lui-même (une seule
+    fois) plutôt que du DataFrame : celui-ci reste projeté en mémoire et ses lignes
+    correspondent à celles du stockage, dont les autres colonnes sont lues à la
+    demande (voir get_price_columns).
+    
+    Args:
+        historical_data (pd.DataFrame): Colonnes HISTORICAL_COLUMNS du stockage
+        store_dir (str): Dossier du stockage
+        manifest (dict, optional): Manifeste déjà lu
+    
+    Returns:
+        pd.DataFrame: Données historiques canoniques
+    """
+    keep = canonical_row_mask(historical_data)
+    if not keep.all():
+        manifest = compact_price_store(store_dir, keep, manifest)
+        historical_data = load_price_store(store_dir, manifest, HISTORICAL_COLUMNS)
+    return canonicalize_historical_data(historical_data)
+
+def get_price_columns(historical_data, columns):
+    """
+    Retourne des colonnes des données historiques, lues à la demande dans le stockage
+    
+    load_data ne charge que les colonnes HISTORICAL_COLUMNS : les autres (open, high,
+    low, volume...) sont projetées depuis le stockage colonnaire au premier accès.
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques canoniques (issues de load_data)
+        columns (list): Colonnes demandées
+    
+    Returns:
+        pd.DataFrame: Colonnes demandées, alignées sur historical_data (NaN pour les
+            colonnes indisponibles)
+    """
+    data = {col: historical_data[col] for col in columns if col in historical_data.columns}
+    
+    missing = [col for col in columns if col not in data]
+    store_dir = _PRICE_STORES.get(historical_data)
+    manifest = read_manifest(store_dir) if missing and store_dir is not None else None
+    if manifest is not None and manifest['rows'] == len(historical_data):
+        stored = load_price_store(store_dir, manifest, missing)
+        for col in stored.columns:
+            data[col] = stored[col].set_axis(historical_data.index, copy=False)
+    
+    return pd.DataFrame(
+        {col: data.get(col, pd.Series(np.nan, index=historical_data.index)) for col in columns},
+        copy=False,
+    )
+
 def load_data():
     """
     Charge les données historiques et les transactions de la Bourse de Casablanca
@@ -167,24 +459,40 @@ def load_data():
     
     print(f"Fichiers CSV trouvés: {csv_files}")
     
-    # Charger les données historiques
-    historical_file = os.path.join(data_dir, 'historical_data.csv')
+    # Charger les données historiques : flux avec cours ajusté (config.HISTORICAL_DATA_PATH)
+    # s'il existe, sinon historical_data.csv ; le format est reconnu à partir de l'en-tête
+    historical_file = config.HISTORICAL_DATA_PATH
+    if not os.path.exists(historical_file):
+        historical_file = os.path.join(data_dir, 'historical_data.csv')
+    historical_name = os.path.basename(historical_file)
     if os.path.exists(historical_file):
         try:
-            print(f"Chargement des données historiques depuis historical_data.csv")
-            # Utiliser sep=';' pour les fichiers CSV avec séparateur point-virgule
-            historical_data = pd.read_csv(historical_file, sep=';')
+            print(f"Chargement des données historiques depuis {historical_name}")
+            # Le CSV n'est analysé que si le stockage colonnaire est absent ou périmé ;
+            # seules les colonnes courantes sont chargées (les autres: get_price_columns)
+            historical_data = load_or_build_price_store(
+                historical_file,
+                config.PROCESSED_DATA_PATH,
+                lambda path: canonicalize_historical_data(read_historical_csv(path)),
+                stream_csv=stream_historical_csv,
+                columns=HISTORICAL_COLUMNS,
+            )
             
-            # Convertir la colonne Date en datetime
-            if 'Date' in historical_data.columns:
-                historical_data['Date'] = pd.to_datetime(historical_data['Date'], format='%d/%m/%Y', errors='coerce')
+            # Mémoriser le stockage d'origine pour les ajouts incrémentaux
+            store_dir = get_store_dir(historical_file, config.PROCESSED_DATA_PATH)
+            manifest = read_manifest(store_dir)
+            if manifest is not None and manifest['rows'] == len(historical_data):
+                historical_data = canonicalize_price_store(historical_data, store_dir, manifest)
+                _PRICE_STORES.set(historical_data, store_dir)
+            else:
+                historical_data = canonicalize_historical_data(historical_data)
             
-            print(f"Données historiques chargées: {len(historical_data)} lignes, {historical_data['Symbol'].nunique()} symboles")
+            print(f"Données historiques chargées: {len(historical_data)} lignes, {historical_data['symbol'].nunique()} symboles")
         except Exception as e:
-            print(f"Erreur lors du chargement de historical_data.csv: {e}")
+            print(f"Erreur lors du chargement de {historical_name}: {e}")
             historical_data = pd.DataFrame()
     else:
-        print("Fichier historical_data.csv non trouvé")
+        print(f"Fichier {historical_name} non trouvé")
         historical_data = pd.DataFrame()
     
     # Charger les données de transactions
@@ -199,6 +507,11 @@ def load_data():
             if 'Date' in transactions_data.columns:
                 transactions_data['Date'] = pd.to_datetime(transactions_data['Date'], format='%d/%m/%Y', errors='coerce')
             
+            transactions_data = canonicalize_transactions_data(transactions_data)
+            
+            # Quantités et prix ramenés à la base de titres actuelle (divisions de titres)
+            transactions_data = adjust_transactions(transactions_data, get_corporate_actions())
+            
             print(f"Transactions chargées: {len(transactions_data)} lignes")
         except Exception as e:
             print(f"Erreur lors du chargement de transactions.csv: {e}")
@@ -231,71 +544,419 @@ def standardize_transaction_type(type_str):
     else:
         return 'BUY'  # Valeur par défaut
 
-def get_current_prices(historical_data, as_of_date):
+class PriceHistory:
     """
-    Récupère les prix de clôture les plus récents pour chaque action à une date donnée
+    Historique des prix de clôture indexé par symbole et par date
     
-    Args:
-        historical_data (pd.DataFrame): Données historiques des prix contenant les colonnes
-            [Date, Ticker, Close]
-        as_of_date (datetime): Date à laquelle récupérer les prix
+    Les prix sont triés une seule fois par (symbole, date) à la construction. Les
+    recherches « dernier prix connu à une date » se font ensuite par recherche
+    dichotomique (np.searchsorted) sur une clé composite (code symbole, rang de
+    la date dans le calendrier), sans parcourir les données.
     
-    Returns:
-        pd.DataFrame: DataFrame contenant les colonnes [symbol, close]
+    Attributes:
+        symbols (np.ndarray): Symboles, indexés par leur code
+        calendar (np.ndarray): Dates distinctes triées (datetime64[ns])
     """
-    try:
-        # Standardiser les noms de colonnes pour les données historiques
-        historical_data_renamed = standardize_historical_data(historical_data)
+    
+    def __init__(self, symbols, codes, dates, closes):
+        """
+        Construit l'index à partir de tableaux alignés
         
-        # Réinitialiser l'index pour éviter les problèmes d'index dupliqués
-        historical_data_renamed = historical_data_renamed.reset_index(drop=True)
+        Args:
+            symbols (array-like): Symboles distincts, indexés par leur code
+            codes (np.ndarray): Code du symbole de chaque ligne
+            dates (np.ndarray): Date de chaque ligne (datetime64[ns])
+            closes (np.ndarray): Prix de clôture de chaque ligne
+        """
+        self.symbols = np.asarray(symbols, dtype=object)
         
-        # Supprimer les doublons éventuels
-        if 'symbol' in historical_data_renamed.columns and 'date' in historical_data_renamed.columns:
-            historical_data_renamed = historical_data_renamed.drop_duplicates(subset=['symbol', 'date'])
+        codes = np.asarray(codes, dtype='int64')
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        closes = np.asarray(closes, dtype='float64')
         
-        # Vérifier si la colonne 'date' est de type datetime
-        if 'date' in historical_data_renamed.columns and not pd.api.types.is_datetime64_any_dtype(historical_data_renamed['date']):
-            historical_data_renamed['date'] = pd.to_datetime(historical_data_renamed['date'], errors='coerce')
+        # Ignorer les lignes sans date ou sans prix valide
+        valid = ~np.isnat(dates) & (closes > 0) & (codes >= 0)
+        codes, dates, closes = codes[valid], dates[valid], closes[valid]
         
-        # Vérifier si as_of_date est de type datetime
-        if not isinstance(as_of_date, pd.Timestamp) and not isinstance(as_of_date, pd.DatetimeIndex):
-            as_of_date = pd.to_datetime(as_of_date, errors='coerce')
+        self.calendar = np.unique(dates)
+        date_ranks = np.searchsorted(self.calendar, dates)
+        keys = (codes << 32) | date_ranks
         
-        # Créer une méthode alternative pour filtrer les données
-        filtered_data = historical_data_renamed.copy()
-        filtered_data = filtered_data[filtered_data['date'].notna()]
-        filtered_data = filtered_data[filtered_data['date'] <= as_of_date]
+        # Tri stable : pour une même clé, la dernière ligne du fichier l'emporte
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        last_of_key = np.ones(len(keys), dtype=bool)
+        last_of_key[:-1] = keys[1:] != keys[:-1]
         
-        # Si filtered_data est vide, retourner un DataFrame vide
-        if filtered_data.empty:
-            print("Aucune donnée trouvée pour la date spécifiée")
-            return pd.DataFrame(columns=['symbol', 'close'])
+        self._set_index(keys[last_of_key], closes[order][last_of_key])
+        self.replaced_bars = 0
+    
+    def _set_index(self, keys, closes):
+        """
+        Installe les tableaux triés par clé et calcule le début du segment de chaque symbole
+        
+        Args:
+            keys (np.ndarray): Clés composites (code << 32 | rang de la date), triées
+            closes (np.ndarray): Prix de clôture alignés sur les clés
+        """
+        self._keys = keys
+        self._closes = closes
+        self._starts = np.searchsorted(self._keys, np.arange(len(self.symbols), dtype='int64') << 32)
+    
+    def append(self, new_bars):
+        """
+        Retourne un nouvel index incluant de nouvelles barres, sans retrier l'historique
+        
+        Seules les nouvelles barres sont triées ; elles sont ensuite insérées dans les
+        tableaux existants par recherche dichotomique. Une barre existante pour le même
+        (symbole, date) est remplacée. L'index courant n'est pas modifié.
+        
+        Args:
+            new_bars (pd.DataFrame): Nouvelles barres (date, symbol, close)
+        
+        Returns:
+            PriceHistory: Nouvel index ; son attribut replaced_bars indique le nombre
+                de barres existantes remplacées
+        """
+        delta = PriceHistory.from_frame(new_bars)
+        if len(delta._keys) == 0:
+            return self
+        
+        # Codes des symboles du delta dans l'index (nouveaux symboles ajoutés à la fin)
+        code_of = {symbol: code for code, symbol in enumerate(self.symbols)}
+        new_symbols = [symbol for symbol in delta.symbols if symbol not in code_of]
+        for symbol in new_symbols:
+            code_of[symbol] = len(code_of)
+        symbols = np.concatenate([self.symbols, np.array(new_symbols, dtype=object)])
+        delta_codes = np.array([code_of[symbol] for symbol in delta.symbols], dtype='int64')[delta._keys >> 32]
+        delta_dates = delta.calendar[delta._keys & 0xFFFFFFFF]
+        
+        # Les rangs existants ne changent que si des dates sont insérées avant la fin
+        calendar = np.union1d(self.calendar, delta.calendar)
+        old_ranks = self._keys & 0xFFFFFFFF
+        if len(self.calendar) and calendar[len(self.calendar) - 1] != self.calendar[-1]:
+            old_ranks = np.searchsorted(calendar, self.calendar[old_ranks])
+        old_keys = ((self._keys >> 32) << 32) | old_ranks
+        
+        new_keys = (delta_codes << 32) | np.searchsorted(calendar, delta_dates)
+        order = np.argsort(new_keys, kind='stable')
+        new_keys, new_closes = new_keys[order], delta._closes[order]
+        
+        positions = np.searchsorted(old_keys, new_keys)
+        exists = positions < len(old_keys)
+        exists[exists] = old_keys[positions[exists]] == new_keys[exists]
+        
+        closes = self._closes.copy()
+        closes[positions[exists]] = new_closes[exists]
+        inserted = ~exists
+        
+        result = PriceHistory.__new__(PriceHistory)
+        result.symbols = symbols
+        result.calendar = calendar
+        result._set_index(
+            np.insert(old_keys, positions[inserted], new_keys[inserted]),
+            np.insert(closes, positions[inserted], new_closes[inserted])
+        )
+        result.replaced_bars = int(exists.sum())
+        return result
+    
+    @classmethod
+    def from_frame(cls, historical_data):
+        """
+        Construit l'index à partir d'un DataFrame de données historiques
         
-        # Obtenir le prix le plus récent pour chaque action
-        # Utiliser une méthode plus robuste pour le groupby
-        latest_prices = filtered_data.sort_values('date')
+        Args:
+            historical_data (pd.DataFrame): Données historiques des prix
         
-        # Créer un DataFrame pour stocker les résultats
-        result = []
-        for symbol in filtered_data['symbol'].unique():
-            symbol_data = filtered_data[filtered_data['symbol'] == symbol]
-            if not symbol_data.empty:
-                latest_row = symbol_data.iloc[-1]
-                result.append({
-                    'symbol': symbol,
-                    'close': latest_row['close']
-                })
+        Returns:
+            PriceHistory: Index des prix
+        """
+        df = standardize_historical_data(historical_data)
+        
+        if df.empty:
+            return cls([], np.empty(0, dtype='int64'), np.empty(0, dtype='datetime64[ns]'), np.empty(0))
+        
+        symbols = pd.Categorical(df['symbol'])
+        dates = pd.to_datetime(df['date'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        closes = widen_prices(pd.to_numeric(df['close'], errors='coerce').to_numpy())
+        
+        return cls(symbols.categories.to_numpy(dtype=object), symbols.codes, dates, closes)
+    
+    @property
+    def last_date(self):
+        """pd.Timestamp: Date la plus récente disponible (NaT si vide)"""
+        if len(self.calendar) == 0:
+            return pd.NaT
+        return pd.Timestamp(self.calendar[-1])
+    
+    def _lookup(self, as_of_dates, first_after=False):
+        """
+        Recherche la position du dernier prix connu pour chaque (date, symbole)
+        
+        Args:
+            as_of_dates (np.ndarray): Dates de recherche (datetime64[ns])
+            first_after (bool, optional): Rechercher plutôt le premier prix à la date
+                ou après. Par défaut False.
+        
+        Returns:
+            np.ndarray: Matrice (dates × symboles) des positions, -1 si aucun prix
+        """
+        n_symbols = len(self.symbols)
+        codes = np.arange(n_symbols, dtype='int64')
+        
+        if first_after:
+            date_ranks = np.searchsorted(self.calendar, as_of_dates, side='left')
+            targets = (codes[np.newaxis, :] << 32) | date_ranks[:, np.newaxis]
+            positions = np.searchsorted(self._keys, targets, side='left')
+            
+            # La position doit appartenir au segment du symbole
+            ends = np.append(self._starts[1:], len(self._keys))
+            return np.where(positions < ends[np.newaxis, :], positions, -1)
+        
+        date_ranks = np.searchsorted(self.calendar, as_of_dates, side='right') - 1
+        targets = (codes[np.newaxis, :] << 32) | np.maximum(date_ranks, 0)[:, np.newaxis]
+        positions = np.searchsorted(self._keys, targets, side='right') - 1
+        
+        # La position doit appartenir au segment du symbole et la date être couverte
+        found = (positions >= self._starts[np.newaxis, :]) & (date_ranks[:, np.newaxis] >= 0)
+        return np.where(found, positions, -1)
+    
+    def series(self, symbol):
+        """
+        Retourne l'historique des prix de clôture d'un symbole
+        
+        Args:
+            symbol (str): Symbole recherché
+        
+        Returns:
+            pd.Series: Prix de clôture indexés par date (vide si symbole inconnu)
+        """
+        codes = np.flatnonzero(self.symbols == symbol)
+        if len(codes) == 0:
+            return pd.Series(dtype='float64', index=pd.DatetimeIndex([]), name='close')
+        
+        start = self._starts[codes[0]]
+        end = self._starts[codes[0] + 1] if codes[0] + 1 < len(self._starts) else len(self._keys)
+        
+        return pd.Series(
+            self._closes[start:end],
+            index=pd.DatetimeIndex(self.calendar[self._keys[start:end] & 0xFFFFFFFF]),
+            name='close'
+        )
+    
+    def as_of(self, as_of_date):
+        """
+        Retourne le dernier prix de clôture connu de chaque symbole à une date
         
-        # Convertir la liste en DataFrame
-        latest_prices = pd.DataFrame(result)
+        Args:
+            as_of_date (datetime): Date de recherche
+        
+        Returns:
+            pd.DataFrame: DataFrame contenant les colonnes [symbol, date, close]
+        """
+        as_of_date = pd.to_datetime(as_of_date, errors='coerce')
+        if pd.isna(as_of_date) or len(self._keys) == 0:
+            return pd.DataFrame(columns=['symbol', 'date', 'close'])
+        
+        positions = self._lookup(np.array([as_of_date.to_datetime64()], dtype='datetime64[ns]'))[0]
+        found = positions >= 0
+        positions = positions[found]
+        
+        return pd.DataFrame({
+            'symbol': self.symbols[found],
+            'date': self.calendar[self._keys[positions] & 0xFFFFFFFF],
+            'close': self._closes[positions],
+        })
+    
+    def as_of_many(self, as_of_dates):
+        """
+        Retourne les derniers prix connus de chaque symbole à plusieurs dates
+        
+        Args:
+            as_of_dates (array-like): Dates de recherche
+        
+        Returns:
+            pd.DataFrame: Matrice des prix (index: dates, colonnes: symboles),
+                NaN lorsqu'aucun prix n'est disponible à la date
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(as_of_dates))
+        if len(self._keys) == 0:
+            return pd.DataFrame(index=index, columns=self.symbols, dtype='float64')
+        
+        positions = self._lookup(index.to_numpy(dtype='datetime64[ns]'))
+        prices = np.where(positions >= 0, self._closes[positions], np.nan)
+        
+        return pd.DataFrame(prices, index=index, columns=self.symbols)
+
+    def window(self, start_date=None, end_date=None):
+        """
+        Retourne les cours compris entre deux dates (incluses), triés par (symbole, date)
+        
+        Args:
+            start_date (datetime, optional): Première date (début de l'historique si None)
+            end_date (datetime, optional): Dernière date (fin de l'historique si None)
+        
+        Returns:
+            tuple: (codes, dates, closes) ; self.symbols[codes] donne les symboles
+        """
+        ranks = self._keys & 0xFFFFFFFF
+        first_rank = 0 if start_date is None else np.searchsorted(
+            self.calendar, pd.Timestamp(start_date).to_datetime64(), side='left')
+        end_rank = len(self.calendar) if end_date is None else np.searchsorted(
+            self.calendar, pd.Timestamp(end_date).to_datetime64(), side='right')
+        
+        selected = (ranks >= first_rank) & (ranks < end_rank)
+        return self._keys[selected] >> 32, self.calendar[ranks[selected]], self._closes[selected]
+    
+    def close_matrix(self, start_date=None, end_date=None):
+        """
+        Retourne la matrice (dates × symboles) des cours compris entre deux dates
+        
+        Args:
+            start_date (datetime, optional): Première date (début de l'historique si None)
+            end_date (datetime, optional): Dernière date (fin de l'historique si None)
+        
+        Returns:
+            tuple: (dates, matrice des cours) ; NaN les jours sans cotation du symbole
+        """
+        codes, dates, closes = self.window(start_date, end_date)
+        calendar = np.unique(dates)
+        prices = np.full((len(calendar), len(self.symbols)), np.nan)
+        prices[np.searchsorted(calendar, dates), codes] = closes
+        return calendar, prices
+    
+    def last_before(self, codes, dates):
+        """
+        Retourne le dernier prix de clôture strictement antérieur à chaque (symbole, date)
+        
+        Args:
+            codes (np.ndarray): Codes des symboles (positions dans self.symbols)
+            dates (np.ndarray): Dates de recherche (datetime64[ns])
+        
+        Returns:
+            np.ndarray: Prix de clôture, NaN si aucun prix antérieur
+        """
+        codes = np.asarray(codes, dtype='int64')
+        if len(self._keys) == 0 or len(codes) == 0:
+            return np.full(len(codes), np.nan)
+        
+        ranks = np.searchsorted(self.calendar, np.asarray(dates, dtype='datetime64[ns]'), side='left')
+        positions = np.searchsorted(self._keys, (codes << 32) | ranks, side='left') - 1
+        found = (positions >= 0) & (self._keys[np.maximum(positions, 0)] >> 32 == codes)
+        return np.where(found, self._closes[np.maximum(positions, 0)], np.nan)
+    
+    def adjusted(self, factors):
+        """
+        Retourne un index dont les prix sont multipliés par des facteurs d'ajustement
+        
+        Les clés et le calendrier sont partagés avec l'index courant (aucun tri).
+        
+        Args:
+            factors (np.ndarray): Facteur de chaque cours, dans l'ordre de window()
+        
+        Returns:
+            PriceHistory: Index des prix ajustés
+        """
+        result = object.__new__(PriceHistory)
+        result.symbols = self.symbols
+        result.calendar = self.calendar
+        result._set_index(self._keys, self._closes * factors)
+        result.replaced_bars = 0
+        return result
+    
+    def window_returns(self, start_dates, end_date):
+        """
+        Calcule le rendement de chaque symbole entre plusieurs dates de début et une date de fin
+        
+        Le rendement d'une fenêtre va du premier cours à partir de la date de début au
+        dernier cours connu à la date de fin ; il faut au moins deux cours dans la fenêtre.
+        
+        Args:
+            start_dates (array-like): Dates de début des fenêtres
+            end_date (datetime): Date de fin commune
+        
+        Returns:
+            np.ndarray: Matrice (fenêtres × symboles) des rendements en pourcentage,
+                NaN si la fenêtre contient moins de deux cours
+        """
+        start_dates = pd.DatetimeIndex(pd.to_datetime(start_dates)).to_numpy(dtype='datetime64[ns]')
+        if len(self._keys) == 0:
+            return np.full((len(start_dates), len(self.symbols)), np.nan)
+        
+        end_date = np.array([pd.Timestamp(end_date).to_datetime64()], dtype='datetime64[ns]')
+        end_positions = self._lookup(end_date)[0]
+        start_positions = self._lookup(start_dates, first_after=True)
+        
+        # Positions triées par date dans le segment de chaque symbole
+        valid = (start_positions >= 0) & (start_positions < end_positions[np.newaxis, :])
+        start_prices = self._closes[np.where(valid, start_positions, 0)]
+        end_prices = self._closes[np.where(end_positions >= 0, end_positions, 0)]
+        
+        return np.where(valid, (end_prices[np.newaxis, :] / start_prices - 1) * 100, np.nan)
+
+# Index des prix déjà construits, par DataFrame source (libérés avec le DataFrame) :
+# ajustés des divisions (par défaut), bruts, ajustés en rendement total
+_PRICE_HISTORIES = FrameCache()
+_RAW_PRICE_HISTORIES = FrameCache()
+_TOTAL_RETURN_HISTORIES = FrameCache()
+
+def get_price_history(historical_data, adjustment='split'):
+    """
+    Retourne l'index PriceHistory d'un DataFrame, construit une seule fois
+    
+    Les facteurs d'ajustement des opérations sur titres (modules.corporate_actions)
+    sont calculés une seule fois par DataFrame et par type d'ajustement. Sans
+    opération sur titres, les trois vues partagent le même index.
+    
+    Le DataFrame source est supposé ne plus être modifié après le chargement.
+    
+    Args:
+        historical_data (pd.DataFrame or PriceHistory): Données historiques des prix
+        adjustment (str, optional): 'split' : prix ajustés des divisions de titres
+            (cohérents avec les transactions ajustées par load_data) ; 'total' :
+            ajustés aussi des dividendes ; 'raw' : prix bruts. Par défaut 'split'.
+    
+    Returns:
+        PriceHistory: Index des prix
+    """
+    if isinstance(historical_data, PriceHistory):
+        return historical_data
+    
+    cache = {'split': _PRICE_HISTORIES, 'total': _TOTAL_RETURN_HISTORIES}.get(adjustment)
+    if cache is not None:
+        price_history = cache.get(historical_data)
+        if price_history is not None:
+            return price_history
+    
+    raw_history = _RAW_PRICE_HISTORIES.get(historical_data, PriceHistory.from_frame)
+    if cache is None:
+        return raw_history
+    
+    price_history = adjust_price_history(raw_history, get_corporate_actions(), include_dividends=adjustment == 'total')
+    cache.set(historical_data, price_history)
+    return price_history
+
+def get_current_prices(historical_data, as_of_date):
+    """
+    Récupère les prix de clôture les plus récents pour chaque action à une date donnée
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix contenant les colonnes
+            [Date, Ticker, Close]
+        as_of_date (datetime): Date à laquelle récupérer les prix
+    
+    Returns:
+        pd.DataFrame: DataFrame contenant les colonnes [symbol, close]
+    """
+    try:
+        latest_prices = get_price_history(historical_data).as_of(as_of_date)
         
         # Si latest_prices est vide, retourner un DataFrame vide
         if latest_prices.empty:
-            print("Aucun prix récent trouvé")
+            print("Aucune donnée trouvée pour la date spécifiée")
             return pd.DataFrame(columns=['symbol', 'close'])
         
-        return latest_prices
+        return latest_prices[['symbol', 'close']]
     
     except Exception as e:
         print(f"Erreur dans get_current_prices: {e}")
@@ -303,32 +964,126 @@ def get_current_prices(historical_data, as_of_date):
         return pd.DataFrame(columns=['symbol', 'close'])
 
 
-def calculate_portfolio_value(historical_data, transactions_data, as_of_date=None):
+# Stockage colonnaire d'origine de chaque DataFrame chargé par load_data
+_PRICE_STORES = FrameCache()
+
+# Fonctions appelées après chaque ajout de prix : listener(ancien, nouveau, delta)
+_INGEST_LISTENERS = []
+
+def register_ingest_listener(listener):
+    """
+    Enregistre une fonction appelée après chaque ajout incrémental de prix
+    
+    Args:
+        listener (callable): Fonction listener(old_data, new_data, new_bars) recevant
+            l'ancien jeu de données, le nouveau et les barres ajoutées (canoniques)
+    """
+    if listener not in _INGEST_LISTENERS:
+        _INGEST_LISTENERS.append(listener)
+
+# Le jeu de données servi par l'application suit les ajouts de prix
+register_ingest_listener(update_current_dataset)
+
+def ingest_prices(historical_data, new_bars, persist=True):
+    """
+    Ajoute de nouvelles barres journalières sans recharger tout l'historique
+    
+    Seules les nouvelles barres sont analysées, triées et hachées : l'index
+    PriceHistory est complété par insertion, le stockage colonnaire par ajout en fin
+    de fichier, et les résultats mémoïsés antérieurs aux nouvelles dates restent
+    valides. Le DataFrame d'origine n'est pas modifié.
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques canoniques (issues de load_data)
+        new_bars (pd.DataFrame or str): Nouvelles barres, ou chemin d'un CSV delta au
+            format de historical_data.csv
+        persist (bool, optional): Écrire aussi les barres dans le stockage colonnaire
+            d'origine. Par défaut True.
+    
+    Returns:
+        pd.DataFrame: Nouveau jeu de données historiques canonique
+    """
+    historical_data = canonicalize_historical_data(historical_data)
+    if isinstance(new_bars, str):
+        new_bars = read_historical_csv(new_bars)
+    new_rows = canonicalize_historical_data(new_bars)
+    if new_rows.empty:
+        return historical_data
+    
+    # Aligner les colonnes du delta sur celles de l'historique
+    # (le stockage reçoit toutes les colonnes des nouvelles barres)
+    delta = new_rows.reindex(columns=historical_data.columns)
+    
+    # L'index brut est complété ; les vues ajustées sont recalculées à la demande
+    price_history = get_price_history(historical_data, 'raw').append(delta)
+    
+    store_dir = _PRICE_STORES.get(historical_data)
+    if persist and store_dir is not None:
+        # Nouveau lecteur du stockage : historical_data garde ses propres fichiers
+        append_to_price_store(store_dir, new_rows)
+        updated = load_price_store(store_dir, columns=historical_data.columns)
+    else:
+        symbols = pd.api.types.union_categoricals(
+            [historical_data['symbol'].array, delta['symbol'].astype('category').array]
+        )
+        updated = pd.concat([historical_data, delta], ignore_index=True)
+        updated['symbol'] = pd.Categorical(updated['symbol'].astype(object), categories=symbols.categories)
+    
+    if price_history.replaced_bars:
+        # Des barres existantes sont corrigées : dédoublonnage complet
+        updated.attrs = {}
+        if persist and store_dir is not None:
+            updated = canonicalize_price_store(updated, store_dir)
+        else:
+            updated = canonicalize_historical_data(updated)
+    else:
+        # Historique et delta déjà validés séparément
+        updated.attrs[CANONICAL_ATTR] = 'historical'
+    
+    # Index, stockage et empreinte du nouveau jeu de données dérivés du delta seul
+    _RAW_PRICE_HISTORIES.set(updated, price_history)
+    if store_dir is not None and persist:
+        _PRICE_STORES.set(updated, store_dir)
+    set_frame_fingerprint(updated, hashlib.sha1(
+        f"{frame_fingerprint(historical_data)}+{frame_fingerprint(delta)}".encode('utf-8')
+    ).hexdigest()[:16])
+    
+    print(f"Prix ajoutés: {len(delta)} lignes, du {delta['date'].min().date()} au {delta['date'].max().date()}")
+    
+    for listener in list(_INGEST_LISTENERS):
+        try:
+            listener(historical_data, updated, delta)
+        except Exception as e:
+            print(f"Erreur dans un listener d'ajout de prix: {e}")
+    
+    return updated
+
+def calculate_portfolio_value(historical_data, transactions_data, as_of_date=None, method=None):
     """
     Calcule la valeur du portefeuille à une date donnée
     
+    Les ventes sont appariées aux lots d'achat (voir portfolio.match_lots) : seules
+    les positions ouvertes à la date sont valorisées.
+    
     Args:
         historical_data (pd.DataFrame): Données historiques des prix
         transactions_data (pd.DataFrame): Données des transactions
         as_of_date (datetime, optional): Date à laquelle calculer la valeur.
             Si non spécifié, utilise la date la plus récente disponible.
+        method (str, optional): Méthode d'appariement des lots ('fifo', 'lifo',
+            'average'). Par défaut config.LOT_MATCHING_METHOD.
     
     Returns:
         float: Valeur totale du portefeuille
     """
+    from modules.portfolio import match_lots
+    
     # Standardiser les noms de colonnes pour les transactions
     transactions_renamed = standardize_transactions_data(transactions_data)
     
-    # Calculer l'investissement total par action
-    transactions_renamed['total_investment'] = transactions_renamed['quantity'] * transactions_renamed['purchase_price']
-    
     # Si as_of_date n'est pas spécifié, utiliser la date la plus récente
     if as_of_date is None:
-        historical_data_renamed = standardize_historical_data(historical_data)
-        as_of_date = historical_data_renamed['date'].max()
-    
-    # Récupérer les prix actuels
-    current_prices = get_current_prices(historical_data, as_of_date)
+        as_of_date = get_price_history(historical_data).last_date
     
     # Filtrer les transactions jusqu'à la date spécifiée
     filtered_transactions = transactions_renamed[transactions_renamed['purchase_date'] <= as_of_date]
@@ -337,29 +1092,13 @@ def calculate_portfolio_value(historical_data, transactions_data, as_of_date=Non
     if filtered_transactions.empty:
         return 0.0
     
-    # Agréger les transactions par symbole
-    portfolio = filtered_transactions.groupby('symbol').agg({
-        'quantity': 'sum',
-        'total_investment': 'sum'
-    }).reset_index()
-    
-    # Fusionner avec les prix actuels
-    portfolio = pd.merge(portfolio, current_prices, on='symbol', how='left')
-    
-    # Si portfolio est vide après la fusion, retourner 0
-    if portfolio.empty:
-        return 0.0
-    
-    # Remplacer les valeurs NaN par 0
-    portfolio['close'] = portfolio['close'].fillna(0)
-    
-    # Calculer la valeur actuelle
-    portfolio['current_value'] = portfolio['quantity'] * portfolio['close']
+    # Positions ouvertes après appariement des ventes
+    _, positions = match_lots(filtered_transactions, method or config.LOT_MATCHING_METHOD)
     
-    # Calculer la valeur totale du portefeuille
-    total_value = portfolio['current_value'].sum()
-    
-    return total_value
+    # Valoriser au dernier cours connu (0 sans cotation)
+    current_prices = get_current_prices(historical_data, as_of_date)
+    portfolio = pd.merge(positions[['symbol', 'quantity']], current_prices, on='symbol', how='left')
+    return float((portfolio['quantity'] * portfolio['close'].fillna(0)).sum())
 
 def get_missed_profits(historical_data, transactions_data):
     """
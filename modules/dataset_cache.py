@@ -0,0 +1,102 @@
+"""
+Jeu de données servi par l'application et empreintes des DataFrames
+
+Les DataFrames restent côté serveur : le layout et les callbacks relisent le jeu de
+données servi (get_current_dataset) au lieu de le sérialiser en JSON dans des
+composants dcc.Store. Un ajout de prix (ingest_prices) remplace l'historique servi.
+"""
+import hashlib
+import threading
+
+import pandas as pd
+
+from modules.utils import FrameCache
+
+# Empreintes déjà calculées, par DataFrame
+_FINGERPRINTS = FrameCache()
+
+def _compute_fingerprint(data):
+    """
+    Calcule l'empreinte du contenu d'un DataFrame
+
+    Args:
+        data (pd.DataFrame): Données à identifier
+
+    Returns:
+        str: Empreinte hexadécimale (16 caractères)
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in data.dtypes.items()]).encode('utf-8'))
+    if not data.empty:
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def frame_fingerprint(data):
+    """
+    Retourne l'empreinte du contenu d'un DataFrame, calculée une seule fois par objet
+
+    Args:
+        data (pd.DataFrame): Données à identifier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    if data is None:
+        return 'none'
+    return _FINGERPRINTS.get(data, _compute_fingerprint)
+
+def set_frame_fingerprint(data, fingerprint):
+    """
+    Associe une empreinte connue à un DataFrame (évite de hacher son contenu)
+
+    Args:
+        data (pd.DataFrame): Données concernées
+        fingerprint (str): Empreinte à associer
+    """
+    _FINGERPRINTS.set(data, fingerprint)
+
+# Jeu de données servi par l'application : (historical_data, transactions_data)
+_CURRENT = None
+_CURRENT_LOCK = threading.Lock()
+
+def set_current_dataset(historical_data, transactions_data):
+    """
+    Définit le jeu de données servi par l'application
+
+    Les callbacks le relisent à chaque appel (get_current_dataset) : un ajout de
+    prix (ingest_prices) est visible sans redémarrer l'application.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+    """
+    global _CURRENT
+    with _CURRENT_LOCK:
+        _CURRENT = (historical_data, transactions_data)
+
+def get_current_dataset():
+    """
+    Retourne le jeu de données servi par l'application
+
+    Returns:
+        tuple: (historical_data, transactions_data), ou None si aucun jeu de données
+            n'est défini
+    """
+    with _CURRENT_LOCK:
+        return _CURRENT
+
+def update_current_dataset(old_data, new_data, new_bars):
+    """
+    Listener d'ajout de prix : remplace l'historique du jeu de données servi
+
+    Sans effet si les prix ajoutés complètent un autre historique que celui servi.
+
+    Args:
+        old_data (pd.DataFrame): Historique précédent
+        new_data (pd.DataFrame): Historique complété
+        new_bars (pd.DataFrame): Barres ajoutées
+    """
+    with _CURRENT_LOCK:
+        current = _CURRENT
+    if current is not None and current[0] is old_data:
+        set_current_dataset(new_data, current[1])
@@ -0,0 +1,91 @@
+"""
+Réduction du nombre de points des séries de prix affichées
+
+Les graphiques n'affichent pas plus de points qu'ils n'ont de pixels. Chaque série
+est découpée en intervalles de temps égaux sur la plage visible ; dans chaque
+intervalle sont conservés le premier, le dernier, le plus bas et le plus haut cours
+(min/max), ce qui préserve l'allure de la courbe et ses extrêmes. La taille de la
+réponse dépend ainsi de la largeur du graphique et non de la profondeur de l'historique.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+from modules.cache import memoize
+from modules.data_loader import get_price_history
+
+# Points conservés par intervalle (premier, dernier, minimum, maximum)
+POINTS_PER_BUCKET = 4
+
+def minmax_downsample(groups, x, y, n_buckets, x_min, x_max):
+    """
+    Sélectionne les points à conserver pour chaque série par intervalles min/max
+
+    Args:
+        groups (np.ndarray): Identifiant de série de chaque point (tableaux triés par
+            série puis par x)
+        x (np.ndarray): Abscisses (entiers, ex: dates en nanosecondes)
+        y (np.ndarray): Valeurs
+        n_buckets (int): Nombre d'intervalles sur [x_min, x_max]
+        x_min (int): Début de la plage
+        x_max (int): Fin de la plage
+
+    Returns:
+        np.ndarray: Positions des points conservés, dans l'ordre d'origine
+    """
+    n = len(y)
+    if n == 0:
+        return np.zeros(0, dtype='int64')
+
+    span = max(float(x_max - x_min), 1.0)
+    buckets = np.clip(((x - x_min) / span * n_buckets).astype('int64'), 0, n_buckets - 1)
+    keys = groups.astype('int64') * n_buckets + buckets
+
+    # Les clés sont croissantes : chaque (série, intervalle) est un bloc contigu
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    blocks = np.repeat(np.arange(len(starts)), ends - starts + 1)
+
+    def first_of_block(positions):
+        # Première position de chaque bloc parmi des positions croissantes
+        owners = blocks[positions]
+        return positions[np.r_[True, owners[1:] != owners[:-1]]]
+
+    minima = first_of_block(np.flatnonzero(y == np.minimum.reduceat(y, starts)[blocks]))
+    maxima = first_of_block(np.flatnonzero(y == np.maximum.reduceat(y, starts)[blocks]))
+    return np.unique(np.concatenate([starts, ends, minima, maxima]))
+
+@memoize
+def get_chart_series(historical_data, start_date=None, end_date=None, width=None):
+    """
+    Retourne les cours de chaque symbole réduits à la largeur du graphique
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        start_date (datetime, optional): Début de la plage visible (tout l'historique si None)
+        end_date (datetime, optional): Fin de la plage visible (tout l'historique si None)
+        width (int, optional): Largeur du graphique en pixels. Par défaut
+            config.CHART_PIXEL_WIDTH.
+
+    Returns:
+        pd.DataFrame: Colonnes [date, symbol, close], au plus `width` points par symbole
+    """
+    if width is None:
+        width = config.CHART_PIXEL_WIDTH
+
+    price_history = get_price_history(historical_data)
+    codes, dates, closes = price_history.window(start_date, end_date)
+
+    if len(dates):
+        x = dates.view('int64')
+        x_min = x.min() if start_date is None else pd.Timestamp(start_date).value
+        x_max = x.max() if end_date is None else pd.Timestamp(end_date).value
+        n_buckets = max(width // POINTS_PER_BUCKET, 1)
+        kept = minmax_downsample(codes, x, closes, n_buckets, x_min, x_max)
+        codes, dates, closes = codes[kept], dates[kept], closes[kept]
+
+    return pd.DataFrame({
+        'date': dates,
+        'symbol': price_history.symbols[codes],
+        'close': closes,
+    })
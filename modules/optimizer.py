@@ -0,0 +1,353 @@
+"""
+Optimisation d'un rééquilibrage des positions actuelles (simulation « what-if »)
+
+Les poids cibles des positions ouvertes sont calculés à partir des rendements
+moyens annualisés (prix ajustés en rendement total, sur config.OPTIMIZER_LOOKBACK_PERIOD)
+et de la covariance exponentielle (modules.covariance), selon deux méthodes :
+
+- 'mean_variance' : maximise μ'w - (γ / 2) w'Σw ;
+- 'risk_parity' : égalise les contributions des positions au risque du portefeuille.
+
+Les poids sont positifs (pas de vente à découvert), de somme 1 et plafonnés. Les
+solveurs sont vectorisés : gradient projeté accéléré (un produit matrice-vecteur
+et une projection sur le simplexe plafonné par itération) pour la moyenne-variance,
+méthode de Newton (quelques systèmes linéaires) pour la parité de risque. Quelques
+millisecondes suffisent pour quelques centaines de titres, ce qui permet de
+relancer le calcul depuis un callback à chaque changement de paramètre.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+from modules.cache import memoize
+from modules.covariance import get_covariance_matrix
+from modules.data_loader import get_price_history
+from modules.portfolio import calculate_portfolio_metrics
+from modules.risk import build_return_matrix
+from modules.utils import get_period_start
+
+# Méthodes d'optimisation disponibles
+OPTIMIZATION_METHODS = ('mean_variance', 'risk_parity')
+
+def _project(values, max_weight, total, threshold=None, max_iterations=100):
+    """Projection sur le simplexe plafonné, à partir d'un seuil initial (voir project_capped_simplex)"""
+    tolerance = 1e-12 * max(total, 1.0)
+    lower, upper = values.min() - max_weight, values.max()
+    if threshold is None or not lower < threshold < upper:
+        threshold = (values.sum() - total) / len(values)
+    for _ in range(max_iterations):
+        shifted = values - threshold
+        weights = np.clip(shifted, 0.0, max_weight)
+        excess = weights.sum() - total
+        if abs(excess) <= tolerance:
+            break
+        # La somme décroît avec τ : excès positif, τ trop petit
+        if excess > 0:
+            lower = threshold
+        else:
+            upper = threshold
+        free = np.count_nonzero((shifted > 0) & (shifted < max_weight))
+        step = threshold + excess / free if free else np.nan
+        threshold = step if lower < step < upper else (lower + upper) / 2
+    return weights, threshold
+
+def project_capped_simplex(values, max_weight, total=1.0):
+    """
+    Projette un vecteur sur {w : 0 <= w <= max_weight, somme(w) = total}
+
+    La projection vaut clip(values - τ, 0, max_weight) ; le seuil τ est obtenu par
+    la méthode de Newton sur la somme (affine par morceaux), encadrée par
+    dichotomie : quelques itérations suffisent en pratique.
+
+    Args:
+        values (np.ndarray): Vecteur à projeter
+        max_weight (float): Poids maximal de chaque composante
+        total (float, optional): Somme des poids. Par défaut 1.
+
+    Returns:
+        np.ndarray: Poids projetés
+
+    Raises:
+        ValueError: Si le plafond ne permet pas d'atteindre la somme demandée
+    """
+    values = np.asarray(values, dtype='float64')
+    if len(values) == 0:
+        return values.copy()
+    if max_weight * len(values) < total * (1 - 1e-12):
+        raise ValueError(f"Plafond de {max_weight} insuffisant pour {len(values)} positions")
+    return _project(values, max_weight, total)[0]
+
+def _check_convergence(tolerance, max_iterations):
+    """Vérifie les critères d'arrêt des solveurs (ValueError si invalides)"""
+    if not tolerance > 0:
+        raise ValueError(f"Tolérance invalide: {tolerance}")
+    if max_iterations < 1:
+        raise ValueError(f"Nombre maximal d'itérations invalide: {max_iterations}")
+
+def mean_variance_weights(expected_returns, covariance, risk_aversion=None, max_weight=None,
+                          total=1.0, tolerance=None, max_iterations=None):
+    """
+    Calcule les poids moyenne-variance par gradient projeté accéléré (FISTA)
+
+    Maximise μ'w - (γ / 2) w'Σw sur le simplexe plafonné. Le pas 1 / L utilise la
+    borne de Gershgorin de la plus grande valeur propre de γΣ ; l'inertie est
+    annulée dès qu'elle éloigne de l'optimum (redémarrage adaptatif).
+
+    Args:
+        expected_returns (np.ndarray): Rendements annuels attendus (μ)
+        covariance (np.ndarray): Covariance annualisée (Σ)
+        risk_aversion (float, optional): Aversion au risque γ. Par défaut
+            config.OPTIMIZER_RISK_AVERSION.
+        max_weight (float, optional): Poids maximal. Par défaut config.OPTIMIZER_MAX_WEIGHT.
+        total (float, optional): Somme des poids. Par défaut 1.
+        tolerance (float, optional): Variation maximale des poids à la convergence
+        max_iterations (int, optional): Nombre maximal d'itérations
+
+    Returns:
+        tuple: (poids, nombre d'itérations)
+    """
+    risk_aversion = config.OPTIMIZER_RISK_AVERSION if risk_aversion is None else risk_aversion
+    max_weight = config.OPTIMIZER_MAX_WEIGHT if max_weight is None else max_weight
+    tolerance = config.OPTIMIZER_TOLERANCE if tolerance is None else tolerance
+    max_iterations = config.OPTIMIZER_MAX_ITERATIONS if max_iterations is None else max_iterations
+    if risk_aversion <= 0:
+        raise ValueError(f"Aversion au risque invalide: {risk_aversion}")
+    _check_convergence(tolerance, max_iterations)
+
+    expected_returns = np.asarray(expected_returns, dtype='float64')
+    covariance = np.asarray(covariance, dtype='float64')
+    n_assets = len(expected_returns)
+    weights = project_capped_simplex(np.full(n_assets, total / max(n_assets, 1)), max_weight, total)
+    if n_assets <= 1:
+        return weights, 0
+
+    lipschitz = risk_aversion * np.abs(covariance).sum(axis=1).max()
+    step = 1 / lipschitz if lipschitz > 0 else 1.0
+    momentum_point, momentum, threshold = weights, 1.0, None
+    for iteration in range(1, max_iterations + 1):
+        gradient = risk_aversion * (covariance @ momentum_point) - expected_returns
+        # Le seuil de la projection précédente est un bon point de départ
+        updated, threshold = _project(momentum_point - step * gradient, max_weight, total, threshold)
+        difference = updated - weights
+        # Redémarrage adaptatif : inertie annulée dès qu'elle s'oppose à la descente
+        if (momentum_point - updated) @ difference > 0:
+            momentum = 1.0
+        next_momentum = (1 + np.sqrt(1 + 4 * momentum * momentum)) / 2
+        momentum_point = updated + (momentum - 1) / next_momentum * difference
+        change = np.abs(difference).max()
+        weights, momentum = updated, next_momentum
+        if change <= tolerance:
+            break
+    return weights, iteration
+
+def risk_contributions(weights, covariance):
+    """
+    Calcule la part de chaque position dans la variance du portefeuille
+
+    Args:
+        weights (np.ndarray): Poids des positions
+        covariance (np.ndarray): Covariance des rendements
+
+    Returns:
+        np.ndarray: Contributions w_i × (Σw)_i / w'Σw, de somme 1 (NaN si variance nulle)
+    """
+    marginal = covariance @ weights
+    variance = float(weights @ marginal)
+    if variance <= 0:
+        return np.full(len(weights), np.nan)
+    return weights * marginal / variance
+
+def _risk_budget(covariance, offset, total, weights, tolerance, max_iterations):
+    """
+    Égalise les contributions au risque w_i × ((Σw)_i + offset_i) sous somme(w) = total
+
+    Méthode de Newton sur le système w_i × ((Σw)_i + offset_i) = κ, somme(w) = total,
+    d'inconnues (w, κ) ; le pas est réduit pour que w et κ restent positifs.
+    """
+    n_assets = len(weights)
+    level = float(np.mean(weights * (covariance @ weights + offset)))
+    jacobian = np.zeros((n_assets + 1, n_assets + 1))
+    jacobian[:n_assets, :n_assets] = covariance
+    jacobian[n_assets, :n_assets] = 1.0
+    diagonal = np.diag_indices(n_assets)
+    for iteration in range(1, max_iterations + 1):
+        residual = np.append(covariance @ weights + offset - level / weights, weights.sum() - total)
+        if max(np.abs(residual[:-1] * weights).max(), abs(residual[-1])) <= tolerance * level:
+            break
+        jacobian[diagonal] = np.diag(covariance) + level / (weights * weights)
+        jacobian[:n_assets, n_assets] = -1 / weights
+        step = np.linalg.solve(jacobian, residual)
+        scale = 1.0
+        while (weights - scale * step[:-1]).min() <= 0 or level - scale * step[-1] <= 0:
+            scale /= 2
+        weights = weights - scale * step[:-1]
+        level = level - scale * step[-1]
+    return weights, iteration
+
+def risk_parity_weights(covariance, max_weight=None, total=1.0, tolerance=None, max_iterations=None):
+    """
+    Calcule les poids de parité de risque (contributions au risque égales)
+
+    Les poids sont obtenus par la méthode de Newton, à partir des poids
+    inversement proportionnels aux volatilités (quelques itérations, chacune une
+    résolution d'un système linéaire). Les positions qui dépassent le plafond y
+    sont fixées et le calcul est repris sur les autres : le risque restant est
+    réparti également entre les positions sous le plafond.
+
+    Args:
+        covariance (np.ndarray): Covariance annualisée (Σ)
+        max_weight (float, optional): Poids maximal. Par défaut config.OPTIMIZER_MAX_WEIGHT.
+        total (float, optional): Somme des poids. Par défaut 1.
+        tolerance (float, optional): Écart relatif maximal des contributions à la convergence
+        max_iterations (int, optional): Nombre maximal d'itérations de Newton
+
+    Returns:
+        tuple: (poids, nombre d'itérations)
+    """
+    max_weight = config.OPTIMIZER_MAX_WEIGHT if max_weight is None else max_weight
+    tolerance = config.OPTIMIZER_TOLERANCE if tolerance is None else tolerance
+    max_iterations = config.OPTIMIZER_MAX_ITERATIONS if max_iterations is None else max_iterations
+    _check_convergence(tolerance, max_iterations)
+
+    covariance = np.asarray(covariance, dtype='float64')
+    n_assets = len(covariance)
+    variances = np.diag(covariance)
+    if n_assets <= 1 or not (variances > 0).all():
+        return project_capped_simplex(np.full(n_assets, total / max(n_assets, 1)), max_weight, total), 0
+
+    inverse_volatility = 1 / np.sqrt(variances)
+    weights = inverse_volatility * total / inverse_volatility.sum()
+    capped = np.zeros(n_assets, dtype=bool)
+    iterations = 0
+    # Chaque passe fixe au moins une position supplémentaire au plafond
+    while True:
+        free = ~capped
+        fixed = np.where(capped, max_weight, 0.0)
+        if not free.any():
+            return fixed, iterations
+        budget = total - fixed.sum()
+        start = weights[free] * budget / weights[free].sum()
+        solved, used = _risk_budget(
+            covariance[np.ix_(free, free)], covariance[free] @ fixed, budget, start, tolerance, max_iterations
+        )
+        iterations += used
+        weights = fixed.copy()
+        weights[free] = solved
+        above = free & (weights > max_weight)
+        if not above.any():
+            return weights, iterations
+        capped |= above
+
+def _return_model(historical_data, symbols):
+    """
+    Rendements annuels moyens et covariance annualisée des symboles
+
+    Returns:
+        tuple: (rendements attendus, covariance (NaN hors diagonale remplacés par 0),
+            masque des symboles modélisables)
+    """
+    current_date = get_price_history(historical_data).last_date
+    start_date = None if pd.isna(current_date) else get_period_start(config.OPTIMIZER_LOOKBACK_PERIOD, current_date)
+    returns = build_return_matrix(historical_data, start_date).reindex(columns=symbols)
+    counts = returns.count().to_numpy()
+    expected_returns = returns.mean().to_numpy(dtype='float64') * config.TRADING_DAYS_PER_YEAR
+
+    covariance = get_covariance_matrix(historical_data, symbols).to_numpy()
+    modelled = (counts >= config.RISK_MIN_OBSERVATIONS) & (np.diag(covariance) > 0)
+    # Paires sans historique commun suffisant : considérées non corrélées
+    return expected_returns, np.nan_to_num(covariance), modelled
+
+@memoize
+def optimize_portfolio(historical_data, transactions_data, method=None, max_weight=None, risk_aversion=None):
+    """
+    Calcule les poids cibles des positions ouvertes et les ordres de rééquilibrage
+
+    Les positions sans historique suffisant (moins de config.RISK_MIN_OBSERVATIONS
+    rendements) conservent leur poids actuel ; les autres se partagent le reste.
+    Si le plafond ne permet pas de répartir ce reste (plafond × positions
+    optimisées < reste), les poids optimisés sont plafonnés au plus petit plafond
+    possible, indiqué par effective_max_weight.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        method (str, optional): Méthode (voir OPTIMIZATION_METHODS). Par défaut
+            config.OPTIMIZER_METHOD.
+        max_weight (float, optional): Poids maximal d'une position. Par défaut
+            config.OPTIMIZER_MAX_WEIGHT.
+        risk_aversion (float, optional): Aversion au risque ('mean_variance')
+
+    Returns:
+        dict: method, max_weight (plafond demandé), effective_max_weight (plafond
+            appliqué aux positions optimisées), portfolio_value, iterations,
+            current_return, target_return, current_volatility, target_volatility et
+            trades (DataFrame [symbol, close, current_weight, target_weight,
+            current_value, target_value, trade_value, trade_quantity])
+
+    Raises:
+        ValueError: Si la méthode est inconnue ou si le plafond n'est pas dans ]0, 1]
+    """
+    method = method or config.OPTIMIZER_METHOD
+    max_weight = config.OPTIMIZER_MAX_WEIGHT if max_weight is None else max_weight
+    if method not in OPTIMIZATION_METHODS:
+        raise ValueError(f"Méthode d'optimisation inconnue: {method}")
+    if not 0 < max_weight <= 1:
+        raise ValueError(f"Poids maximal invalide: {max_weight}")
+
+    details = calculate_portfolio_metrics(transactions_data, historical_data)['portfolio_details']
+    details = details[details['current_value'] > 0]
+    symbols = details['symbol'].astype(str).to_numpy()
+    closes = details['close'].to_numpy(dtype='float64')
+    values = details['current_value'].to_numpy(dtype='float64')
+    portfolio_value = float(values.sum())
+
+    current_weights = values / portfolio_value if portfolio_value > 0 else values
+    target_weights = current_weights.copy()
+    iterations = 0
+    expected_returns = np.zeros(len(symbols))
+    covariance = np.zeros((len(symbols), len(symbols)))
+    cap = max_weight
+
+    if len(symbols):
+        expected_returns, covariance, modelled = _return_model(historical_data, symbols)
+        budget = 1 - current_weights[~modelled].sum()
+        selected = np.ix_(modelled, modelled)
+        if modelled.any() and budget > 0:
+            # Plus petit plafond permettant de répartir le budget (voir effective_max_weight)
+            cap = max(max_weight, budget / modelled.sum())
+            if method == 'mean_variance':
+                weights, iterations = mean_variance_weights(
+                    expected_returns[modelled], covariance[selected], risk_aversion, cap, budget
+                )
+            else:
+                weights, iterations = risk_parity_weights(covariance[selected], cap, budget)
+            target_weights[modelled] = weights
+        expected_returns = np.where(modelled, expected_returns, 0.0)
+
+    target_values = target_weights * portfolio_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trade_quantities = np.where(closes > 0, (target_values - values) / closes, np.nan)
+
+    trades = pd.DataFrame({
+        'symbol': symbols,
+        'close': closes,
+        'current_weight': current_weights,
+        'target_weight': target_weights,
+        'current_value': values,
+        'target_value': target_values,
+        'trade_value': target_values - values,
+        'trade_quantity': trade_quantities,
+    }).sort_values('target_weight', ascending=False, ignore_index=True)
+
+    return {
+        'method': method,
+        'max_weight': max_weight,
+        'effective_max_weight': cap,
+        'portfolio_value': portfolio_value,
+        'iterations': iterations,
+        'current_return': float(expected_returns @ current_weights),
+        'target_return': float(expected_returns @ target_weights),
+        'current_volatility': float(np.sqrt(max(current_weights @ covariance @ current_weights, 0.0))),
+        'target_volatility': float(np.sqrt(max(target_weights @ covariance @ target_weights, 0.0))),
+        'trades': trades,
+    }
@@ -1,111 +1,556 @@
 """
 Module pour les calculs de performance
 """
+import threading
+import multiprocessing
+from statistics import NormalDist
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from modules.data_loader import standardize_historical_data, standardize_transactions_data
 
-def calculate_comparative_performance(historical_data, transactions_data, benchmark_symbol='^NSEI', period='1Y'):
+import config
+from modules.cache import memoize
+from modules.results_cache import persistent
+from modules.dataset_cache import frame_fingerprint
+from modules.corporate_actions import dividend_events, get_corporate_actions
+from modules.covariance import get_covariance_matrix
+from modules.portfolio import calculate_portfolio_metrics
+from modules.risk import build_return_matrix, risk_metrics
+from modules.simulation import simulate_pnl_chunk
+from modules.backtest import LedgerStrategy, MarketData, init_worker, run_backtest, run_worker_backtest
+from modules.data_loader import (
+    standardize_transactions_data,
+    standardize_transaction_type,
+    get_price_history,
+    register_ingest_listener,
+)
+from modules.utils import get_period_start
+
+def _signed_transactions(transactions_data):
     """
-    Calcule la performance comparative entre le portefeuille et un indice de référence
+    Retourne le journal des transactions en quantités et montants signés
+
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        tuple: (symboles distincts, position du symbole de chaque transaction,
+            dates, quantités signées, montants signés), ou None sans transaction datée
+    """
+    transactions_renamed = standardize_transactions_data(transactions_data)
+    transactions_renamed = transactions_renamed[transactions_renamed['purchase_date'].notna()]
+    if transactions_renamed.empty:
+        return None
+    
+    # Quantités signées : les ventes diminuent la position et le coût investi
+    if 'Type' in transactions_renamed.columns:
+        signs = np.where(transactions_renamed['Type'].map(standardize_transaction_type) == 'SELL', -1.0, 1.0)
+    else:
+        signs = np.ones(len(transactions_renamed))
+    quantities = signs * pd.to_numeric(transactions_renamed['quantity'], errors='coerce').fillna(0).to_numpy()
+    cash_flows = quantities * pd.to_numeric(transactions_renamed['purchase_price'], errors='coerce').fillna(0).to_numpy()
+    
+    symbols, symbol_index = np.unique(transactions_renamed['symbol'].astype(str).to_numpy(), return_inverse=True)
+    trade_dates = pd.to_datetime(transactions_renamed['purchase_date']).to_numpy(dtype='datetime64[ns]')
+    return symbols, symbol_index, trade_dates, quantities, cash_flows
+
+@memoize
+@persistent
+def calculate_daily_portfolio_values(historical_data, transactions_data, dates=None):
+    """
+    Calcule en une passe la valeur, le coût de revient et le rendement quotidiens du portefeuille
+    
+    Les quantités détenues par (date, symbole) sont obtenues par somme cumulée du
+    journal des transactions, puis multipliées par la matrice des derniers prix
+    connus (équivalent d'un remplissage vers l'avant), sans boucle par date.
     
     Args:
         historical_data (pd.DataFrame): Données historiques des prix
         transactions_data (pd.DataFrame): Données des transactions
-        benchmark_symbol (str): Symbole de l'indice de référence
-        period (str): Période d'analyse ('1Y', '6M', 'MTD', 'YTD', 'Last 60 Days')
+        dates (array-like, optional): Dates d'évaluation. Si non spécifié,
+            utilise toutes les dates disponibles dans les données historiques.
     
     Returns:
-        pd.DataFrame: DataFrame contenant les performances jour par jour
+        pd.DataFrame: DataFrame contenant les colonnes
+            [date, portfolio_value, cost_basis, cumulative_return]
     """
-    # Standardiser les noms de colonnes
-    historical_data_renamed = standardize_historical_data(historical_data)
-    transactions_renamed = standardize_transactions_data(transactions_data)
+    price_history = get_price_history(historical_data)
+    dates = pd.DatetimeIndex(price_history.calendar if dates is None else pd.to_datetime(dates))
     
-    # Date actuelle (dernière date disponible dans les données)
-    current_date = historical_data_renamed['date'].max()
+    empty = pd.DataFrame({
+        'date': dates,
+        'portfolio_value': 0.0,
+        'cost_basis': 0.0,
+        'cumulative_return': np.nan,
+    })
     
-    # Déterminer la date de début selon la période
-    if period == '1Y':
-        start_date = current_date - pd.DateOffset(years=1)
-    elif period == '6M':
-        start_date = current_date - pd.DateOffset(months=6)
-    elif period == 'MTD':
-        start_date = current_date.replace(day=1)
-    elif period == 'YTD':
-        start_date = current_date.replace(month=1, day=1)
-    elif period == 'Last 60 Days':
-        start_date = current_date - pd.DateOffset(days=60)
-    else:
-        start_date = current_date - pd.DateOffset(years=1)  # Par défaut 1 an
+    journal = _signed_transactions(transactions_data)
+    if journal is None or len(dates) == 0:
+        return empty
+    symbols, symbol_index, trade_dates, quantities, cash_flows = journal
     
-    # Filtrer les données pour la période
-    period_data = historical_data_renamed[(historical_data_renamed['date'] >= start_date) & 
-                                        (historical_data_renamed['date'] <= current_date)]
+    # Première date d'évaluation à laquelle chaque transaction est prise en compte
+    date_positions = np.searchsorted(dates.to_numpy(dtype='datetime64[ns]'), trade_dates, side='left')
     
-    # Filtrer les données de l'indice de référence
-    benchmark_data = period_data[period_data['symbol'] == benchmark_symbol]
+    n_dates, n_symbols = len(dates), len(symbols)
+    flat_index = date_positions * n_symbols + symbol_index
+    quantity_changes = np.bincount(flat_index, weights=quantities, minlength=(n_dates + 1) * n_symbols)
+    holdings = quantity_changes.reshape(n_dates + 1, n_symbols)[:n_dates].cumsum(axis=0)
+    cost_basis = np.bincount(date_positions, weights=cash_flows, minlength=n_dates + 1)[:n_dates].cumsum()
     
-    if benchmark_data.empty:
-        return pd.DataFrame()  # Retourner un DataFrame vide si pas de données d'indice
+    # Matrice (dates × symboles) des derniers prix connus
+    prices = price_history.as_of_many(dates).reindex(columns=symbols).to_numpy()
+    portfolio_values = np.nansum(holdings * prices, axis=1)
     
-    # Préparer les données pour le calcul du rendement du portefeuille
-    unique_dates = sorted(period_data['date'].unique())
-    dates_with_values = []
-    portfolio_returns = []
-    benchmark_returns = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cumulative_returns = np.where(cost_basis > 0, (portfolio_values / cost_basis - 1) * 100, np.nan)
     
-    # Recalculer la valeur du portefeuille pour chaque date
-    for date in unique_dates:
-        # Filtrer les transactions jusqu'à cette date
-        transactions_at_date = transactions_renamed[transactions_renamed['purchase_date'] <= date]
+    return pd.DataFrame({
+        'date': dates,
+        'portfolio_value': portfolio_values,
+        'cost_basis': cost_basis,
+        'cumulative_return': cumulative_returns,
+    })
+
+# Valeur liquidative initiale des séries en rendement total
+NAV_BASE = 100.0
+
+def _daily_returns(values, previous_values, flows):
+    """
+    Rendement de chaque jour, net des apports et retraits du jour
+
+    Les transactions du jour sont supposées réglées en fin de journée : le rendement
+    est (V - F) / V_veille - 1, ou V / F - 1 le jour du premier investissement.
+    """
+    values, previous_values, flows = (np.asarray(v, dtype='float64') for v in (values, previous_values, flows))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(
+            previous_values > 0,
+            (values - flows) / previous_values - 1,
+            np.where(flows > 0, values / flows - 1, 0.0),
+        )
+
+class TotalReturnNav:
+    """
+    Valeur liquidative quotidienne du portefeuille en rendement total
+
+    Le portefeuille est ramené à une part de valeur initiale NAV_BASE : les apports
+    et retraits (transactions) ne modifient pas la valeur de la part, seul le
+    rendement des positions la fait varier (rendement pondéré par le temps). Les
+    dividendes sont réinvestis dans le titre qui les verse, au cours de clôture de
+    la date de détachement. Une position sans cours connu est évaluée au prix de sa
+    dernière transaction.
+
+    L'état courant (positions, derniers prix, valeur) est conservé : append() ajoute
+    une journée en O(positions), sans recalculer la série.
+
+    Args:
+        symbols (array-like): Symboles des positions
+        trade_codes (np.ndarray, optional): Position du symbole de chaque transaction
+        trade_dates (np.ndarray, optional): Dates des transactions
+        quantities (np.ndarray, optional): Quantités signées des transactions
+        cash_flows (np.ndarray, optional): Montants signés des transactions
+    """
+
+    def __init__(self, symbols, trade_codes=None, trade_dates=None, quantities=None, cash_flows=None):
+        self.symbols = pd.Index(symbols, dtype=object)
+        n_symbols = len(self.symbols)
+        
+        # Journal des transactions trié par date (transactions des journées ajoutées)
+        trade_dates = np.array([] if trade_dates is None else trade_dates, dtype='datetime64[ns]')
+        order = np.argsort(trade_dates, kind='stable')
+        self._trade_dates = trade_dates[order]
+        self._trade_codes = np.array([] if trade_codes is None else trade_codes, dtype='int64')[order]
+        self._quantities = np.array([] if quantities is None else quantities, dtype='float64')[order]
+        self._cash_flows = np.array([] if cash_flows is None else cash_flows, dtype='float64')[order]
+        
+        self.holdings = np.zeros(n_symbols)
+        self.last_prices = np.full(n_symbols, np.nan)
+        self.value = 0.0
+        self.nav = NAV_BASE
+        self.last_date = None
+        self._rows = {'date': [], 'portfolio_value': [], 'cash_flow': [], 'dividend_income': [], 'nav': []}
+    
+    def __len__(self):
+        return len(self._rows['date'])
+    
+    def copy(self):
+        """Retourne une copie indépendante de la série (journal des transactions partagé)"""
+        result = TotalReturnNav.__new__(TotalReturnNav)
+        result.__dict__.update(self.__dict__)
+        result.holdings = self.holdings.copy()
+        result.last_prices = self.last_prices.copy()
+        result._rows = {column: list(values) for column, values in self._rows.items()}
+        return result
+    
+    def append(self, date, prices, dividends=None, quantities=None, cash_flows=None):
+        """
+        Ajoute une journée à la série
+
+        Args:
+            date (datetime): Date de la journée (postérieure à last_date)
+            prices (np.ndarray): Cours de clôture de chaque symbole (NaN: dernier cours connu)
+            dividends (np.ndarray, optional): Dividende par titre détaché ce jour
+            quantities (np.ndarray, optional): Quantités signées échangées ce jour, par symbole
+            cash_flows (np.ndarray, optional): Montants signés échangés ce jour, par symbole
+        """
+        if quantities is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                prices = np.where(np.isnan(prices), cash_flows / quantities, prices)
+        prices = np.where(np.isnan(prices), self.last_prices, prices)
+        
+        income = 0.0
+        if dividends is not None:
+            # Dividendes des positions de la veille, réinvestis au cours du jour
+            income = float(np.nansum(self.holdings * dividends))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.holdings = self.holdings * np.where(prices > 0, 1 + dividends / prices, 1.0)
+        
+        flow = 0.0
+        if quantities is not None:
+            self.holdings = self.holdings + quantities
+            flow = float(np.sum(cash_flows))
         
-        if not transactions_at_date.empty:
-            # Calculer la valeur initiale du portefeuille
-            portfolio_value_initial = transactions_at_date['quantity'].sum() * transactions_at_date['purchase_price'].mean()
+        value = float(np.nansum(self.holdings * prices))
+        self.nav *= 1 + float(_daily_returns(value, self.value, flow))
+        self.value = value
+        self.last_prices = prices
+        self.last_date = pd.Timestamp(date)
+        
+        for column, item in zip(self._rows, (self.last_date, value, flow, income, self.nav)):
+            self._rows[column].append(item)
+    
+    def extend(self, price_history, dates):
+        """
+        Ajoute des journées à partir d'un index des prix
+
+        Les transactions et dividendes compris entre deux journées sont imputés à la
+        seconde. Le coût est proportionnel au nombre de journées et de positions.
+
+        Args:
+            price_history (PriceHistory): Index des prix (ajustés des divisions)
+            dates (array-like): Nouvelles dates, postérieures à last_date
+        """
+        dates = pd.DatetimeIndex(dates).sort_values()
+        if len(dates) == 0:
+            return
+        prices = price_history.as_of_many(dates).reindex(columns=self.symbols).to_numpy(dtype='float64')
+        codes, ex_dates, amounts = dividend_events(get_corporate_actions(), self.symbols)
+        
+        previous = np.datetime64(self.last_date) if self.last_date is not None else np.datetime64('NaT')
+        for i, date in enumerate(dates.to_numpy(dtype='datetime64[ns]')):
+            # Événements de l'intervalle ]journée précédente, journée]
+            if np.isnat(previous):
+                first_trade, first_dividend = 0, ex_dates <= date
+            else:
+                first_trade = np.searchsorted(self._trade_dates, previous, side='right')
+                first_dividend = (ex_dates > previous) & (ex_dates <= date)
+            last_trade = np.searchsorted(self._trade_dates, date, side='right')
             
-            # Obtenir les prix actuels
-            current_prices = period_data[(period_data['date'] == date)]
+            dividends = None
+            if first_dividend.any():
+                dividends = np.bincount(codes[first_dividend], weights=amounts[first_dividend], minlength=len(self.symbols))
             
-            # Fusionner avec les transactions
-            portfolio_df = pd.merge(
-                transactions_at_date,
-                current_prices[['symbol', 'close', 'date']],
-                on='symbol',
-                how='inner'
-            )
+            quantities = cash_flows = None
+            if last_trade > first_trade:
+                trades = slice(first_trade, last_trade)
+                codes_traded = self._trade_codes[trades]
+                quantities = np.bincount(codes_traded, weights=self._quantities[trades], minlength=len(self.symbols))
+                cash_flows = np.bincount(codes_traded, weights=self._cash_flows[trades], minlength=len(self.symbols))
             
-            # Calculer la valeur actuelle
-            if not portfolio_df.empty:
-                portfolio_value_current = (portfolio_df['quantity'] * portfolio_df['close']).sum()
-                
-                # Calculer le rendement du portefeuille
-                portfolio_return = ((portfolio_value_current / portfolio_value_initial) - 1) * 100
-                
-                # Obtenir le rendement de l'indice
-                benchmark_value = benchmark_data[benchmark_data['date'] == date]['close'].values
-                if len(benchmark_value) > 0:
-                    benchmark_initial = benchmark_data['close'].iloc[0]
-                    benchmark_return = ((benchmark_value[0] / benchmark_initial) - 1) * 100
-                    
-                    # Enregistrer les rendements
-                    dates_with_values.append(date)
-                    portfolio_returns.append(portfolio_return)
-                    benchmark_returns.append(benchmark_return)
-    
-    # Créer le DataFrame final
-    if len(dates_with_values) > 0:
-        performance_df = pd.DataFrame({
-            'date': dates_with_values,
-            'cumulative_portfolio_return': portfolio_returns,
-            'cumulative_benchmark_return': benchmark_returns
-        })
-        
-        return performance_df
-    else:
+            self.append(date, prices[i], dividends, quantities, cash_flows)
+            previous = date
+    
+    def frame(self):
+        """
+        Retourne la série quotidienne
+
+        Returns:
+            pd.DataFrame: Colonnes [date, portfolio_value, cash_flow, dividend_income,
+                nav, total_return] (total_return en pourcentage depuis l'origine)
+        """
+        result = pd.DataFrame(self._rows)
+        result['date'] = pd.to_datetime(result['date'])
+        result['total_return'] = (result['nav'] / NAV_BASE - 1) * 100
+        return result
+
+def build_total_return_nav(historical_data, transactions_data):
+    """
+    Calcule la valeur liquidative en rendement total sur tout le calendrier des prix
+
+    Le calcul initial est vectorisé : les positions suivent la récurrence
+    H_t = H_(t-1) × g_t + q_t (g_t : croissance due au dividende réinvesti,
+    q_t : quantités échangées), résolue par H_t = G_t × Σ q_s / G_s avec
+    G_t = Π g_s. Les journées suivantes sont ajoutées par TotalReturnNav.append.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        TotalReturnNav: Série et état courant du portefeuille
+    """
+    price_history = get_price_history(historical_data)
+    journal = _signed_transactions(transactions_data)
+    if journal is None:
+        return TotalReturnNav([])
+    symbols, symbol_index, trade_dates, quantities, cash_flows = journal
+    nav = TotalReturnNav(symbols, symbol_index, trade_dates, quantities, cash_flows)
+    
+    calendar = price_history.calendar
+    n_dates, n_symbols = len(calendar), len(symbols)
+    if n_dates == 0:
+        return nav
+    
+    date_positions = np.searchsorted(calendar, trade_dates, side='left')
+    flat_index = date_positions * n_symbols + symbol_index
+    quantity_changes = np.bincount(
+        flat_index, weights=quantities, minlength=(n_dates + 1) * n_symbols
+    )[:n_dates * n_symbols].reshape(n_dates, n_symbols)
+    flow_changes = np.bincount(
+        flat_index, weights=cash_flows, minlength=(n_dates + 1) * n_symbols
+    )[:n_dates * n_symbols].reshape(n_dates, n_symbols)
+    flows = flow_changes.sum(axis=1)
+    
+    # Dividendes par titre imputés à la première journée de cotation suivant le détachement
+    codes, ex_dates, amounts = dividend_events(get_corporate_actions(), symbols)
+    ex_positions = np.searchsorted(calendar, ex_dates, side='left')
+    kept = ex_positions < n_dates
+    dividends = np.bincount(
+        ex_positions[kept] * n_symbols + codes[kept], weights=amounts[kept], minlength=n_dates * n_symbols
+    ).reshape(n_dates, n_symbols)
+    
+    # Derniers cours connus, à défaut prix de la dernière transaction
+    prices = price_history.as_of_many(calendar).reindex(columns=symbols).to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trade_prices = pd.DataFrame(flow_changes / quantity_changes).ffill().to_numpy()
+    prices = np.where(np.isnan(prices), trade_prices, prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.cumprod(np.where(prices > 0, 1 + dividends / prices, 1.0), axis=0)
+    holdings = growth * np.cumsum(quantity_changes / growth, axis=0)
+    previous_holdings = np.vstack([np.zeros((1, n_symbols)), holdings[:-1]])
+    
+    values = np.nansum(holdings * prices, axis=1)
+    previous_values = np.concatenate([[0.0], values[:-1]])
+    navs = NAV_BASE * np.cumprod(1 + _daily_returns(values, previous_values, flows))
+    
+    nav._rows = {
+        'date': list(pd.DatetimeIndex(calendar)),
+        'portfolio_value': values.tolist(),
+        'cash_flow': flows.tolist(),
+        'dividend_income': np.nansum(previous_holdings * dividends, axis=1).tolist(),
+        'nav': navs.tolist(),
+    }
+    nav.holdings = holdings[-1]
+    nav.last_prices = prices[-1]
+    nav.value = float(values[-1])
+    nav.nav = float(navs[-1])
+    nav.last_date = pd.Timestamp(calendar[-1])
+    return nav
+
+# Valeurs liquidatives par (empreinte des prix, empreinte des transactions), LRU
+_TOTAL_RETURN_NAVS = OrderedDict()
+_TOTAL_RETURN_NAVS_LOCK = threading.Lock()
+TOTAL_RETURN_NAVS_MAX_ENTRIES = 8
+
+def get_total_return_nav(historical_data, transactions_data):
+    """
+    Retourne la valeur liquidative en rendement total, calculée une seule fois par jeu de données
+
+    Après un ajout de barres (ingest_prices), la série du jeu de données précédent
+    est prolongée des nouvelles journées au lieu d'être recalculée.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        TotalReturnNav: Série (à ne pas modifier)
+    """
+    key = (frame_fingerprint(historical_data), frame_fingerprint(transactions_data))
+    with _TOTAL_RETURN_NAVS_LOCK:
+        nav = _TOTAL_RETURN_NAVS.get(key)
+        if nav is not None:
+            _TOTAL_RETURN_NAVS.move_to_end(key)
+            return nav
+    
+    nav = build_total_return_nav(historical_data, transactions_data)
+    with _TOTAL_RETURN_NAVS_LOCK:
+        _TOTAL_RETURN_NAVS[key] = nav
+        while len(_TOTAL_RETURN_NAVS) > TOTAL_RETURN_NAVS_MAX_ENTRIES:
+            _TOTAL_RETURN_NAVS.popitem(last=False)
+    return nav
+
+def _on_prices_ingested(old_data, new_data, new_bars):
+    """
+    Prolonge les valeurs liquidatives du jeu de données précédent des journées ajoutées
+
+    Les séries du jeu précédent restent inchangées (lecteurs en cours) : une copie
+    prolongée est enregistrée sous la clé du nouveau jeu de données.
+    """
+    old_key, new_key = frame_fingerprint(old_data), frame_fingerprint(new_data)
+    first_date = new_bars['date'].min()
+    with _TOTAL_RETURN_NAVS_LOCK:
+        navs = [(key, nav) for key, nav in _TOTAL_RETURN_NAVS.items() if key[0] == old_key]
+    
+    for key, nav in navs:
+        if nav.last_date is None or first_date <= nav.last_date:
+            # Barres corrigées ou antérieures : recalcul complet à la demande
+            continue
+        price_history = get_price_history(new_data)
+        nav = nav.copy()
+        nav.extend(price_history, price_history.calendar[price_history.calendar > np.datetime64(nav.last_date)])
+        with _TOTAL_RETURN_NAVS_LOCK:
+            _TOTAL_RETURN_NAVS[(new_key, key[1])] = nav
+            while len(_TOTAL_RETURN_NAVS) > TOTAL_RETURN_NAVS_MAX_ENTRIES:
+                _TOTAL_RETURN_NAVS.popitem(last=False)
+
+register_ingest_listener(_on_prices_ingested)
+
+def has_benchmark_data(historical_data, benchmark_symbol=None):
+    """
+    Indique si l'historique des prix contient les cours de l'indice de référence
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        benchmark_symbol (str, optional): Indice de référence. Par défaut
+            config.INDICES['MASI'].
+
+    Returns:
+        bool: True si l'indice a au moins une cotation
+    """
+    benchmark_symbol = benchmark_symbol or config.INDICES['MASI']
+    return benchmark_symbol in set(get_price_history(historical_data).symbols)
+
+def _performance_frame(historical_data, transactions_data, dates, total_return):
+    """
+    Calcule le rendement cumulé du portefeuille à des dates de cotation
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        dates (pd.DatetimeIndex): Dates de la période, croissantes
+        total_return (bool): Rendement total pondéré par le temps (voir
+            TotalReturnNav) plutôt que rendement des cours rapporté au coût investi
+
+    Returns:
+        pd.DataFrame: Colonnes [date, cumulative_portfolio_return, portfolio_value,
+            cost_basis], restreintes aux dates où le portefeuille est investi
+    """
+    # Valeur du portefeuille à chaque date, en une passe
+    daily_values = calculate_daily_portfolio_values(historical_data, transactions_data, dates)
+    
+    # Ne conserver que les dates où le portefeuille est investi
+    performance_df = daily_values[daily_values['cost_basis'] > 0]
+    performance_df = performance_df.rename(columns={'cumulative_return': 'cumulative_portfolio_return'})
+    
+    if total_return and not performance_df.empty:
+        # Rendement de la part depuis le début de la période (valeur des positions
+        # dividendes réinvestis)
+        nav = get_total_return_nav(historical_data, transactions_data).frame().set_index('date')
+        nav = nav.reindex(pd.DatetimeIndex(performance_df['date']), method='ffill')
+        performance_df = performance_df.assign(
+            cumulative_portfolio_return=(nav['nav'].to_numpy() / nav['nav'].iloc[0] - 1) * 100,
+            portfolio_value=nav['portfolio_value'].to_numpy(),
+        )
+    return performance_df
+
+@memoize
+def calculate_comparative_performance(historical_data, transactions_data, benchmark_symbol=None, period='1Y', return_mode='price'):
+    """
+    Calcule la performance comparative entre le portefeuille et un indice de référence
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        benchmark_symbol (str, optional): Symbole de l'indice de référence. Par défaut
+            config.INDICES['MASI'].
+        period (str): Période d'analyse ('1Y', '6M', 'MTD', 'YTD', 'Last 60 Days')
+        return_mode (str, optional): 'price' : rendement des cours rapporté au coût
+            investi ; 'total' : rendement total pondéré par le temps (dividendes
+            réinvestis, voir TotalReturnNav), l'indice étant lui aussi ajusté des
+            dividendes. Par défaut 'price'.
+    
+    Returns:
+        pd.DataFrame: DataFrame contenant les performances jour par jour (vide si
+            l'indice n'a pas de cotation sur la période, voir has_benchmark_data)
+    """
+    benchmark_symbol = benchmark_symbol or config.INDICES['MASI']
+    total_return = return_mode == 'total'
+    price_history = get_price_history(historical_data, 'total' if total_return else 'split')
+    
+    # Date actuelle (dernière date disponible dans les données)
+    current_date = price_history.last_date
+    
+    # Déterminer la date de début selon la période
+    start_date = get_period_start(period, current_date)
+    
+    # Filtrer les données de l'indice de référence pour la période
+    benchmark_data = price_history.series(benchmark_symbol)
+    benchmark_data = benchmark_data[(benchmark_data.index >= start_date) & (benchmark_data.index <= current_date)]
+    
+    if benchmark_data.empty:
+        return pd.DataFrame()  # Retourner un DataFrame vide si pas de données d'indice
+    
+    performance_df = _performance_frame(historical_data, transactions_data, benchmark_data.index, total_return)
+    if performance_df.empty:
         return pd.DataFrame()
+    
+    # Rendement de l'indice depuis le début de la période, aux dates investies
+    with np.errstate(divide='ignore', invalid='ignore'):
+        benchmark_return = ((benchmark_data / benchmark_data.iloc[0]) - 1) * 100
+    performance_df = performance_df.assign(
+        cumulative_benchmark_return=benchmark_return.reindex(pd.DatetimeIndex(performance_df['date'])).to_numpy()
+    )
+    
+    return performance_df[[
+        'date',
+        'cumulative_portfolio_return',
+        'cumulative_benchmark_return',
+        'portfolio_value',
+        'cost_basis',
+    ]].reset_index(drop=True)
 
+@memoize
+def calculate_portfolio_performance(historical_data, transactions_data, period='1Y', return_mode='price'):
+    """
+    Calcule la performance du portefeuille seul, à chaque date de cotation de la période
+
+    Utilisée à la place de calculate_comparative_performance lorsque l'indice de
+    référence n'est pas coté dans l'historique (voir has_benchmark_data).
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        period (str): Période d'analyse (voir get_period_start)
+        return_mode (str, optional): 'price' ou 'total' (voir
+            calculate_comparative_performance). Par défaut 'price'.
+
+    Returns:
+        pd.DataFrame: Colonnes [date, cumulative_portfolio_return, portfolio_value,
+            cost_basis] (vide si le portefeuille n'est pas investi sur la période)
+    """
+    total_return = return_mode == 'total'
+    price_history = get_price_history(historical_data, 'total' if total_return else 'split')
+    current_date = price_history.last_date
+    start_date = get_period_start(period, current_date)
+    
+    calendar = pd.DatetimeIndex(price_history.calendar)
+    dates = calendar[(calendar >= start_date) & (calendar <= current_date)]
+    performance_df = _performance_frame(historical_data, transactions_data, dates, total_return)
+    
+    return performance_df[[
+        'date',
+        'cumulative_portfolio_return',
+        'portfolio_value',
+        'cost_basis',
+    ]].reset_index(drop=True)
+
+@memoize
+@persistent
 def calculate_missed_profit(historical_data, transactions_data):
     """
     Calcule les profits manqués en raison de ventes prématurées
@@ -118,18 +563,16 @@ def calculate_missed_profit(historical_data, transactions_data):
         pd.DataFrame: DataFrame contenant les profits manqués par action
     """
     # Standardiser les noms de colonnes
-    historical_data_renamed = standardize_historical_data(historical_data)
     transactions_renamed = standardize_transactions_data(transactions_data)
     
-    # Date actuelle (dernière date disponible dans les données)
-    current_date = historical_data_renamed['date'].max()
-    
-    # Récupérer les prix actuels
-    latest_prices = historical_data_renamed.sort_values('date').groupby('symbol').last().reset_index()
+    # Derniers prix connus de chaque symbole à la date la plus récente (recherche
+    # dichotomique dans l'index des prix, sans tri de l'historique)
+    price_history = get_price_history(historical_data)
+    latest_prices = price_history.as_of(price_history.last_date)
     
     # Identifier les actions vendues (si le type de transaction est disponible)
     if 'Type' in transactions_renamed.columns:
-        sold_stocks = transactions_renamed[transactions_renamed['Type'] == 'vente']
+        sold_stocks = transactions_renamed[transactions_renamed['Type'].map(standardize_transaction_type) == 'SELL']
     else:
         # Si le type n'est pas disponible, on suppose qu'il n'y a pas de ventes
         # On crée un DataFrame vide avec les bonnes colonnes
@@ -169,4 +612,370 @@ def calculate_missed_profit(historical_data, transactions_data):
         'close': 'current_price'
     })
     
-    return missed_profits
\ No newline at end of file
+    return missed_profits
+
+# Méthodes de calcul de la valeur en risque
+VAR_METHODS = ('historical', 'parametric', 'monte_carlo')
+
+def portfolio_exposures(historical_data, transactions_data):
+    """
+    Retourne la valeur actuelle de chaque position ouverte
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        tuple: (symboles, valeurs des positions)
+    """
+    details = calculate_portfolio_metrics(transactions_data, historical_data)['portfolio_details']
+    details = details[details['current_value'] > 0]
+    return details['symbol'].astype(str).to_numpy(), details['current_value'].to_numpy(dtype='float64')
+
+def value_at_risk(pnl, confidence):
+    """
+    Calcule la valeur en risque et la perte moyenne au-delà (expected shortfall)
+
+    Args:
+        pnl (np.ndarray): Profits et pertes simulés ou historiques
+        confidence (float): Niveau de confiance (ex: 0.95)
+
+    Returns:
+        tuple: (valeur en risque, expected shortfall), en pertes positives
+    """
+    if len(pnl) == 0:
+        return np.nan, np.nan
+    threshold = np.quantile(pnl, 1 - confidence)
+    return float(-threshold), float(-pnl[pnl <= threshold].mean())
+
+def covariance_factor(covariance):
+    """
+    Factorise une matrice de covariance (F @ F.T = covariance)
+
+    La décomposition en valeurs propres tolère les matrices semi-définies (paires
+    sans historique commun, symboles redondants) qui font échouer Cholesky.
+
+    Args:
+        covariance (np.ndarray): Matrice de covariance (NaN traités comme 0)
+
+    Returns:
+        np.ndarray: Facteur (symboles × facteurs)
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(np.nan_to_num(covariance))
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+def simulate_portfolio_pnl(factor, values, horizon=1, n_paths=None, seed=None, chunk_paths=None, workers=None):
+    """
+    Simule les profits et pertes du portefeuille par lots de trajectoires
+
+    Chaque lot a sa propre graine, dérivée de `seed` (SeedSequence.spawn) : le
+    résultat ne dépend pas du nombre de processus. La mémoire de travail est bornée
+    par la taille d'un lot ; seuls les profits et pertes (un réel par trajectoire)
+    sont conservés. Les lots sont répartis sur un pool de processus.
+
+    Args:
+        factor (np.ndarray): Facteur de la covariance journalière (voir covariance_factor)
+        values (np.ndarray): Valeur de chaque position
+        horizon (int, optional): Horizon en jours de cotation. Par défaut 1.
+        n_paths (int, optional): Nombre de trajectoires. Par défaut config.MONTE_CARLO_PATHS.
+        seed (int, optional): Graine. Par défaut config.MONTE_CARLO_SEED.
+        chunk_paths (int, optional): Trajectoires par lot. Par défaut
+            config.MONTE_CARLO_CHUNK_PATHS.
+        workers (int, optional): Nombre de processus (1 : dans le processus courant).
+            Par défaut config.MONTE_CARLO_WORKERS.
+
+    Returns:
+        np.ndarray: Profit ou perte de chaque trajectoire
+    """
+    n_paths = n_paths or config.MONTE_CARLO_PATHS
+    seed = config.MONTE_CARLO_SEED if seed is None else seed
+    chunk_paths = chunk_paths or config.MONTE_CARLO_CHUNK_PATHS
+    workers = workers or config.MONTE_CARLO_WORKERS
+
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = ([factor] * len(sizes), [values] * len(sizes), [horizon] * len(sizes), sizes, seeds)
+
+    if workers > 1 and len(sizes) > 1:
+        # 'spawn' : les processus n'héritent ni des threads ni des verrous du serveur
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            chunks = list(pool.map(simulate_pnl_chunk, *arguments))
+    else:
+        chunks = list(map(simulate_pnl_chunk, *arguments))
+    return np.concatenate(chunks) if chunks else np.zeros(0)
+
+@memoize
+def calculate_value_at_risk(historical_data, transactions_data, method=None, confidence=None, horizon=None,
+                            n_paths=None, seed=None):
+    """
+    Calcule la valeur en risque et l'expected shortfall des positions actuelles
+
+    - 'historical' : rendements observés sur config.VAR_LOOKBACK_PERIOD (fenêtres
+      glissantes de `horizon` jours), appliqués aux positions actuelles ;
+    - 'parametric' : loi normale de covariance exponentielle (modules.covariance) ;
+    - 'monte_carlo' : trajectoires corrélées simulées avec la même covariance
+      (voir simulate_portfolio_pnl).
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        method (str, optional): Méthode (voir VAR_METHODS). Par défaut config.VAR_METHOD.
+        confidence (float, optional): Niveau de confiance. Par défaut config.VAR_CONFIDENCE.
+        horizon (int, optional): Horizon en jours de cotation. Par défaut
+            config.VAR_HORIZON_DAYS.
+        n_paths (int, optional): Trajectoires simulées ('monte_carlo')
+        seed (int, optional): Graine de la simulation ('monte_carlo')
+
+    Returns:
+        dict: method, confidence, horizon, portfolio_value, var, expected_shortfall,
+            var_percent, expected_shortfall_percent, scenarios
+    """
+    method = method or config.VAR_METHOD
+    confidence = confidence or config.VAR_CONFIDENCE
+    horizon = horizon or config.VAR_HORIZON_DAYS
+    if method not in VAR_METHODS:
+        raise ValueError(f"Méthode de valeur en risque inconnue: {method}")
+
+    symbols, values = portfolio_exposures(historical_data, transactions_data)
+    portfolio_value = float(values.sum())
+    var = expected_shortfall = np.nan
+    scenarios = 0
+
+    if len(symbols) and method == 'historical':
+        current_date = get_price_history(historical_data).last_date
+        returns = build_return_matrix(historical_data, get_period_start(config.VAR_LOOKBACK_PERIOD, current_date))
+        returns = returns.reindex(columns=symbols).fillna(0.0).to_numpy()
+        # Rendements composés sur chaque fenêtre glissante de `horizon` jours
+        log_growth = np.vstack([np.zeros((1, len(symbols))), np.cumsum(np.log1p(returns), axis=0)])
+        pnl = (np.exp(log_growth[horizon:] - log_growth[:-horizon]) - 1) @ values
+        var, expected_shortfall = value_at_risk(pnl, confidence)
+        scenarios = len(pnl)
+    elif len(symbols):
+        daily_covariance = get_covariance_matrix(historical_data, symbols).to_numpy() / config.TRADING_DAYS_PER_YEAR
+        if method == 'parametric':
+            deviation = np.sqrt(max(float(values @ np.nan_to_num(daily_covariance) @ values), 0.0) * horizon)
+            z = NormalDist().inv_cdf(confidence)
+            var = z * deviation
+            expected_shortfall = deviation * NormalDist().pdf(z) / (1 - confidence)
+        else:
+            pnl = simulate_portfolio_pnl(covariance_factor(daily_covariance), values, horizon, n_paths, seed)
+            var, expected_shortfall = value_at_risk(pnl, confidence)
+            scenarios = len(pnl)
+
+    percent = 100 / portfolio_value if portfolio_value > 0 else np.nan
+    return {
+        'method': method,
+        'confidence': confidence,
+        'horizon': horizon,
+        'portfolio_value': portfolio_value,
+        'var': var,
+        'expected_shortfall': expected_shortfall,
+        'var_percent': var * percent,
+        'expected_shortfall_percent': expected_shortfall * percent,
+        'scenarios': scenarios,
+    }
+
+def build_backtest_market(historical_data, transactions_data=None):
+    """
+    Construit les données de marché d'un backtest sur tout le calendrier des prix
+
+    Les cours sont ajustés des divisions de titres ; les dividendes (voir
+    modules.corporate_actions) sont imputés à la première journée de cotation
+    suivant le détachement. Avec un journal de transactions, ses symboles sont
+    ajoutés et un titre sans cotation est évalué au prix de sa dernière transaction.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame, optional): Données des transactions
+
+    Returns:
+        MarketData: Données de marché
+    """
+    price_history = get_price_history(historical_data)
+    calendar, prices = price_history.close_matrix()
+    symbols = np.asarray(price_history.symbols, dtype=object)
+    journal = None if transactions_data is None else _signed_transactions(transactions_data)
+    if journal is not None:
+        symbols = np.asarray(pd.Index(symbols).union(pd.Index(journal[0].astype(object))), dtype=object)
+    prices = pd.DataFrame(prices, columns=price_history.symbols).ffill().reindex(columns=symbols).to_numpy()
+    n_dates, n_symbols = prices.shape
+
+    if journal is not None and n_dates:
+        # Prix de la dernière transaction, à défaut de cours connu
+        journal_symbols, symbol_index, trade_dates, quantities, cash_flows = journal
+        codes = pd.Index(symbols).get_indexer(journal_symbols)[symbol_index]
+        days = np.searchsorted(calendar, trade_dates, side='left')
+        kept = days < n_dates
+        trade_prices = np.full((n_dates, n_symbols), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trade_prices[days[kept], codes[kept]] = cash_flows[kept] / quantities[kept]
+        prices = np.where(np.isnan(prices), pd.DataFrame(trade_prices).ffill().to_numpy(), prices)
+
+    codes, ex_dates, amounts = dividend_events(get_corporate_actions(), symbols)
+    ex_positions = np.searchsorted(calendar, ex_dates, side='left')
+    kept = ex_positions < n_dates
+    dividends = np.bincount(
+        ex_positions[kept] * n_symbols + codes[kept], weights=amounts[kept], minlength=n_dates * n_symbols
+    ).reshape(n_dates, n_symbols)
+    return MarketData(calendar, symbols, prices, dividends)
+
+def ledger_strategy(transactions_data, market):
+    """
+    Construit la stratégie rejouant un journal de transactions
+
+    Une transaction datée d'un jour sans cotation est exécutée à la journée de
+    cotation suivante ; les transactions postérieures au calendrier sont ignorées.
+
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+        market (MarketData): Données de marché (voir build_backtest_market)
+
+    Returns:
+        LedgerStrategy: Stratégie
+    """
+    journal = _signed_transactions(transactions_data)
+    if journal is None:
+        return LedgerStrategy([], [], [], [])
+    symbols, symbol_index, trade_dates, quantities, cash_flows = journal
+    codes = pd.Index(market.symbols).get_indexer(symbols)[symbol_index]
+    days = np.searchsorted(market.dates, trade_dates, side='left')
+    kept = (days < len(market.dates)) & (codes >= 0) & (quantities != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prices = cash_flows / quantities
+    return LedgerStrategy(codes[kept], days[kept], quantities[kept], prices[kept])
+
+def summarize_backtest(market, result):
+    """
+    Met en forme le résultat d'un backtest : valeur liquidative, transactions et statistiques
+
+    La valeur liquidative est celle d'une part de valeur initiale NAV_BASE : les
+    apports ne la modifient pas (rendement pondéré par le temps, voir TotalReturnNav).
+
+    Args:
+        market (MarketData): Données de marché
+        result (dict): Résultat de modules.backtest.run_backtest
+
+    Returns:
+        dict: nav (DataFrame quotidien), trades (DataFrame) et statistics (dict :
+            total_return, annual_return, volatility, max_drawdown, sharpe_ratio,
+            annual_turnover, trades, buys, sells, traded_value, average_trade,
+            fees, realized_pl, win_rate, dividends, contributions)
+    """
+    values, flows = result['value'], result['flows']
+    previous_values = np.concatenate([[0.0], values[:-1]])
+    returns = _daily_returns(values, previous_values, flows)
+    navs = NAV_BASE * np.cumprod(1 + returns)
+    nav = pd.DataFrame({
+        'date': pd.DatetimeIndex(market.dates),
+        'portfolio_value': values,
+        'cash': result['cash'],
+        'cash_flow': flows,
+        'dividend_income': result['dividends'],
+        'turnover': result['turnover'],
+        'fees': result['fees'],
+        'daily_return': returns,
+        'nav': navs,
+    })
+
+    trades = result['trades']
+    trade_values = trades['quantity'] * trades['price']
+    trade_frame = pd.DataFrame({
+        'date': pd.DatetimeIndex(market.dates[trades['day']]),
+        'symbol': market.symbols[trades['code']],
+        'quantity': trades['quantity'],
+        'price': trades['price'],
+        'value': trade_values,
+        'fee': trades['fee'],
+        'realized_pl': trades['realized'],
+    })
+
+    # Indicateurs sur les journées suivant le premier investissement
+    invested = previous_values > 0
+    metrics = risk_metrics(pd.DataFrame({'strategy': np.where(invested, returns, np.nan)}), min_observations=2)
+    metrics = metrics.loc['strategy']
+    years = invested.sum() / config.TRADING_DAYS_PER_YEAR
+    average_value = values[values > 0].mean() if (values > 0).any() else np.nan
+    traded_value = float(np.abs(trade_values).sum())
+    sells = trades['quantity'] < 0
+    n_trades = len(trade_values)
+
+    statistics = {
+        'total_return': float(navs[-1] / NAV_BASE - 1) if len(navs) else np.nan,
+        'annual_return': float(metrics['annual_return']),
+        'volatility': float(metrics['volatility']),
+        'max_drawdown': float(metrics['max_drawdown']),
+        'sharpe_ratio': float(metrics['sharpe_ratio']),
+        # Rotation annuelle : moitié des montants échangés rapportée à la valeur moyenne
+        'annual_turnover': traded_value / 2 / average_value / years if years > 0 else np.nan,
+        'trades': n_trades,
+        'buys': int(n_trades - sells.sum()),
+        'sells': int(sells.sum()),
+        'traded_value': traded_value,
+        'average_trade': traded_value / n_trades if n_trades else np.nan,
+        'fees': float(trades['fee'].sum()),
+        'realized_pl': float(trades['realized'].sum()),
+        'win_rate': float((trades['realized'][sells] > 0).mean()) if sells.any() else np.nan,
+        'dividends': float(result['dividends'].sum()),
+        'contributions': float(flows.sum()),
+    }
+    return {'nav': nav, 'trades': trade_frame, 'statistics': statistics}
+
+@memoize
+def backtest_transactions(historical_data, transactions_data, commission_rate=None):
+    """
+    Rejoue le journal des transactions sur l'historique des prix
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+        commission_rate (float, optional): Frais en proportion du montant échangé.
+            Par défaut config.BACKTEST_COMMISSION_RATE.
+
+    Returns:
+        dict: nav, trades et statistics (voir summarize_backtest)
+    """
+    commission_rate = config.BACKTEST_COMMISSION_RATE if commission_rate is None else commission_rate
+    market = build_backtest_market(historical_data, transactions_data)
+    result = run_backtest(market, ledger_strategy(transactions_data, market), commission_rate)
+    return summarize_backtest(market, result)
+
+def run_backtest_variants(historical_data, variants, transactions_data=None, commission_rate=None, workers=None):
+    """
+    Simule plusieurs variantes de stratégies sur les mêmes données de marché
+
+    Les variantes sont réparties sur un pool de processus ; les données de marché
+    sont transmises une seule fois à chaque processus. La durée croît linéairement
+    avec le nombre de variantes (voir benchmarks.bench_backtest).
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        variants (dict): Stratégies (modules.backtest.Strategy) par nom. La valeur
+            'ledger' rejoue le journal des transactions.
+        transactions_data (pd.DataFrame, optional): Données des transactions
+        commission_rate (float, optional): Frais en proportion du montant échangé.
+            Par défaut config.BACKTEST_COMMISSION_RATE.
+        workers (int, optional): Nombre de processus (1 : dans le processus courant).
+            Par défaut config.BACKTEST_WORKERS.
+
+    Returns:
+        dict: Résultat de chaque variante (voir summarize_backtest), par nom
+    """
+    commission_rate = config.BACKTEST_COMMISSION_RATE if commission_rate is None else commission_rate
+    workers = workers or config.BACKTEST_WORKERS
+    market = build_backtest_market(historical_data, transactions_data)
+    names = list(variants)
+    strategies = [
+        ledger_strategy(transactions_data, market) if variants[name] == 'ledger' else variants[name]
+        for name in names
+    ]
+
+    if workers > 1 and len(strategies) > 1:
+        # 'spawn' : les processus n'héritent ni des threads ni des verrous du serveur
+        with ProcessPoolExecutor(max_workers=min(workers, len(strategies)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(market,)) as pool:
+            results = list(pool.map(run_worker_backtest, strategies, [commission_rate] * len(strategies)))
+    else:
+        results = [run_backtest(market, strategy, commission_rate) for strategy in strategies]
+    return {name: summarize_backtest(market, result) for name, result in zip(names, results)}
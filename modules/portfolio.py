@@ -3,75 +3,309 @@ Module pour les calculs relatifs au portefeuille
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from modules.data_loader import get_current_prices
 
-def calculate_portfolio_metrics(transactions_data, historical_data, as_of_date=None):
+import config
+from modules.cache import memoize
+from modules.results_cache import persistent
+from modules.data_loader import (
+    get_current_prices, get_price_history, standardize_transactions_data, register_ingest_listener
+)
+from modules.utils import FrameCache, get_period_start
+
+# Méthodes d'appariement des lots disponibles
+LOT_METHODS = ('fifo', 'lifo', 'average')
+
+# Quantité en dessous de laquelle un lot est considéré comme soldé
+LOT_QUANTITY_EPSILON = 1e-9
+
+# Largeur (en logarithme) des blocs de la récurrence du coût moyen : borne les
+# exponentielles calculées sur de longues suites de ventes partielles
+_RECURRENCE_BLOCK = 300.0
+
+def _group_starts(codes):
+    """
+    Marque la première ligne de chaque groupe dans un tableau de codes trié
+    
+    Args:
+        codes (np.ndarray): Codes de groupe triés
+    
+    Returns:
+        np.ndarray: Masque booléen des débuts de groupe
+    """
+    starts = np.ones(len(codes), dtype=bool)
+    starts[1:] = codes[1:] != codes[:-1]
+    return starts
+
+def _segmented_cumsum(values, starts):
+    """
+    Somme cumulée remise à zéro au début de chaque segment
+    
+    Args:
+        values (np.ndarray): Valeurs à cumuler
+        starts (np.ndarray): Masque des débuts de segment (starts[0] doit être vrai)
+    
+    Returns:
+        np.ndarray: Sommes cumulées par segment
+    """
+    # Cumul par segment (et non différence de cumuls globaux, sujette aux annulations)
+    segments = np.cumsum(starts)
+    return pd.Series(values).groupby(segments).cumsum().to_numpy()
+
+def _linear_recurrence(factors, increments):
+    """
+    Résout y[t] = factors[t] * y[t-1] + increments[t] sans boucle Python
+    
+    Les facteurs sont compris entre 0 et 1 ; un facteur nul redémarre la récurrence
+    (y[t] = increments[t]). La solution fermée y[t] = somme des increments[s] pondérés
+    par le produit des facteurs entre s et t est évaluée par blocs dans lesquels ce
+    produit reste représentable ; chaque bloc reprend la valeur finale du bloc
+    précédent, les blocs plus anciens étant atténués d'au moins exp(-_RECURRENCE_BLOCK).
+    
+    Args:
+        factors (np.ndarray): Facteurs multiplicatifs (0 <= facteur <= 1)
+        increments (np.ndarray): Termes additifs
+    
+    Returns:
+        np.ndarray: Valeurs y[t]
+    """
+    n = len(factors)
+    if n == 0:
+        return np.zeros(0)
+    
+    resets = factors == 0
+    resets[0] = True
+    with np.errstate(divide='ignore'):
+        log_factors = np.where(resets, 0.0, np.log(np.where(resets, 1.0, factors)))
+    log_products = _segmented_cumsum(log_factors, resets)
+    
+    # Découper chaque segment en blocs où le produit des facteurs varie d'au plus exp(-bloc)
+    band = np.floor(-log_products / _RECURRENCE_BLOCK)
+    block_starts = resets.copy()
+    block_starts[1:] |= band[1:] != band[:-1]
+    block_start_index = np.maximum.accumulate(np.where(block_starts, np.arange(n), 0))
+    relative = log_products - log_products[block_start_index]
+    local = np.exp(relative) * _segmented_cumsum(increments * np.exp(-relative), block_starts)
+    
+    # Report de la valeur finale du bloc précédent du même segment
+    result = local.copy()
+    carried = ~resets[block_start_index]
+    previous_end = block_start_index[carried] - 1
+    result[carried] += np.exp(log_products[carried] - log_products[previous_end]) * local[previous_end]
+    return result
+
+@memoize
+def match_lots(transactions_data, method='fifo'):
+    """
+    Apparie les ventes aux lots d'achat et calcule les positions par action
+    
+    Le journal est trié une fois par (symbole, date) puis traité par opérations
+    vectorisées, sans itération sur les lignes :
+    - les ventes supérieures à la position détenue sont plafonnées (pas de découvert) ;
+    - FIFO : les ventes consomment le début de l'espace des quantités achetées cumulées ;
+    - LIFO : un lot reste ouvert à hauteur du minimum futur de la position au-dessus
+      de la position qui précédait son achat ;
+    - coût moyen : le coût de la position suit une récurrence linéaire (achat: +coût,
+      vente: × part restante), résolue par _linear_recurrence.
+    
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+        method (str, optional): 'fifo', 'lifo' ou 'average'. Par défaut 'fifo'.
+    
+    Returns:
+        tuple: (open_lots, positions)
+            - open_lots: DataFrame des lots ouverts [symbol, purchase_date, quantity,
+              purchase_price, cost_basis] (un lot groupé par action en coût moyen)
+            - positions: DataFrame par action [symbol, quantity, cost_basis,
+              avg_purchase_price, bought_quantity, sold_quantity, total_bought,
+              proceeds, realized_pl]
+    """
+    if method not in LOT_METHODS:
+        raise ValueError(f"Méthode d'appariement inconnue: {method} (attendu: {', '.join(LOT_METHODS)})")
+    
+    transactions = standardize_transactions_data(transactions_data)
+    valid = (
+        transactions['purchase_date'].notna()
+        & (transactions['quantity'] > 0)
+        & transactions['purchase_price'].notna()
+    )
+    transactions = transactions[valid.to_numpy()]
+    
+    # Tri stable par symbole puis par date (l'ordre du fichier départage une même date)
+    codes, symbols = pd.factorize(transactions['symbol'], sort=True)
+    dates = transactions['purchase_date'].to_numpy()
+    order = np.lexsort((np.arange(len(codes)), dates, codes))
+    codes = codes[order]
+    dates = dates[order]
+    quantities = transactions['quantity'].to_numpy(dtype='float64')[order]
+    prices = transactions['purchase_price'].to_numpy(dtype='float64')[order]
+    is_sell = (transactions['Type'] == 'SELL').to_numpy()[order]
+    n_symbols = len(symbols)
+    
+    # Position après chaque transaction, ventes à découvert plafonnées :
+    # position = cumul signé - min(0, minimum courant du cumul signé)
+    starts = _group_starts(codes)
+    signed = np.where(is_sell, -quantities, quantities)
+    cumulative = _segmented_cumsum(signed, starts)
+    running_min = pd.Series(cumulative).groupby(codes).cummin().to_numpy()
+    position = cumulative - np.minimum(running_min, 0)
+    previous_position = np.where(starts, 0.0, np.roll(position, 1))
+    
+    bought = np.where(is_sell, 0.0, quantities)
+    sold = np.where(is_sell, previous_position - position, 0.0)
+    
+    def per_symbol(values):
+        return np.bincount(codes, weights=values, minlength=n_symbols)
+    
+    total_bought = per_symbol(bought * prices)
+    proceeds = per_symbol(sold * prices)
+    
+    if method == 'average':
+        factors = np.ones(len(codes))
+        partial = is_sell & (previous_position > 0)
+        factors[partial] = position[partial] / previous_position[partial]
+        factors[starts] = 0.0
+        position_cost = _linear_recurrence(factors, bought * prices)
+        
+        ends = np.roll(starts, -1)
+        cost_basis = np.zeros(n_symbols)
+        cost_basis[codes[ends]] = position_cost[ends]
+        quantity = np.zeros(n_symbols)
+        quantity[codes[ends]] = position[ends]
+        
+        # Lot groupé daté du premier achat depuis la dernière position nulle
+        episode = np.cumsum(factors == 0)
+        last_episode = np.zeros(n_symbols, dtype=episode.dtype)
+        last_episode[codes[ends]] = episode[ends]
+        current_buys = ~is_sell & (episode == last_episode[codes])
+        first_buy = pd.Series(dates[current_buys]).groupby(codes[current_buys]).min()
+        
+        held = np.flatnonzero(quantity > LOT_QUANTITY_EPSILON)
+        open_lots = pd.DataFrame({
+            'symbol': symbols[held],
+            'purchase_date': first_buy.reindex(held).to_numpy(),
+            'quantity': quantity[held],
+            'purchase_price': cost_basis[held] / quantity[held],
+            'cost_basis': cost_basis[held],
+        })
+    else:
+        if method == 'fifo':
+            bought_to_date = _segmented_cumsum(bought, starts)
+            sold_total = per_symbol(sold)[codes]
+            open_quantity = np.maximum(0.0, bought_to_date - np.maximum(bought_to_date - bought, sold_total))
+        else:
+            future_min = pd.Series(position[::-1]).groupby(codes[::-1]).cummin().to_numpy()[::-1]
+            open_quantity = np.clip(future_min - previous_position, 0.0, bought)
+        open_quantity = np.where(is_sell, 0.0, open_quantity)
+        
+        quantity = per_symbol(open_quantity)
+        cost_basis = per_symbol(open_quantity * prices)
+        
+        is_open = open_quantity > LOT_QUANTITY_EPSILON
+        open_lots = pd.DataFrame({
+            'symbol': symbols[codes[is_open]],
+            'purchase_date': dates[is_open],
+            'quantity': open_quantity[is_open],
+            'purchase_price': prices[is_open],
+            'cost_basis': open_quantity[is_open] * prices[is_open],
+        })
+    
+    quantity = np.where(quantity > LOT_QUANTITY_EPSILON, quantity, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_purchase_price = np.where(quantity > 0, cost_basis / quantity, 0.0)
+    
+    positions = pd.DataFrame({
+        'symbol': np.asarray(symbols, dtype=object),
+        'quantity': quantity,
+        'cost_basis': cost_basis,
+        'avg_purchase_price': avg_purchase_price,
+        'bought_quantity': per_symbol(bought),
+        'sold_quantity': per_symbol(sold),
+        'total_bought': total_bought,
+        'proceeds': proceeds,
+        'realized_pl': proceeds - (total_bought - cost_basis),
+    })
+    
+    return open_lots, positions
+
+@memoize(as_of='as_of_date')
+def calculate_portfolio_metrics(transactions_data, historical_data, as_of_date=None, method=None):
     """
     Calcule les métriques principales du portefeuille incluant la valeur actuelle,
     le profit/perte total et le pourcentage de rendement.
     
+    Les ventes sont appariées aux lots d'achat (voir match_lots) : la valeur et le
+    coût de revient portent sur les positions ouvertes, le profit/perte total
+    cumule les plus-values latentes et réalisées.
+    
     Args:
         transactions_data (pd.DataFrame): Données des transactions contenant les colonnes
-            [symbol, quantity, total_investment, purchase_date]
+            [symbol, Type, quantity, purchase_price, purchase_date]
         historical_data (pd.DataFrame): Données historiques des prix contenant les colonnes
             [date, symbol, close]
         as_of_date (datetime, optional): Date à laquelle calculer les métriques.
             Si non spécifié, utilise la date la plus récente disponible.
+        method (str, optional): Méthode d'appariement des lots ('fifo', 'lifo',
+            'average'). Par défaut config.LOT_MATCHING_METHOD.
     
     Returns:
         dict: Métriques du portefeuille contenant:
             - total_value: Valeur totale actuelle du portefeuille
-            - total_investment: Montant total investi
-            - total_profit_loss: Profit ou perte total
-            - total_profit_loss_percent: Pourcentage de rendement
+            - total_investment: Coût de revient des positions ouvertes
+            - total_profit_loss: Profit ou perte total (latent + réalisé)
+            - total_profit_loss_percent: Pourcentage de rendement sur le total acheté
+            - total_unrealized_pl: Plus-value latente
+            - total_realized_pl: Plus-value réalisée
             - portfolio_details: DataFrame avec les métriques par action
     """
+    if method is None:
+        method = config.LOT_MATCHING_METHOD
+    
+    transactions_renamed = standardize_transactions_data(transactions_data)
+    
     # Si as_of_date n'est pas spécifié, utiliser la date la plus récente
     if as_of_date is None:
-        # Standardiser les noms de colonnes pour les données historiques
-        from modules.data_loader import standardize_historical_data
-        historical_data_renamed = standardize_historical_data(historical_data)
-        as_of_date = historical_data_renamed['date'].max()
+        as_of_date = get_price_history(historical_data).last_date
+    else:
+        # Ignorer les transactions postérieures à la date demandée
+        executed = (transactions_renamed['purchase_date'] <= pd.Timestamp(as_of_date)).to_numpy()
+        if not executed.all():
+            transactions_renamed = transactions_renamed[executed]
     
     # Récupérer les prix actuels
     current_prices = get_current_prices(historical_data, as_of_date)
     
-    # Standardiser les noms de colonnes pour les transactions
-    from modules.data_loader import standardize_transactions_data
-    transactions_renamed = standardize_transactions_data(transactions_data)
-    
-    # Calculer l'investissement total par action
-    transactions_renamed['total_investment'] = transactions_renamed['quantity'] * transactions_renamed['purchase_price']
-    
-    # Agréger les transactions par symbole
-    portfolio = transactions_renamed.groupby('symbol').agg({
-        'quantity': 'sum',
-        'total_investment': 'sum'
-    }).reset_index()
-    
-    # Calculer le prix d'achat moyen
-    portfolio['avg_purchase_price'] = portfolio['total_investment'] / portfolio['quantity']
+    # Positions ouvertes et plus-values réalisées par action
+    _, positions = match_lots(transactions_renamed, method)
+    portfolio = positions.rename(columns={'cost_basis': 'total_investment'})
     
     # Fusionner avec les prix actuels
     portfolio = pd.merge(portfolio, current_prices, on='symbol', how='left')
     
-    # Calculer la valeur actuelle et le profit/perte
+    # Calculer la valeur actuelle et le profit/perte latent
     portfolio['current_value'] = portfolio['quantity'] * portfolio['close']
     portfolio['profit_loss'] = portfolio['current_value'] - portfolio['total_investment']
-    portfolio['profit_loss_percent'] = (portfolio['profit_loss'] / portfolio['total_investment']) * 100
-    
-    # Calculer la valeur totale du portefeuille
+    with np.errstate(divide='ignore', invalid='ignore'):
+        portfolio['profit_loss_percent'] = np.where(
+            portfolio['total_investment'] > 0,
+            portfolio['profit_loss'] / portfolio['total_investment'] * 100,
+            0.0
+        )
+    
+    # Calculer les totaux du portefeuille
     total_value = portfolio['current_value'].sum()
     total_investment = portfolio['total_investment'].sum()
-    total_profit_loss = portfolio['profit_loss'].sum()
-    total_profit_loss_percent = (total_profit_loss / total_investment) * 100 if total_investment > 0 else 0
+    total_unrealized_pl = portfolio['profit_loss'].sum()
+    total_realized_pl = portfolio['realized_pl'].sum()
+    total_profit_loss = total_unrealized_pl + total_realized_pl
+    total_bought = portfolio['total_bought'].sum()
+    total_profit_loss_percent = (total_profit_loss / total_bought) * 100 if total_bought > 0 else 0
     
     # Calculer le nombre de transactions
-    num_transactions = len(transactions_data)
+    num_transactions = len(transactions_renamed)
     
-    # Calculer le montant moyen par transaction
-    avg_transaction_amount = total_investment / num_transactions if num_transactions > 0 else 0
+    # Calculer le montant moyen par transaction (achats et ventes)
+    traded_amount = total_bought + portfolio['proceeds'].sum()
+    avg_transaction_amount = traded_amount / num_transactions if num_transactions > 0 else 0
     
     # Résultats
     metrics = {
@@ -79,6 +313,8 @@ def calculate_portfolio_metrics(transactions_data, historical_data, as_of_date=N
         'total_investment': total_investment,
         'total_profit_loss': total_profit_loss,
         'total_profit_loss_percent': total_profit_loss_percent,
+        'total_unrealized_pl': total_unrealized_pl,
+        'total_realized_pl': total_realized_pl,
         'num_transactions': num_transactions,
         'avg_transaction_amount': avg_transaction_amount,
         'portfolio_details': portfolio
@@ -86,6 +322,7 @@ def calculate_portfolio_metrics(transactions_data, historical_data, as_of_date=N
     
     return metrics
 
+@memoize
 def calculate_monthly_change(transactions_data, historical_data, months=1):
     """
     Calcule le changement de valeur du portefeuille sur une période de X mois
@@ -99,10 +336,7 @@ def calculate_monthly_change(transactions_data, historical_data, months=1):
         tuple: (changement_valeur, changement_pourcentage)
     """
     # Date actuelle (dernière date disponible dans les données)
-    # Standardiser les noms de colonnes pour les données historiques
-    from modules.data_loader import standardize_historical_data
-    historical_data_renamed = standardize_historical_data(historical_data)
-    current_date = historical_data_renamed['date'].max()
+    current_date = get_price_history(historical_data).last_date
     
     # Date il y a X mois
     past_date = current_date - pd.DateOffset(months=months)
@@ -127,77 +361,87 @@ def calculate_monthly_change(transactions_data, historical_data, months=1):
     
     return value_change, percent_change
 
-def calculate_best_worst_performers(transactions_data, historical_data, period):
+@persistent
+def build_period_returns(historical_data):
     """
-    Identifie les meilleures et pires performances dans le portefeuille
+    Calcule la table des rendements de chaque symbole sur chaque période
+    
+    Les périodes sont celles de config.TIME_PERIODS, ancrées sur la dernière date
+    des données. Toutes les fenêtres sont évaluées en une passe sur l'index des prix.
     
     Args:
-        transactions_data (pd.DataFrame): Données des transactions
         historical_data (pd.DataFrame): Données historiques des prix
-        period (str): Période d'analyse ('1Y', '6M', 'MTD', 'YTD', 'Last 60 Days')
     
     Returns:
-        tuple: (meilleur_performer, pire_performer)
+        pd.DataFrame: Rendements en pourcentage (index: symboles, colonnes: périodes),
+            NaN lorsque la période contient moins de deux cours
     """
-    # Standardiser les noms de colonnes pour les données historiques
-    from modules.data_loader import standardize_historical_data, standardize_transactions_data
-    historical_data_renamed = standardize_historical_data(historical_data)
-    transactions_renamed = standardize_transactions_data(transactions_data)
+    price_history = get_price_history(historical_data)
+    periods = list(config.TIME_PERIODS)
+    current_date = price_history.last_date
     
-    current_date = historical_data_renamed['date'].max()
+    if pd.isna(current_date):
+        return pd.DataFrame(index=pd.Index(price_history.symbols, name='symbol'), columns=periods, dtype='float64')
     
-    # Define start_date based on period
-    today = datetime.now().date()
+    start_dates = [get_period_start(period, current_date) for period in periods]
+    returns = price_history.window_returns(start_dates, current_date)
     
-    if period == '1M':
-        start_date = today - timedelta(days=30)
-    elif period == '3M':
-        start_date = today - timedelta(days=90)
-    elif period == '6M':
-        start_date = today - timedelta(days=180)
-    elif period == '1Y':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=365)  # Default to 1Y
+    return pd.DataFrame(returns.T, index=pd.Index(price_history.symbols, name='symbol'), columns=periods)
+
+# Tables des rendements par période, par DataFrame de prix (libérées avec le DataFrame)
+_PERIOD_RETURNS = FrameCache()
+
+def get_period_returns(historical_data):
+    """
+    Retourne la table des rendements par période, calculée une seule fois par jeu de prix
+    
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
     
-    end_date = today
+    Returns:
+        pd.DataFrame: Table des rendements (voir build_period_returns)
+    """
+    return _PERIOD_RETURNS.get(historical_data, build_period_returns)
+
+def _on_prices_ingested(old_data, new_data, new_bars):
+    """Calcule la table des rendements du jeu de données complété dès l'ajout des barres"""
+    get_period_returns(new_data)
+
+register_ingest_listener(_on_prices_ingested)
+
+def calculate_best_worst_performers(transactions_data, historical_data, period):
+    """
+    Identifie les meilleures et pires performances dans le portefeuille
     
-    # Convert date objects to pandas datetime for comparison
-    start_date = pd.to_datetime(start_date)
-    end_date = pd.to_datetime(end_date)
+    Lit la table des rendements par période (voir get_period_returns) pour les
+    symboles présents dans les transactions.
     
-    # Filter historical data for the period
-    period_data = historical_data_renamed[(historical_data_renamed['date'] >= start_date) &
-                                         (historical_data_renamed['date'] <= end_date)]
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+        historical_data (pd.DataFrame): Données historiques des prix
+        period (str): Période d'analyse (clé de config.TIME_PERIODS)
     
-    # Calculer le rendement pour chaque symbole
+    Returns:
+        tuple: (meilleur_performer, pire_performer)
+    """
+    period_returns = get_period_returns(historical_data)
+    if period not in period_returns.columns:
+        period = '1Y'  # Période par défaut
+    
+    transactions_renamed = standardize_transactions_data(transactions_data)
     symbols = transactions_renamed['symbol'].unique()
-    performance = []
+    performance = period_returns[period].reindex(symbols).dropna()
     
-    for symbol in symbols:
-        symbol_data = period_data[period_data['symbol'] == symbol]
-        
-        if len(symbol_data) >= 2:
-            start_price = symbol_data.iloc[0]['close']
-            end_price = symbol_data.iloc[-1]['close']
-            
-            percent_change = ((end_price - start_price) / start_price) * 100
-            
-            performance.append({
-                'symbol': symbol,
-                'return': percent_change
-            })
-    
-    if not performance:
+    if performance.empty:
         return {'symbol': 'N/A', 'return': 0}, {'symbol': 'N/A', 'return': 0}
     
-    # Trier par rendement
-    performance_df = pd.DataFrame(performance)
-    
-    best_performer = performance_df.loc[performance_df['return'].idxmax()]
-    worst_performer = performance_df.loc[performance_df['return'].idxmin()]
+    best_symbol = performance.idxmax()
+    worst_symbol = performance.idxmin()
     
-    return best_performer.to_dict(), worst_performer.to_dict()
+    return (
+        {'symbol': best_symbol, 'return': float(performance[best_symbol])},
+        {'symbol': worst_symbol, 'return': float(performance[worst_symbol])},
+    )
 
 def calculate_index_performance(historical_data, index_symbol, period='1Y'):
     """
@@ -205,44 +449,75 @@ def calculate_index_performance(historical_data, index_symbol, period='1Y'):
     
     Args:
         historical_data (pd.DataFrame): Données historiques des prix
-        index_symbol (str): Symbole de l'indice (ex: '^NSEI' pour Nifty)
-        period (str): Période d'analyse ('1Y', '6M', 'MTD', 'YTD', 'Last 60 Days')
+        index_symbol (str): Symbole de l'indice (ex: '^MASI')
+        period (str): Période d'analyse (clé de config.TIME_PERIODS)
     
     Returns:
-        float: Performance en pourcentage
+        float: Performance en pourcentage (0 si moins de deux cours sur la période)
     """
-    # Date actuelle (dernière date disponible dans les données)
-    # Standardiser les noms de colonnes pour les données historiques
-    from modules.data_loader import standardize_historical_data
-    historical_data_renamed = standardize_historical_data(historical_data)
-    current_date = historical_data_renamed['date'].max()
-    
-    # Déterminer la date de début selon la période
-    if period == '1Y':
-        start_date = current_date - pd.DateOffset(years=1)
-    elif period == '6M':
-        start_date = current_date - pd.DateOffset(months=6)
-    elif period == 'MTD':
-        start_date = current_date.replace(day=1)
-    elif period == 'YTD':
-        start_date = current_date.replace(month=1, day=1)
-    elif period == 'Last 60 Days':
-        start_date = current_date - pd.DateOffset(days=60)
-    else:
-        start_date = current_date - pd.DateOffset(years=1)  # Par défaut 1 an
-    
-    # Filtrer les données pour l'indice
-    index_data = historical_data[(historical_data['symbol'] == index_symbol) & 
-                                (historical_data['date'] >= start_date) & 
-                                (historical_data['date'] <= current_date)]
+    period_returns = get_period_returns(historical_data)
+    if period not in period_returns.columns:
+        period = '1Y'  # Par défaut 1 an
     
-    if len(index_data) < 2:
+    if index_symbol not in period_returns.index:
         return 0
     
-    # Calculer le rendement
-    start_value = index_data.iloc[0]['close']
-    end_value = index_data.iloc[-1]['close']
+    percent_change = period_returns.at[index_symbol, period]
+    return 0 if pd.isna(percent_change) else float(percent_change)
+
+def get_index_quote(historical_data, index_symbol):
+    """
+    Retourne le dernier cours d'un indice et sa variation depuis la séance précédente
     
-    percent_change = ((end_value - start_value) / start_value) * 100
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        index_symbol (str): Symbole de l'indice (ex: '^MASI')
     
-    return percent_change
\ No newline at end of file
+    Returns:
+        tuple: (dernier cours, variation en pourcentage), (None, None) si l'indice
+            n'est pas coté dans l'historique
+    """
+    closes = get_price_history(historical_data).series(index_symbol)
+    if closes.empty:
+        return None, None
+    
+    change = (closes.iloc[-1] / closes.iloc[-2] - 1) * 100 if len(closes) > 1 else 0.0
+    return float(closes.iloc[-1]), float(change)
+
+def calculate_month_over_month(transactions_data, historical_data, as_of_date=None):
+    """
+    Calcule la variation sur un mois de la valeur et du profit du portefeuille
+    
+    Args:
+        transactions_data (pd.DataFrame): Données des transactions
+        historical_data (pd.DataFrame): Données historiques des prix
+        as_of_date (datetime, optional): Fin de la période. Par défaut la date la
+            plus récente disponible.
+    
+    Returns:
+        dict: Variations sur un mois contenant:
+            - value_change: Variation de la valeur du portefeuille
+            - value_change_percent: Variation en pourcentage de la valeur précédente
+            - profit_change: Variation du profit/perte total
+            - profit_change_percent: Variation en pourcentage du profit précédent
+    """
+    if as_of_date is None:
+        as_of_date = get_price_history(historical_data).last_date
+    as_of_date = pd.Timestamp(as_of_date)
+    
+    current = calculate_portfolio_metrics(transactions_data, historical_data, as_of_date)
+    previous = calculate_portfolio_metrics(transactions_data, historical_data, as_of_date - pd.DateOffset(months=1))
+    
+    def change(key):
+        difference = current[key] - previous[key]
+        percent = difference / abs(previous[key]) * 100 if previous[key] else 0.0
+        return float(difference), float(percent)
+    
+    value_change, value_change_percent = change('total_value')
+    profit_change, profit_change_percent = change('total_profit_loss')
+    return {
+        'value_change': value_change,
+        'value_change_percent': value_change_percent,
+        'profit_change': profit_change,
+        'profit_change_percent': profit_change_percent,
+    }
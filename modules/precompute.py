@@ -0,0 +1,224 @@
+"""
+Précalcul en arrière-plan des vues du tableau de bord
+
+Après le chargement des données, et après chaque ajout de prix, un thread de fond
+calcule les métriques du portefeuille, la performance comparative de chaque période
+de config.TIME_PERIODS et les profits manqués. Les résultats sont conservés dans le
+cache des métriques (modules.cache) : le premier clic sur un bouton de période lit
+un résultat déjà calculé au lieu de lancer le calcul dans le thread du callback.
+"""
+import logging
+import time
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import config
+from modules.data_loader import register_ingest_listener
+
+logger = logging.getLogger(__name__)
+
+def precompute_tasks(historical_data, transactions_data):
+    """
+    Liste les calculs à effectuer pour un jeu de données
+
+    Les arguments reproduisent ceux des callbacks (date de fin du jour, indice de
+    référence configuré) afin que les clés du cache soient identiques.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        list: (nom, fonction sans argument)
+    """
+    from modules.portfolio import calculate_portfolio_metrics, get_period_returns
+    from modules.performance import (
+        calculate_comparative_performance, calculate_missed_profit, calculate_portfolio_performance,
+        has_benchmark_data,
+    )
+    from modules.risk import calculate_risk_metrics
+    from modules.covariance import get_ewm_covariance
+    from modules.optimizer import optimize_portfolio
+
+    benchmark = config.INDICES['MASI']
+
+    # Transactions jusqu'à la date de fin par défaut des sélecteurs de dates
+    end_date = pd.to_datetime(datetime.now().date())
+    filtered_transactions = transactions_data[transactions_data['purchase_date'] <= end_date]
+
+    tasks = [
+        ('rendements par période', lambda: get_period_returns(historical_data)),
+        ('métriques du portefeuille', lambda: calculate_portfolio_metrics(transactions_data, historical_data)),
+        ('métriques à la date de fin',
+         lambda: calculate_portfolio_metrics(filtered_transactions, historical_data, end_date)),
+        ('profits manqués', lambda: calculate_missed_profit(historical_data, transactions_data)),
+        ('profits manqués à la date de fin', lambda: calculate_missed_profit(historical_data, filtered_transactions)),
+        ('indicateurs de risque', lambda: calculate_risk_metrics(historical_data, transactions_data)),
+        ('covariances', lambda: get_ewm_covariance(historical_data)),
+        ('rééquilibrage', lambda: optimize_portfolio(historical_data, transactions_data)),
+    ]
+    # Sans cotations de l'indice, le graphique affiche la performance du portefeuille seul
+    with_benchmark = has_benchmark_data(historical_data, benchmark)
+    for period in config.TIME_PERIODS:
+        if with_benchmark:
+            tasks.append((
+                f"performance comparative {period}",
+                lambda period=period: calculate_comparative_performance(
+                    historical_data, transactions_data, benchmark, period, config.PERFORMANCE_RETURN_MODE
+                ),
+            ))
+        else:
+            tasks.append((
+                f"performance du portefeuille {period}",
+                lambda period=period: calculate_portfolio_performance(
+                    historical_data, transactions_data, period, config.PERFORMANCE_RETURN_MODE
+                ),
+            ))
+    return tasks
+
+class PrecomputeWorker:
+    """
+    Thread de fond exécutant les précalculs du dernier jeu de données soumis
+
+    Les demandes sont regroupées : si un nouveau jeu de données est soumis pendant
+    un précalcul, celui-ci est abandonné au profit du plus récent.
+
+    Attributes:
+        last_run (dict): Bilan du dernier précalcul terminé (tasks, failed, seconds)
+    """
+
+    def __init__(self):
+        self.last_run = None
+        self._pending = None
+        self._dataset = None
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None
+
+    def schedule(self, historical_data, transactions_data):
+        """
+        Demande le précalcul d'un jeu de données (retour immédiat)
+
+        Args:
+            historical_data (pd.DataFrame): Données historiques des prix
+            transactions_data (pd.DataFrame): Données des transactions
+        """
+        with self._condition:
+            self._dataset = self._pending = (historical_data, transactions_data)
+            self._generation += 1
+            self._idle.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='precompute', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def reschedule(self, historical_data):
+        """
+        Relance le précalcul avec de nouveaux prix et les dernières transactions soumises
+
+        Args:
+            historical_data (pd.DataFrame): Nouvelles données historiques des prix
+        """
+        if self._dataset is not None:
+            self.schedule(historical_data, self._dataset[1])
+
+    def warm_now(self, historical_data, transactions_data):
+        """
+        Exécute les précalculs dans le thread appelant (ex: processus maître avant fork)
+
+        Args:
+            historical_data (pd.DataFrame): Données historiques des prix
+            transactions_data (pd.DataFrame): Données des transactions
+        """
+        with self._condition:
+            self._dataset = (historical_data, transactions_data)
+            generation = self._generation
+        self._warm(historical_data, transactions_data, generation)
+
+    def wait(self, timeout=None):
+        """
+        Attend la fin des précalculs en cours
+
+        Args:
+            timeout (float, optional): Durée maximale d'attente en secondes
+
+        Returns:
+            bool: True si aucun précalcul n'est en cours
+        """
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        """Boucle du thread : exécute le dernier jeu de données soumis"""
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._idle.set()
+                    self._condition.wait()
+                historical_data, transactions_data = self._pending
+                self._pending = None
+                generation = self._generation
+            self._warm(historical_data, transactions_data, generation)
+
+    def _warm(self, historical_data, transactions_data, generation):
+        """Exécute les précalculs d'un jeu de données, sauf s'il est remplacé entre-temps"""
+        start = time.perf_counter()
+        tasks = precompute_tasks(historical_data, transactions_data)
+        failed = 0
+
+        for name, task in tasks:
+            if self._generation != generation:
+                logger.info("Précalcul abandonné : nouvelles données disponibles")
+                return
+            try:
+                task()
+            except Exception:
+                failed += 1
+                logger.exception("Précalcul impossible (%s)", name)
+
+        elapsed = time.perf_counter() - start
+        self.last_run = {'tasks': len(tasks), 'failed': failed, 'seconds': elapsed}
+        logger.log(
+            logging.WARNING if failed else logging.INFO,
+            "Précalcul terminé : %d/%d vues en %.2f s", len(tasks) - failed, len(tasks), elapsed,
+        )
+
+# Thread de précalcul partagé par l'application
+precompute_worker = PrecomputeWorker()
+
+def start_precompute(historical_data, transactions_data):
+    """
+    Lance le précalcul des vues d'un jeu de données en arrière-plan
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+    """
+    if historical_data.empty or transactions_data.empty:
+        return
+    precompute_worker.schedule(historical_data, transactions_data)
+
+def run_precompute(historical_data, transactions_data):
+    """
+    Exécute le précalcul des vues d'un jeu de données avant de rendre la main
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame): Données des transactions
+
+    Returns:
+        dict: Bilan du précalcul (voir PrecomputeWorker.last_run), None si non effectué
+    """
+    if historical_data.empty or transactions_data.empty:
+        return None
+    precompute_worker.warm_now(historical_data, transactions_data)
+    return precompute_worker.last_run
+
+def _on_prices_ingested(old_data, new_data, new_bars):
+    """Relance le précalcul sur le jeu de données complété"""
+    precompute_worker.reschedule(new_data)
+
+register_ingest_listener(_on_prices_ingested)
@@ -0,0 +1,747 @@
+"""
+Stockage colonnaire des données historiques de prix
+
+Le CSV source est compilé une seule fois en un fichier binaire par colonne,
+accompagné d'un manifeste JSON, dans config.PROCESSED_DATA_PATH. Les
+chargements suivants projettent ces fichiers en mémoire (np.memmap) sans
+ré-analyser le CSV ni copier les données.
+
+Disposition compacte : symboles en codes int32 (catégories dans le manifeste),
+dates journalières en numéros de jour int32 (jours depuis 1970-01-01), prix en
+float32 lorsque la précision le permet.
+
+Les fichiers publiés dans un manifeste peuvent être projetés en mémoire par des
+DataFrames encore utilisés : ils ne sont jamais tronqués ni réécrits sur place.
+Une réécriture (compactage, élargissement d'une colonne) produit de nouveaux
+fichiers (génération suivante, ex: col_0.3.bin) publiés par le manifeste ; les
+DataFrames déjà chargés conservent les anciens fichiers, et seuls les lecteurs
+qui rechargent le stockage (load_price_store) voient les nouveaux. Un ajout de
+lignes écrit après la fin des fichiers, hors des plages déjà projetées.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Version du format du stockage (à incrémenter si la disposition change)
+STORE_VERSION = 4
+
+# Nom du fichier manifeste dans le dossier du stockage
+MANIFEST_FILE = 'manifest.json'
+
+# Numéro de jour représentant une date manquante (NaT) dans les colonnes de jours
+NAT_DAYS = np.iinfo(np.int32).min
+
+# Durée d'un jour en nanosecondes
+DAY_NS = 86_400 * 10**9
+
+def _file_sha256(path, block_size=1 << 20):
+    """
+    Calcule l'empreinte SHA-256 d'un fichier par blocs
+
+    Args:
+        path (str): Chemin du fichier
+        block_size (int, optional): Taille des blocs lus. Par défaut 1 Mo.
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def source_fingerprint(csv_path):
+    """
+    Calcule l'empreinte complète (mtime, taille, SHA-256) d'un fichier source
+
+    Args:
+        csv_path (str): Chemin du fichier CSV source
+
+    Returns:
+        dict: Empreinte du fichier
+    """
+    stat = os.stat(csv_path)
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _file_sha256(csv_path),
+    }
+
+def get_store_dir(csv_path, processed_dir):
+    """
+    Retourne le dossier du stockage associé à un fichier CSV source
+
+    Args:
+        csv_path (str): Chemin du fichier CSV source
+        processed_dir (str): Dossier des données traitées
+
+    Returns:
+        str: Dossier du stockage (ex: data/processed/historical_data)
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(processed_dir, name)
+
+def read_manifest(store_dir):
+    """
+    Lit le manifeste d'un stockage
+
+    Args:
+        store_dir (str): Dossier du stockage
+
+    Returns:
+        dict: Manifeste, ou None s'il est absent ou illisible
+    """
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != STORE_VERSION:
+        return None
+    return manifest
+
+def write_manifest(store_dir, manifest):
+    """
+    Écrit le manifeste de façon atomique (fichier temporaire puis renommage)
+
+    Args:
+        store_dir (str): Dossier du stockage
+        manifest (dict): Manifeste à écrire
+    """
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+def _column_file_name(position, generation):
+    """Nom du fichier d'une colonne pour une génération de fichiers"""
+    return f"col_{position}.{generation}.bin"
+
+def _new_generation(store_dir):
+    """
+    Retourne une génération de fichiers inutilisée dans le dossier du stockage
+
+    Args:
+        store_dir (str): Dossier du stockage
+
+    Returns:
+        int: Génération supérieure à celles des fichiers existants (les fichiers
+            col_<n>.bin des stockages antérieurs valent la génération 0)
+    """
+    generations = [0]
+    for name in os.listdir(store_dir):
+        parts = name.split('.')
+        if name.startswith('col_') and len(parts) == 3 and parts[1].isdigit():
+            generations.append(int(parts[1]))
+    return max(generations) + 1
+
+def remove_unreferenced_files(store_dir, manifest):
+    """
+    Supprime les fichiers de colonnes que le manifeste ne référence plus
+
+    Un DataFrame qui projette encore un ancien fichier en mémoire le conserve après
+    sa suppression (POSIX). Si le système refuse la suppression d'un fichier ouvert,
+    celui-ci est retiré lors de la publication suivante.
+
+    Args:
+        store_dir (str): Dossier du stockage
+        manifest (dict): Manifeste publié
+    """
+    referenced = {column['file'] for column in manifest['columns']}
+    for name in os.listdir(store_dir):
+        if name.startswith('col_') and name.endswith(('.bin', '.tmp')) and name not in referenced:
+            try:
+                os.remove(os.path.join(store_dir, name))
+            except OSError:
+                pass
+
+def encode_days(values):
+    """
+    Convertit des dates en numéros de jour int32 (jours depuis 1970-01-01)
+
+    Args:
+        values (np.ndarray): Dates datetime64[ns]
+
+    Returns:
+        np.ndarray: Numéros de jour (NAT_DAYS pour NaT), ou None si une date porte
+            une heure et ne peut pas être représentée par son jour
+    """
+    ns = values.astype('datetime64[ns]').view('int64')
+    missing = np.isnat(values)
+    if np.any((ns % DAY_NS != 0) & ~missing):
+        return None
+    days = ns // DAY_NS
+    days[missing] = NAT_DAYS
+    return days.astype(np.int32)
+
+def decode_days(days):
+    """
+    Convertit des numéros de jour int32 en dates datetime64[ns]
+
+    Args:
+        days (np.ndarray): Numéros de jour (NAT_DAYS pour NaT)
+
+    Returns:
+        np.ndarray: Dates datetime64[ns]
+    """
+    ns = days.astype('int64') * DAY_NS
+    ns[days == NAT_DAYS] = np.iinfo(np.int64).min
+    return ns.view('datetime64[ns]')
+
+def _encode_column(series):
+    """
+    Convertit une colonne pandas en tableau NumPy stockable
+
+    Args:
+        series (pd.Series): Colonne à encoder
+
+    Returns:
+        tuple: (tableau, description de la colonne pour le manifeste)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype='datetime64[ns]')
+        days = encode_days(values)
+        if days is not None:
+            return days, {'kind': 'days', 'dtype': days.dtype.str}
+        return values, {'kind': 'values', 'dtype': 'datetime64[ns]'}
+
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy()
+        return values, {'kind': 'values', 'dtype': values.dtype.str}
+
+    # Colonnes texte : codes entiers + catégories dans le manifeste
+    categorical = pd.Categorical(series)
+    codes = categorical.codes.astype('int32')
+    categories = [str(c) for c in categorical.categories]
+    return codes, {'kind': 'category', 'dtype': codes.dtype.str, 'categories': categories}
+
+def build_price_store(historical_data, store_dir, fingerprint):
+    """
+    Écrit un DataFrame de prix dans le stockage colonnaire
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques déjà analysées
+        store_dir (str): Dossier du stockage
+        fingerprint (dict): Empreinte du fichier source
+
+    Returns:
+        dict: Manifeste écrit
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    generation = _new_generation(store_dir)
+
+    columns = []
+    for position, column in enumerate(historical_data.columns):
+        values, description = _encode_column(historical_data[column])
+        file_name = _column_file_name(position, generation)
+        np.ascontiguousarray(values).tofile(os.path.join(store_dir, file_name))
+        description.update({'name': str(column), 'file': file_name})
+        columns.append(description)
+
+    manifest = {
+        'version': STORE_VERSION,
+        'rows': int(len(historical_data)),
+        'source': fingerprint,
+        'columns': columns,
+    }
+    # Le manifeste est écrit en dernier : un stockage incomplet n'est jamais lu
+    write_manifest(store_dir, manifest)
+    remove_unreferenced_files(store_dir, manifest)
+    return manifest
+
+# Décimales des prix stockés en float32 (au centime) : la valeur exacte est
+# retrouvée en arrondissant le float32 élargi (voir widen_prices)
+PRICE_DECIMALS = 2
+
+# Nombre de lignes converties par bloc lors de la promotion d'une colonne
+PROMOTION_BLOCK_ROWS = 1 << 20
+
+def widen_prices(values):
+    """
+    Convertit des prix en float64, en retrouvant la valeur exacte des prix float32
+
+    Args:
+        values (np.ndarray): Prix (float32 du stockage ou autre type numérique)
+
+    Returns:
+        np.ndarray: Prix en float64 (arrondis à PRICE_DECIMALS s'ils étaient en float32)
+    """
+    if values.dtype == np.float32:
+        return np.round(values.astype(np.float64), PRICE_DECIMALS)
+    return np.asarray(values, dtype=np.float64)
+
+def fit_column_values(values, dtype):
+    """
+    Convertit des valeurs au type d'une colonne, ou indique le type élargi nécessaire
+
+    float32 est élargi en float64 si un prix n'est pas retrouvé exactement par
+    widen_prices (plus de PRICE_DECIMALS décimales, ou précision insuffisante) ;
+    int32 est élargi en int64 en cas de dépassement, ou en float64 si les valeurs
+    ne sont pas entières ou sont manquantes.
+
+    Args:
+        values (np.ndarray): Valeurs en float64
+        dtype (np.dtype): Type actuel de la colonne
+
+    Returns:
+        tuple: (valeurs converties, type de la colonne éventuellement élargi)
+    """
+    if dtype == np.float32:
+        narrowed = values.astype(np.float32)
+        with np.errstate(invalid='ignore', over='ignore'):
+            restored = widen_prices(narrowed)
+        if np.any((restored != values) & ~np.isnan(values)):
+            return values, np.dtype(np.float64)
+        return narrowed, dtype
+
+    if dtype.kind in 'iu' and len(values):
+        if np.isnan(values).any() or np.any(values != np.trunc(values)):
+            return values, np.dtype(np.float64)
+        info = np.iinfo(dtype)
+        if values.min() < info.min or values.max() > info.max:
+            if dtype.itemsize < 8:
+                return fit_column_values(values, np.dtype(np.int64))
+            return values, np.dtype(np.float64)
+
+    return values.astype(dtype), dtype
+
+def promote_column_file(path, rows, dtype, new_dtype, convert=None, out_path=None):
+    """
+    Réécrit le fichier d'une colonne dans un type plus large, par blocs
+
+    Args:
+        path (str): Fichier de la colonne
+        rows (int): Nombre de lignes valides du fichier
+        dtype (np.dtype): Type actuel
+        new_dtype (np.dtype): Type élargi
+        convert (callable, optional): Conversion d'un bloc (par défaut astype)
+        out_path (str, optional): Nouveau fichier à écrire, le fichier d'origine
+            restant intact. Par défaut le fichier est remplacé, ce qui n'est permis
+            que pour un fichier qu'aucun manifeste ne publie encore.
+    """
+    if convert is None:
+        convert = lambda block: block.astype(new_dtype)
+    out_path = out_path or path
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as out:
+        if rows:
+            values = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+            for start in range(0, rows, PROMOTION_BLOCK_ROWS):
+                out.write(np.ascontiguousarray(convert(values[start:start + PROMOTION_BLOCK_ROWS])).tobytes())
+            del values
+    os.replace(tmp_path, out_path)
+
+def _widen_column(column, path, rows, new_dtype, out_path=None):
+    """
+    Réécrit une colonne dans le type de nouvelles valeurs et met à jour sa description
+
+    Args:
+        column (dict): Description de la colonne (modifiée)
+        path (str): Fichier de la colonne
+        rows (int): Nombre de lignes valides du fichier
+        new_dtype (np.dtype): Type des nouvelles valeurs
+        out_path (str, optional): Nouveau fichier (voir promote_column_file)
+    """
+    dtype = np.dtype(column['dtype'])
+    if column['kind'] == 'days' and new_dtype.kind == 'M':
+        print(f"Colonne {column['name']}: dates avec heure, stockage en datetime64[ns]")
+        promote_column_file(path, rows, dtype, new_dtype, decode_days, out_path)
+        column['kind'] = 'values'
+    else:
+        if new_dtype != dtype:
+            print(f"Colonne {column['name']}: élargissement de {dtype} en {new_dtype}")
+        promote_column_file(path, rows, dtype, new_dtype, out_path=out_path)
+    column['dtype'] = new_dtype.str
+
+def _encode_dates(column, series):
+    """
+    Convertit des dates au format d'une colonne du stockage
+
+    Args:
+        column (dict): Description de la colonne
+        series (pd.Series): Dates à convertir
+
+    Returns:
+        np.ndarray: Numéros de jour pour une colonne de jours, sinon datetime64[ns]
+            (y compris pour une colonne de jours recevant des dates avec heure, à
+            élargir alors par _widen_column)
+    """
+    values = pd.to_datetime(series, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    if column['kind'] != 'days':
+        return values
+
+    days = encode_days(values)
+    return values if days is None else days
+
+class PriceStoreWriter:
+    """
+    Écriture d'un stockage colonnaire par blocs de lignes
+
+    Chaque bloc est ajouté à la fin des fichiers des colonnes : la mémoire utilisée
+    dépend de la taille des blocs et non de celle du fichier source. Les colonnes
+    texte sont codées en catégories (codes int32) ; les colonnes numériques sont
+    écrites dans le type demandé et élargies (voir fit_column_values) dès qu'un bloc
+    ne peut pas y être représenté sans perte.
+
+    Args:
+        store_dir (str): Dossier du stockage
+        dtypes (dict): Type de chaque colonne ('category', 'datetime64[D]' pour les
+            numéros de jour, 'datetime64[ns]' ou type numérique), dans l'ordre des
+            colonnes du stockage
+    """
+
+    def __init__(self, store_dir, dtypes):
+        os.makedirs(store_dir, exist_ok=True)
+        # Le manifeste existant décrit un stockage périmé : il n'est plus lu, mais ses
+        # fichiers restent intacts pour les DataFrames qui les projettent encore
+        manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        self.store_dir = store_dir
+        self.rows = 0
+        self.columns = []
+        self._codes = []
+        generation = _new_generation(store_dir)
+        for position, (name, dtype) in enumerate(dtypes.items()):
+            file_name = _column_file_name(position, generation)
+            if dtype == 'category':
+                column = {'kind': 'category', 'dtype': np.dtype('int32').str, 'categories': []}
+            elif dtype == 'datetime64[D]':
+                column = {'kind': 'days', 'dtype': np.dtype('int32').str}
+            else:
+                column = {'kind': 'values', 'dtype': np.dtype(dtype).str}
+            column.update({'name': name, 'file': file_name})
+            self.columns.append(column)
+            self._codes.append({})
+            open(os.path.join(store_dir, file_name), 'wb').close()
+
+    def _encode(self, position, series):
+        """Convertit un bloc d'une colonne au type de la colonne (élargi si nécessaire)"""
+        column = self.columns[position]
+        dtype = np.dtype(column['dtype'])
+
+        if column['kind'] == 'category':
+            code_of = self._codes[position]
+            if isinstance(series.dtype, pd.CategoricalDtype) and not series.isna().any():
+                # Codage par catégorie : seuls les symboles distincts sont parcourus
+                for value in series.cat.categories.astype(str):
+                    if value not in code_of:
+                        code_of[value] = len(column['categories'])
+                        column['categories'].append(value)
+                lookup = np.array([code_of[value] for value in series.cat.categories.astype(str)], dtype=dtype)
+                return lookup[series.cat.codes.to_numpy()]
+            values = series.astype(str)
+            for value in pd.unique(values):
+                if value not in code_of:
+                    code_of[value] = len(column['categories'])
+                    column['categories'].append(value)
+            return values.map(code_of).to_numpy(dtype=dtype)
+
+        if column['kind'] == 'days' or dtype.kind == 'M':
+            values = _encode_dates(column, series)
+        else:
+            values, fitted = fit_column_values(pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64'), dtype)
+            values = values.astype(fitted)
+        if values.dtype != dtype:
+            # Fichier pas encore publié par un manifeste : élargi sur place
+            _widen_column(column, os.path.join(self.store_dir, column['file']), self.rows, values.dtype)
+        return values
+
+    def append(self, chunk):
+        """
+        Ajoute un bloc de lignes
+
+        Args:
+            chunk (pd.DataFrame): Lignes à ajouter (colonnes absentes: valeurs manquantes)
+        """
+        if chunk.empty:
+            return
+        for position, column in enumerate(self.columns):
+            if column['name'] in chunk.columns:
+                series = chunk[column['name']]
+            else:
+                series = pd.Series(np.nan, index=chunk.index)
+            values = self._encode(position, series)
+            with open(os.path.join(self.store_dir, column['file']), 'ab') as f:
+                f.write(np.ascontiguousarray(values).tobytes())
+        self.rows += len(chunk)
+
+    def close(self, fingerprint):
+        """
+        Termine le stockage en écrivant son manifeste
+
+        Args:
+            fingerprint (dict): Empreinte du fichier source
+
+        Returns:
+            dict: Manifeste écrit
+        """
+        manifest = {
+            'version': STORE_VERSION,
+            'rows': int(self.rows),
+            'source': fingerprint,
+            'columns': self.columns,
+        }
+        # Le manifeste est écrit en dernier : un stockage incomplet n'est jamais lu
+        write_manifest(self.store_dir, manifest)
+        remove_unreferenced_files(self.store_dir, manifest)
+        return manifest
+
+def load_price_store(store_dir, manifest=None, columns=None):
+    """
+    Charge le stockage colonnaire sans copie (np.memmap en lecture seule)
+
+    Seules les colonnes de jours sont converties en mémoire (datetime64[ns]) ; les
+    colonnes non demandées ne sont pas ouvertes.
+
+    Args:
+        store_dir (str): Dossier du stockage
+        manifest (dict, optional): Manifeste déjà lu
+        columns (list, optional): Colonnes à charger (présentes dans le stockage).
+            Par défaut toutes.
+
+    Returns:
+        pd.DataFrame: Données historiques, ou None si le stockage est absent
+    """
+    if manifest is None:
+        manifest = read_manifest(store_dir)
+    if manifest is None:
+        return None
+
+    rows = manifest['rows']
+    data = {}
+    for column in manifest['columns']:
+        if columns is not None and column['name'] not in columns:
+            continue
+        path = os.path.join(store_dir, column['file'])
+        if rows == 0:
+            values = np.empty(0, dtype=np.dtype(column['dtype']))
+        else:
+            values = np.memmap(path, dtype=np.dtype(column['dtype']), mode='r', shape=(rows,))
+
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        elif column['kind'] == 'days':
+            values = decode_days(values)
+        data[column['name']] = values
+
+    # copy=False conserve les tableaux projetés en mémoire tels quels
+    return pd.DataFrame(data, copy=False)
+
+def compact_price_store(store_dir, keep, manifest=None):
+    """
+    Retire des lignes du stockage, colonne par colonne et par blocs
+
+    Les lignes conservées sont écrites dans de nouveaux fichiers, publiés par le
+    manifeste une fois complets : les DataFrames déjà chargés gardent les anciens
+    fichiers et doivent être rechargés (load_price_store) pour voir le résultat.
+
+    Args:
+        store_dir (str): Dossier du stockage
+        keep (np.ndarray): Masque booléen des lignes à conserver
+        manifest (dict, optional): Manifeste déjà lu
+
+    Returns:
+        dict: Manifeste mis à jour
+    """
+    if manifest is None:
+        manifest = read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Aucun stockage colonnaire dans {store_dir}")
+
+    rows = manifest['rows']
+    generation = _new_generation(store_dir)
+    columns = []
+    for position, column in enumerate(manifest['columns']):
+        path = os.path.join(store_dir, column['file'])
+        dtype = np.dtype(column['dtype'])
+        file_name = _column_file_name(position, generation)
+        tmp_path = os.path.join(store_dir, file_name + '.tmp')
+        with open(tmp_path, 'wb') as out:
+            if rows:
+                values = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+                for start in range(0, rows, PROMOTION_BLOCK_ROWS):
+                    block = slice(start, start + PROMOTION_BLOCK_ROWS)
+                    out.write(np.ascontiguousarray(values[block][keep[block]]).tobytes())
+                del values
+        os.replace(tmp_path, os.path.join(store_dir, file_name))
+        columns.append({**column, 'file': file_name})
+
+    manifest = {**manifest, 'rows': int(np.count_nonzero(keep)), 'columns': columns}
+    write_manifest(store_dir, manifest)
+    remove_unreferenced_files(store_dir, manifest)
+    return manifest
+
+def _encode_appended_column(column, series):
+    """
+    Convertit une colonne de nouvelles lignes au type d'une colonne du stockage
+
+    Args:
+        column (dict): Description de la colonne dans le manifeste (modifiée si de
+            nouvelles catégories apparaissent)
+        series (pd.Series): Valeurs à ajouter
+
+    Returns:
+        np.ndarray: Tableau au type de la colonne, ou dans un type élargi si les
+            valeurs ne peuvent pas y être représentées (voir fit_column_values)
+    """
+    dtype = np.dtype(column['dtype'])
+
+    if column['kind'] == 'category':
+        values = series.astype(str)
+        code_of = {category: code for code, category in enumerate(column['categories'])}
+        for value in pd.unique(values):
+            if value not in code_of:
+                code_of[value] = len(column['categories'])
+                column['categories'].append(value)
+        return values.map(code_of).to_numpy(dtype=dtype)
+
+    if column['kind'] == 'days' or dtype.kind == 'M':
+        return _encode_dates(column, series)
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64')
+    if dtype.kind in 'iu':
+        values = np.nan_to_num(values, nan=0.0)
+    values, fitted = fit_column_values(values, dtype)
+    return values.astype(fitted)
+
+def append_to_price_store(store_dir, new_rows):
+    """
+    Ajoute des lignes à la fin des fichiers du stockage, sans réécrire l'existant
+
+    Le coût est proportionnel au nombre de lignes ajoutées. L'empreinte du CSV source
+    est conservée : les lignes ajoutées sont relues aux démarrages suivants tant que
+    le CSV source ne change pas (auquel cas le stockage est reconstruit depuis le CSV).
+
+    Les lignes sont écrites après la fin des fichiers, hors des plages projetées par
+    les DataFrames déjà chargés. Une colonne à élargir, ou dont le fichier porte les
+    restes d'un ajout interrompu, est recopiée dans un nouveau fichier (le fichier
+    publié n'est jamais tronqué).
+
+    Args:
+        store_dir (str): Dossier du stockage
+        new_rows (pd.DataFrame): Lignes à ajouter (colonnes du stockage)
+
+    Returns:
+        dict: Manifeste mis à jour
+    """
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Aucun stockage colonnaire dans {store_dir}")
+
+    rows = manifest['rows']
+    generation = None
+    for position, column in enumerate(manifest['columns']):
+        if column['name'] in new_rows.columns:
+            series = new_rows[column['name']]
+        else:
+            series = pd.Series(np.nan, index=new_rows.index)
+        path = os.path.join(store_dir, column['file'])
+        values = _encode_appended_column(column, series)
+
+        size = rows * np.dtype(column['dtype']).itemsize
+        if values.dtype != np.dtype(column['dtype']) or os.path.getsize(path) != size:
+            if generation is None:
+                generation = _new_generation(store_dir)
+            file_name = _column_file_name(position, generation)
+            _widen_column(column, path, rows, values.dtype, os.path.join(store_dir, file_name))
+            column['file'] = file_name
+            path = os.path.join(store_dir, file_name)
+
+        with open(path, 'ab') as f:
+            f.write(np.ascontiguousarray(values).tobytes())
+
+    manifest['rows'] = rows + len(new_rows)
+    manifest['appended_rows'] = manifest.get('appended_rows', 0) + len(new_rows)
+    write_manifest(store_dir, manifest)
+    if generation is not None:
+        remove_unreferenced_files(store_dir, manifest)
+    return manifest
+
+def is_store_current(store_dir, csv_path, manifest=None):
+    """
+    Vérifie que le stockage correspond encore au fichier CSV source
+
+    La comparaison (mtime, taille) suffit dans le cas courant. Si seul le mtime a
+    changé (copie, checkout git...), l'empreinte SHA-256 tranche et le manifeste
+    est mis à jour pour éviter de recalculer l'empreinte au prochain démarrage.
+
+    Args:
+        store_dir (str): Dossier du stockage
+        csv_path (str): Chemin du fichier CSV source
+        manifest (dict, optional): Manifeste déjà lu
+
+    Returns:
+        bool: True si le stockage peut être utilisé tel quel
+    """
+    if manifest is None:
+        manifest = read_manifest(store_dir)
+    if manifest is None:
+        return False
+
+    source = manifest.get('source', {})
+    stat = os.stat(csv_path)
+    if source.get('size') != stat.st_size:
+        return False
+    if source.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+
+    if source.get('sha256') != _file_sha256(csv_path):
+        return False
+
+    source['mtime_ns'] = stat.st_mtime_ns
+    try:
+        write_manifest(store_dir, manifest)
+    except OSError:
+        pass
+    return True
+
+def load_or_build_price_store(csv_path, processed_dir, parse_csv, stream_csv=None, columns=None):
+    """
+    Charge le stockage colonnaire, en le reconstruisant si le CSV source a changé
+
+    Args:
+        csv_path (str): Chemin du fichier CSV source
+        processed_dir (str): Dossier des données traitées
+        parse_csv (callable): Fonction analysant le CSV et retournant un DataFrame
+        stream_csv (callable, optional): Fonction (csv_path, store_dir, fingerprint)
+            écrivant le stockage par blocs et retournant son manifeste. Prioritaire
+            sur parse_csv : le CSV n'est jamais chargé en entier.
+        columns (list, optional): Colonnes à charger (voir load_price_store)
+
+    Returns:
+        pd.DataFrame: Données historiques
+    """
+    store_dir = get_store_dir(csv_path, processed_dir)
+    manifest = read_manifest(store_dir)
+
+    if manifest is not None and is_store_current(store_dir, csv_path, manifest):
+        historical_data = load_price_store(store_dir, manifest, columns)
+        if historical_data is not None:
+            return historical_data
+
+    print(f"Compilation du stockage colonnaire pour {os.path.basename(csv_path)}")
+    fingerprint = source_fingerprint(csv_path)
+    if stream_csv is not None:
+        try:
+            manifest = stream_csv(csv_path, store_dir, fingerprint)
+        except OSError as e:
+            print(f"Impossible d'écrire le stockage colonnaire: {e}")
+        else:
+            return load_price_store(store_dir, manifest, columns)
+
+    historical_data = parse_csv(csv_path)
+    try:
+        manifest = build_price_store(historical_data, store_dir, fingerprint)
+    except OSError as e:
+        print(f"Impossible d'écrire le stockage colonnaire: {e}")
+        return historical_data
+
+    return load_price_store(store_dir, manifest, columns)
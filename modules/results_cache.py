@@ -0,0 +1,178 @@
+"""
+Cache disque des résultats dérivés coûteux
+
+Les DataFrames produits par les fonctions décorées par @persistent (valeurs
+quotidiennes du portefeuille, table des rendements par période, profits manqués)
+sont écrits dans config.RESULTS_CACHE_PATH au format du stockage colonnaire
+(modules.price_store). Chaque résultat porte l'empreinte de ses dépendances
+(contenu des prix et des transactions, données de contexte enregistrées par
+register_context_dependency) : un processus redémarré ou un nouveau
+worker relit les résultats tant que les données n'ont pas changé.
+"""
+import os
+import shutil
+import hashlib
+import inspect
+import functools
+import threading
+
+import pandas as pd
+
+import config
+from modules.dataset_cache import frame_fingerprint
+from modules.price_store import build_price_store, load_price_store, read_manifest, write_manifest
+
+# Version des résultats (à incrémenter si un calcul décoré change)
+RESULTS_VERSION = 1
+
+# Dépendances de contexte communes à tous les résultats : nom -> fonction d'empreinte
+_CONTEXT_DEPENDENCIES = {}
+
+def register_context_dependency(name, fingerprint):
+    """
+    Enregistre une donnée de contexte dont dépendent tous les résultats
+
+    Sert aux données lues hors des arguments des fonctions décorées (ex: table des
+    opérations sur titres appliquée aux prix) : un changement de leur empreinte
+    invalide les résultats conservés.
+
+    Args:
+        name (str): Nom de la dépendance
+        fingerprint (callable): Fonction sans argument retournant une empreinte stable
+    """
+    _CONTEXT_DEPENDENCIES[name] = fingerprint
+
+def _digest(value):
+    """Empreinte courte d'une valeur à représentation stable"""
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()[:12]
+
+def get_artifact_dir(name, arguments, dependencies):
+    """
+    Retourne le dossier d'un résultat
+
+    Args:
+        name (str): Nom de la fonction
+        arguments (tuple): Arguments normalisés hors DataFrames
+        dependencies (dict): Empreintes des DataFrames d'entrée
+
+    Returns:
+        str: Dossier du résultat (nom-arguments-dépendances)
+    """
+    prefix = f"{name}-{_digest((RESULTS_VERSION, arguments))}"
+    return os.path.join(config.RESULTS_CACHE_PATH, f"{prefix}-{_digest(sorted(dependencies.items()))}")
+
+def load_artifact(artifact_dir, dependencies):
+    """
+    Relit un résultat si ses dépendances correspondent
+
+    Args:
+        artifact_dir (str): Dossier du résultat
+        dependencies (dict): Empreintes attendues des DataFrames d'entrée
+
+    Returns:
+        pd.DataFrame: Résultat, ou None s'il est absent, illisible ou périmé
+    """
+    manifest = read_manifest(artifact_dir)
+    if manifest is None or manifest.get('source') != {'dependencies': dependencies, 'version': RESULTS_VERSION}:
+        return None
+
+    try:
+        result = load_price_store(artifact_dir, manifest)
+    except (OSError, ValueError):
+        return None
+
+    # Les colonnes texte sont stockées en catégories : rétablir des chaînes
+    for column in result.columns:
+        if isinstance(result[column].dtype, pd.CategoricalDtype):
+            result[column] = result[column].astype(object)
+    if manifest.get('index'):
+        result = result.set_index(manifest['index'])
+    return result
+
+def save_artifact(artifact_dir, result, dependencies):
+    """
+    Écrit un résultat de façon atomique (dossier temporaire puis renommage)
+
+    Les versions du même résultat calculées sur d'autres données sont supprimées.
+
+    Args:
+        artifact_dir (str): Dossier du résultat
+        result (pd.DataFrame): Résultat à écrire
+        dependencies (dict): Empreintes des DataFrames d'entrée
+    """
+    index = [] if isinstance(result.index, pd.RangeIndex) else list(result.index.names)
+    if any(name is None for name in index):
+        return
+    frame = result.reset_index() if index else result
+
+    tmp_dir = f"{artifact_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        manifest = build_price_store(frame, tmp_dir, {'dependencies': dependencies, 'version': RESULTS_VERSION})
+        manifest['index'] = index
+        write_manifest(tmp_dir, manifest)
+        os.replace(tmp_dir, artifact_dir)
+    except OSError:
+        # Résultat déjà écrit par un autre processus, ou disque en lecture seule
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    prefix = os.path.basename(artifact_dir).rsplit('-', 1)[0] + '-'
+    for entry in os.listdir(os.path.dirname(artifact_dir)):
+        if entry.startswith(prefix) and entry != os.path.basename(artifact_dir) and '.tmp-' not in entry:
+            shutil.rmtree(os.path.join(os.path.dirname(artifact_dir), entry), ignore_errors=True)
+
+def persistent(func):
+    """
+    Décorateur conservant sur disque les DataFrames retournés par une fonction
+
+    Les DataFrames passés en argument forment les dépendances du résultat ; les
+    autres arguments doivent avoir une représentation stable (voir argument_key).
+    À combiner avec @memoize placé au-dessus pour le cache en mémoire.
+
+    Args:
+        func (callable): Fonction pure retournant un DataFrame
+
+    Returns:
+        callable: Fonction dont les résultats sont relus depuis le disque
+    """
+    from modules.cache import argument_key
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not config.RESULTS_CACHE_ENABLED:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        dependencies, arguments = {}, []
+        try:
+            for name, value in bound.arguments.items():
+                if isinstance(value, pd.DataFrame):
+                    dependencies[name] = frame_fingerprint(value)
+                else:
+                    key = argument_key(value)
+                    hash(key)
+                    arguments.append((name, key))
+        except TypeError:
+            # Argument sans représentation stable : calcul direct
+            return func(*args, **kwargs)
+        for name, fingerprint in _CONTEXT_DEPENDENCIES.items():
+            dependencies[name] = fingerprint()
+
+        artifact_dir = get_artifact_dir(func.__qualname__, tuple(arguments), dependencies)
+        result = load_artifact(artifact_dir, dependencies)
+        if result is not None:
+            return result
+
+        result = func(*args, **kwargs)
+        if isinstance(result, pd.DataFrame):
+            save_artifact(artifact_dir, result, dependencies)
+        return result
+
+    return wrapper
+
+def clear_results_cache():
+    """Supprime tous les résultats conservés sur disque"""
+    shutil.rmtree(config.RESULTS_CACHE_PATH, ignore_errors=True)
@@ -0,0 +1,231 @@
+"""
+Indicateurs de risque : volatilité, perte maximale, ratios de Sharpe et de Sortino,
+bêta et écart de suivi par rapport à l'indice de référence (MASI)
+
+Tous les indicateurs sont calculés sur la matrice (dates × symboles) des rendements
+journaliers, colonne par colonne en une seule opération numpy : les fenêtres
+glissantes sont des différences de sommes cumulées, et les jours sans cotation
+(NaN) sont exclus par des masques. Le coût croît avec la taille de la matrice,
+sans boucle Python par symbole.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+import config
+from modules.cache import memoize
+from modules.results_cache import persistent
+from modules.data_loader import get_price_history
+from modules.utils import get_period_start
+
+logger = logging.getLogger(__name__)
+
+# Nom de la ligne du portefeuille dans la table des indicateurs
+PORTFOLIO_ROW = 'PORTFOLIO'
+
+def build_return_matrix(historical_data, start_date=None, end_date=None, adjustment='total'):
+    """
+    Construit la matrice des rendements journaliers (dates × symboles)
+
+    Le rendement d'un jour de cotation est mesuré depuis la cotation précédente du
+    même symbole ; les jours sans cotation valent NaN.
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        start_date (datetime, optional): Première date (incluse)
+        end_date (datetime, optional): Dernière date (incluse)
+        adjustment (str, optional): Vue des prix (voir get_price_history). Par
+            défaut 'total' : les dividendes comptent dans le rendement.
+
+    Returns:
+        pd.DataFrame: Rendements (index: dates, colonnes: symboles)
+    """
+    price_history = get_price_history(historical_data, adjustment)
+    calendar, prices = price_history.close_matrix(start_date, end_date)
+
+    # Cotation précédente de chaque symbole (remplissage vers l'avant décalé d'un jour)
+    previous = pd.DataFrame(prices).ffill().shift(1).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices / previous - 1
+
+    return pd.DataFrame(
+        returns,
+        index=pd.DatetimeIndex(calendar, name='date'),
+        columns=pd.Index(price_history.symbols, name='symbol'),
+    )
+
+def _rolling_sum(values, window):
+    """Somme glissante sur `window` lignes (axe 0), par différence de sommes cumulées"""
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    starts = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return cumulative[1:] - cumulative[starts]
+
+def rolling_volatility(returns, window=None, min_periods=None):
+    """
+    Calcule la volatilité annualisée glissante de chaque colonne
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers (dates × symboles)
+        window (int, optional): Fenêtre en jours de cotation. Par défaut
+            config.RISK_ROLLING_WINDOW.
+        min_periods (int, optional): Nombre minimal de rendements dans la fenêtre.
+            Par défaut la moitié de la fenêtre.
+
+    Returns:
+        pd.DataFrame: Volatilités annualisées (NaN si trop peu de rendements)
+    """
+    window = window or config.RISK_ROLLING_WINDOW
+    min_periods = min_periods or max(window // 2, 2)
+    values = returns.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+
+    # Centrage par colonne : la variance est invariante et les sommes restent petites
+    with np.errstate(invalid='ignore'):
+        centered = np.where(valid, values - np.nanmean(np.where(valid, values, np.nan), axis=0), 0.0)
+    counts = _rolling_sum(valid.astype('float64'), window)
+    sums = _rolling_sum(centered, window)
+    squares = _rolling_sum(centered * centered, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - sums * sums / counts) / (counts - 1)
+    volatility = np.sqrt(np.maximum(variance, 0) * config.TRADING_DAYS_PER_YEAR)
+    return pd.DataFrame(
+        np.where(counts >= min_periods, volatility, np.nan), index=returns.index, columns=returns.columns
+    )
+
+def drawdowns(returns):
+    """
+    Calcule la baisse de chaque colonne depuis son plus haut historique
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers (dates × symboles)
+
+    Returns:
+        pd.DataFrame: Baisses (0 au plus haut, -0.25 pour une baisse de 25 %)
+    """
+    wealth = np.cumprod(1 + np.nan_to_num(returns.to_numpy(dtype='float64')), axis=0)
+    return pd.DataFrame(wealth / np.maximum.accumulate(wealth, axis=0) - 1, index=returns.index, columns=returns.columns)
+
+def _summary_statistics(values, valid, risk_free_rate):
+    """Nombre de rendements, moyenne, écart-type et écart de baisse de chaque colonne"""
+    counts = valid.sum(axis=0)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = filled.sum(axis=0) / counts
+        deviations = np.where(valid, values - means, 0.0)
+        stds = np.sqrt((deviations * deviations).sum(axis=0) / (counts - 1))
+        shortfall = np.where(valid, np.minimum(values - risk_free_rate, 0.0), 0.0)
+        downside = np.sqrt((shortfall * shortfall).sum(axis=0) / counts)
+    return counts, means, stds, downside
+
+def risk_metrics(returns, benchmark_returns=None, risk_free_rate=None, min_observations=None):
+    """
+    Calcule les indicateurs de risque de chaque colonne d'une matrice de rendements
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers (dates × symboles)
+        benchmark_returns (pd.Series, optional): Rendements de l'indice de référence
+            (même index). Sans indice, bêta et écart de suivi valent NaN.
+        risk_free_rate (float, optional): Taux sans risque annuel. Par défaut
+            config.RISK_FREE_RATE.
+        min_observations (int, optional): Nombre minimal de rendements. Par défaut
+            config.RISK_MIN_OBSERVATIONS.
+
+    Returns:
+        pd.DataFrame: Colonnes [observations, annual_return, volatility, max_drawdown,
+            sharpe_ratio, sortino_ratio, beta, tracking_error], une ligne par symbole
+    """
+    days = config.TRADING_DAYS_PER_YEAR
+    risk_free_rate = config.RISK_FREE_RATE if risk_free_rate is None else risk_free_rate
+    min_observations = min_observations or config.RISK_MIN_OBSERVATIONS
+    daily_risk_free = risk_free_rate / days
+
+    values = returns.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    counts, means, stds, downside = _summary_statistics(values, valid, daily_risk_free)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (means - daily_risk_free) / stds * np.sqrt(days)
+        sortino = (means - daily_risk_free) / downside * np.sqrt(days)
+
+    beta = tracking_error = np.full(values.shape[1], np.nan)
+    if benchmark_returns is not None:
+        benchmark = benchmark_returns.reindex(returns.index).to_numpy(dtype='float64')[:, np.newaxis]
+        # Statistiques sur les jours où le symbole et l'indice sont cotés
+        common = valid & ~np.isnan(benchmark)
+        n_common = common.sum(axis=0)
+        x = np.where(common, values, 0.0)
+        y = np.where(common, benchmark, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = x.sum(axis=0) / n_common
+            y_mean = y.sum(axis=0) / n_common
+            x_dev = np.where(common, x - x_mean, 0.0)
+            y_dev = np.where(common, y - y_mean, 0.0)
+            beta = (x_dev * y_dev).sum(axis=0) / (y_dev * y_dev).sum(axis=0)
+            active = x_dev - y_dev
+            tracking_error = np.sqrt((active * active).sum(axis=0) / (n_common - 1) * days)
+        enough = n_common >= min_observations
+        beta = np.where(enough, beta, np.nan)
+        tracking_error = np.where(enough, tracking_error, np.nan)
+
+    enough = counts >= min_observations
+    result = pd.DataFrame({
+        'observations': counts,
+        'annual_return': means * days,
+        'volatility': stds * np.sqrt(days),
+        'max_drawdown': drawdowns(returns).min(axis=0).to_numpy(),
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'beta': beta,
+        'tracking_error': tracking_error,
+    }, index=returns.columns)
+    result.loc[~enough, result.columns.drop('observations')] = np.nan
+    return result
+
+@memoize
+@persistent
+def calculate_risk_metrics(historical_data, transactions_data=None, period='1Y', benchmark_symbol=None):
+    """
+    Calcule la table des indicateurs de risque des symboles et du portefeuille
+
+    Les rendements sont ceux des prix ajustés en rendement total ; la ligne
+    PORTFOLIO utilise la valeur liquidative du portefeuille (TotalReturnNav).
+
+    Args:
+        historical_data (pd.DataFrame): Données historiques des prix
+        transactions_data (pd.DataFrame, optional): Transactions (ligne du portefeuille)
+        period (str, optional): Période d'analyse, se terminant à la dernière date des
+            prix. Par défaut '1Y'.
+        benchmark_symbol (str, optional): Indice de référence. Par défaut
+            config.INDICES['MASI'].
+
+    Returns:
+        pd.DataFrame: Indicateurs (voir risk_metrics), index: symboles. Sans
+            cotations de l'indice de référence, beta et tracking_error valent NaN
+            (un avertissement est journalisé).
+    """
+    benchmark_symbol = benchmark_symbol or config.INDICES['MASI']
+    current_date = get_price_history(historical_data).last_date
+    start_date = None if pd.isna(current_date) else get_period_start(period, current_date)
+
+    returns = build_return_matrix(historical_data, start_date)
+
+    if transactions_data is not None and not transactions_data.empty:
+        from modules.performance import get_total_return_nav
+
+        nav = get_total_return_nav(historical_data, transactions_data).frame().set_index('date')
+        # Rendements de la part, à partir du lendemain du premier investissement
+        portfolio_returns = nav['nav'].pct_change().where(nav['portfolio_value'].shift(1) > 0)
+        returns[PORTFOLIO_ROW] = portfolio_returns.reindex(returns.index)
+
+    benchmark = returns[benchmark_symbol] if benchmark_symbol in returns.columns else None
+    if benchmark is None or benchmark.isna().all():
+        logger.warning(
+            "Aucune cotation de l'indice %s sur la période %s dans l'historique des prix : "
+            "bêta et écart de suivi indisponibles (ajouter les lignes %s à data/all_historical_data.csv)",
+            benchmark_symbol, period, benchmark_symbol,
+        )
+    result = risk_metrics(returns, benchmark)
+    result.index.name = 'symbol'
+    return result
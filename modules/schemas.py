@@ -0,0 +1,234 @@
+"""
+Registre des formats de fichiers de prix
+
+Chaque format (FeedSchema) est reconnu à partir de la seule ligne d'en-tête et
+décrit la correspondance de ses colonnes vers le format canonique (date, symbol,
+open, high, low, close, adjusted_close, volume), le format de ses dates et le
+suffixe de place de ses symboles. Les symboles sont normalisés en une passe
+vectorisée (voir normalize_symbols).
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+class FeedSchema:
+    """
+    Format d'un fichier de prix
+
+    Args:
+        name (str): Nom du format
+        columns (dict): Correspondance colonne source -> colonne canonique
+        required (list): Colonnes sources obligatoires pour reconnaître le format
+        date_format (str, optional): Format des dates textuelles (None: déduit).
+            Par défaut '%d/%m/%Y'.
+        symbol_suffix (str, optional): Suffixe de place retiré des symboles (ex: '.BC')
+        decimal (str, optional): Séparateur décimal des nombres. Par défaut '.'.
+    """
+
+    def __init__(self, name, columns, required, date_format='%d/%m/%Y', symbol_suffix=None, decimal='.'):
+        self.name = name
+        self.columns = dict(columns)
+        self.required = list(required)
+        self.date_format = date_format
+        self.symbol_suffix = symbol_suffix
+        self.decimal = decimal
+
+    def __repr__(self):
+        return f"FeedSchema({self.name!r})"
+
+    def matches(self, header):
+        """
+        Indique si un en-tête correspond au format
+
+        Args:
+            header (list): Noms des colonnes (nettoyés par clean_header)
+
+        Returns:
+            bool: True si toutes les colonnes obligatoires sont présentes
+        """
+        return all(col in header for col in self.required)
+
+    def rename_map(self, header):
+        """
+        Retourne le renommage des colonnes présentes vers le format canonique
+
+        Les colonnes dont le nom canonique existe déjà dans l'en-tête ne sont pas
+        renommées.
+
+        Args:
+            header (list): Noms des colonnes
+
+        Returns:
+            dict: Colonne source -> colonne canonique
+        """
+        return {col: new_col for col, new_col in self.columns.items()
+                if col in header and col != new_col and new_col not in header}
+
+    def canonical_columns(self, header):
+        """
+        Retourne les noms canoniques des colonnes d'un en-tête (ordre conservé)
+
+        Args:
+            header (list): Noms des colonnes
+
+        Returns:
+            list: Noms des colonnes après renommage
+        """
+        rename_dict = self.rename_map(header)
+        return [rename_dict.get(col, col) for col in header]
+
+# Formats connus, par ordre de détection (le plus spécifique d'abord)
+SCHEMAS = []
+
+def register_schema(schema):
+    """
+    Enregistre un format de fichier de prix
+
+    Les formats exigeant le plus de colonnes sont essayés en premier.
+
+    Args:
+        schema (FeedSchema): Format à enregistrer
+    """
+    SCHEMAS.append(schema)
+    SCHEMAS.sort(key=lambda s: -len(s.required))
+
+def clean_header(columns):
+    """
+    Nettoie des noms de colonnes (marque d'ordre des octets, espaces)
+
+    Args:
+        columns (iterable): Noms des colonnes
+
+    Returns:
+        list: Noms nettoyés
+    """
+    return [str(col).lstrip('\ufeff').strip() for col in columns]
+
+def detect_schema(columns):
+    """
+    Reconnaît le format d'un fichier de prix à partir de son en-tête
+
+    Args:
+        columns (iterable): Noms des colonnes
+
+    Returns:
+        FeedSchema: Format reconnu, ou None si aucun format ne correspond
+    """
+    header = clean_header(columns)
+    for schema in SCHEMAS:
+        if schema.matches(header):
+            return schema
+    return None
+
+def read_header(path, sep=';'):
+    """
+    Lit la ligne d'en-tête d'un fichier CSV sans analyser le reste du fichier
+
+    Args:
+        path (str): Chemin du fichier
+        sep (str, optional): Séparateur. Par défaut ';'.
+
+    Returns:
+        list: Noms des colonnes nettoyés
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return clean_header(f.readline().rstrip('\r\n').split(sep))
+
+def normalize_symbol_values(values, suffix=None):
+    """
+    Normalise une liste de symboles distincts
+
+    Les espaces et le suffixe de place sont retirés, puis les alias de
+    config.SYMBOL_ALIASES sont remplacés par le symbole de la cotation.
+
+    Args:
+        values (pd.Index): Symboles distincts
+        suffix (str, optional): Suffixe de place à retirer
+
+    Returns:
+        pd.Index: Symboles normalisés (même longueur)
+    """
+    normalized = values.astype(str).str.strip()
+    if suffix:
+        normalized = normalized.str.removesuffix(suffix)
+    aliases = config.SYMBOL_ALIASES
+    return pd.Index([aliases.get(symbol, symbol) for symbol in normalized], dtype=object)
+
+def normalize_symbols(symbols, suffix=None):
+    """
+    Normalise une colonne de symboles en une passe vectorisée
+
+    Le travail par ligne se limite à une factorisation : la normalisation ne porte
+    que sur les symboles distincts. Une colonne catégorielle déjà normalisée est
+    retournée telle quelle, sans copie.
+
+    Args:
+        symbols (pd.Series): Symboles
+        suffix (str, optional): Suffixe de place à retirer (ex: '.BC')
+
+    Returns:
+        pd.Series: Symboles normalisés (catégoriels, même index)
+    """
+    if isinstance(symbols.dtype, pd.CategoricalDtype):
+        codes = symbols.cat.codes.to_numpy()
+        uniques = symbols.cat.categories
+    else:
+        codes, uniques = pd.factorize(symbols.to_numpy())
+        uniques = pd.Index(uniques, dtype=object)
+
+    normalized = normalize_symbol_values(uniques, suffix)
+    if isinstance(symbols.dtype, pd.CategoricalDtype) and normalized.equals(uniques):
+        return symbols
+
+    # Des symboles distincts peuvent se confondre une fois normalisés
+    new_codes, new_uniques = pd.factorize(normalized)
+    codes = np.where(codes >= 0, new_codes[np.maximum(codes, 0)], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=new_uniques),
+        index=symbols.index,
+        name=symbols.name,
+    )
+
+# Cotations quotidiennes de la Bourse de Casablanca (historical_data.csv)
+register_schema(FeedSchema(
+    'bvc_daily',
+    {
+        'Date': 'date',
+        'Symbol': 'symbol',
+        'Ticker': 'symbol',
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume',
+    },
+    required=['Date', 'Close'],
+))
+
+# Cotations avec cours ajusté (all_historical_data.csv) : symboles suffixés '.BC',
+# virgule décimale
+register_schema(FeedSchema(
+    'bvc_adjusted',
+    {
+        'symbol': 'symbol',
+        'date': 'date',
+        'open': 'open',
+        'high': 'high',
+        'low': 'low',
+        'close': 'close',
+        'adjusted_close': 'adjusted_close',
+        'volume': 'volume',
+    },
+    required=['symbol', 'date', 'adjusted_close'],
+    symbol_suffix='.BC',
+    decimal=',',
+))
+
+# Format canonique (données déjà renommées, ex: lignes ajoutées par ingest_prices)
+register_schema(FeedSchema(
+    'canonical',
+    {col: col for col in ['date', 'symbol', 'open', 'high', 'low', 'close', 'adjusted_close', 'volume']},
+    required=['date', 'symbol'],
+    date_format=None,
+))
@@ -0,0 +1,31 @@
+"""
+Simulation Monte-Carlo par lots des profits et pertes d'un portefeuille
+
+Module volontairement léger (numpy seul) : ses fonctions sont exécutées dans les
+processus du pool de simulation, démarrés sans copier l'application ('spawn').
+"""
+import numpy as np
+
+def simulate_pnl_chunk(factor, values, horizon, n_paths, seed):
+    """
+    Simule un lot de trajectoires de rendements journaliers corrélés
+
+    Les rendements journaliers sont gaussiens, de moyenne nulle et de covariance
+    factor @ factor.T ; ils sont composés sur l'horizon. Toutes les trajectoires
+    du lot sont tirées ensemble : la boucle ne porte que sur les jours.
+
+    Args:
+        factor (np.ndarray): Facteur (symboles × facteurs) de la covariance journalière
+        values (np.ndarray): Valeur de chaque position
+        horizon (int): Horizon en jours de cotation
+        n_paths (int): Nombre de trajectoires du lot
+        seed (np.random.SeedSequence or int): Graine du lot
+
+    Returns:
+        np.ndarray: Profit ou perte du portefeuille sur chaque trajectoire
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.ones((n_paths, len(values)))
+    for _ in range(horizon):
+        growth *= 1 + rng.standard_normal((n_paths, factor.shape[1])) @ factor.T
+    return (growth - 1) @ values
@@ -1,6 +1,20 @@
 """
 Module d'utilitaires pour le formatage et les opérations communes
 """
+import weakref
+
+import pandas as pd
+
+import config
+
+# Durée des périodes glissantes (MTD et YTD dépendent de la date de fin)
+PERIOD_OFFSETS = {
+    '1M': pd.DateOffset(months=1),
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    'Last 60 Days': pd.DateOffset(days=60),
+}
 
 def format_currency(value, prefix="DH "):
     """
@@ -45,3 +59,72 @@ def format_percentage(value, digits=2):
     
     # Formater avec le nombre de décimales spécifié
     return f"{value:.{digits}f}%"
+
+def get_period_start(period, current_date):
+    """
+    Calcule la date de début d'une période d'analyse se terminant à current_date
+    
+    Args:
+        period (str): Période ('1M', '3M', '6M', '1Y', 'MTD', 'YTD', 'Last 60 Days'
+            ou toute clé de config.TIME_PERIODS)
+        current_date (datetime): Date de fin de la période
+    
+    Returns:
+        pd.Timestamp: Date de début (1 an avant current_date si la période est inconnue)
+    """
+    current_date = pd.Timestamp(current_date)
+    
+    if period == 'MTD':
+        return current_date.replace(day=1)
+    if period == 'YTD':
+        return current_date.replace(month=1, day=1)
+    if period in PERIOD_OFFSETS:
+        return current_date - PERIOD_OFFSETS[period]
+    if config.TIME_PERIODS.get(period):
+        return current_date - pd.DateOffset(days=config.TIME_PERIODS[period])
+    return current_date - PERIOD_OFFSETS['1Y']
+
+
+class FrameCache:
+    """
+    Cache de valeurs dérivées d'un DataFrame, indexé par l'identité de l'objet
+    
+    Les entrées sont libérées automatiquement avec le DataFrame source (référence
+    faible). Le DataFrame est supposé ne plus être modifié en place après le calcul.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+    
+    def get(self, frame, builder=None):
+        """
+        Retourne la valeur associée à un DataFrame, en la calculant si nécessaire
+        
+        Args:
+            frame (pd.DataFrame): DataFrame source
+            builder (callable, optional): Fonction calculant la valeur à partir du DataFrame
+        
+        Returns:
+            object: Valeur associée, ou None si absente et builder non fourni
+        """
+        entry = self._entries.get(id(frame))
+        if entry is not None and entry[0]() is frame:
+            return entry[1]
+        if builder is None:
+            return None
+        
+        value = builder(frame)
+        self.set(frame, value)
+        return value
+    
+    def set(self, frame, value):
+        """
+        Associe une valeur à un DataFrame
+        
+        Args:
+            frame (pd.DataFrame): DataFrame source
+            value (object): Valeur à associer
+        """
+        key = id(frame)
+        ref = weakref.ref(frame, lambda _, key=key: self._entries.pop(key, None))
+        self._entries[key] = (ref, value)
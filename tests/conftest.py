@@ -0,0 +1,35 @@
+"""
+Configuration commune des tests
+
+Les tests s'exécutent depuis la racine du dépôt (python -m pytest). Les résultats
+ne sont pas persistés sur disque et les opérations sur titres sont lues dans un
+fichier temporaire propre à chaque test.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """Redirige les fichiers de données et désactive le cache de résultats sur disque"""
+    monkeypatch.setattr(config, 'RESULTS_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'CORPORATE_ACTIONS_PATH', str(tmp_path / 'corporate_actions.csv'))
+    return tmp_path
+
+def write_corporate_actions(path, rows):
+    """
+    Écrit une table d'opérations sur titres
+
+    Args:
+        path (str): Chemin du fichier
+        rows (list): Lignes (date 'JJ/MM/AAAA', symbole, type, valeur)
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("Date;Symbol;Type;Value\n")
+        for row in rows:
+            f.write(';'.join(str(value) for value in row) + "\n")
@@ -0,0 +1,92 @@
+"""
+Moteur de backtest : journal des transactions, stratégie de tendance et variantes
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.backtest import LedgerStrategy, MarketData, MovingAverageStrategy, run_backtest
+from modules.data_loader import canonicalize_historical_data
+from modules.performance import NAV_BASE, backtest_transactions, run_backtest_variants
+from modules.portfolio import calculate_portfolio_metrics
+
+from test_optimizer import sample_portfolio
+from test_total_return_nav import TRANSACTIONS, random_prices
+
+def small_market():
+    """Deux symboles sur quatre journées, dividende de 1 sur AAA à la troisième"""
+    prices = np.array([[10.0, np.nan], [11.0, 20.0], [12.0, 21.0], [13.0, 22.0]])
+    dividends = np.zeros_like(prices)
+    dividends[2, 0] = 1.0
+    return MarketData(pd.bdate_range('2024-01-01', periods=4), ['AAA', 'BBB'], prices, dividends)
+
+def test_ledger_replay_by_hand():
+    market = small_market()
+    # Achat de 10 AAA à 10, achat de 5 BBB à 20, vente de 4 AAA au cours de clôture
+    strategy = LedgerStrategy([0, 1, 0], [0, 1, 3], [10.0, 5.0, -4.0], [10.0, 20.0, 13.0])
+
+    result = run_backtest(market, strategy, commission_rate=0.01)
+
+    # Achats financés par apports, frais compris
+    np.testing.assert_allclose(result['flows'], [101.0, 101.0, 0.0, 0.0])
+    np.testing.assert_allclose(result['dividends'], [0.0, 0.0, 10.0, 0.0])
+    np.testing.assert_allclose(result['cash'], [0.0, 0.0, 10.0, 61.48])
+    np.testing.assert_allclose(result['value'], [100.0, 210.0, 235.0, 61.48 + 6 * 13.0 + 5 * 22.0])
+    np.testing.assert_allclose(result['fees'], [1.0, 1.0, 0.0, 0.52])
+    np.testing.assert_allclose(result['trades']['realized'], [0.0, 0.0, 12.0])
+
+def test_ledger_groups_same_day_orders():
+    strategy = LedgerStrategy([0, 0, 0], [1, 1, 1], [2.0, 6.0, -1.0], [10.0, 12.0, 15.0])
+
+    np.testing.assert_array_equal(strategy.days, [1, 1])
+    np.testing.assert_allclose(strategy.quantities, [8.0, -1.0])
+    np.testing.assert_allclose(strategy.prices, [11.5, 15.0])
+
+def test_ledger_backtest_holds_the_portfolio_positions():
+    prices = canonicalize_historical_data(random_prices())
+
+    backtest = backtest_transactions(prices, TRANSACTIONS, 0.0)
+
+    nav, statistics = backtest['nav'], backtest['statistics']
+    details = calculate_portfolio_metrics(TRANSACTIONS, prices)['portfolio_details']
+    last = nav.iloc[-1]
+    assert last['portfolio_value'] - last['cash'] == pytest.approx(details['current_value'].sum())
+    assert statistics['trades'] == len(TRANSACTIONS)
+    assert statistics['buys'] + statistics['sells'] == statistics['trades']
+    assert statistics['contributions'] == pytest.approx(nav['cash_flow'].sum())
+    assert statistics['total_return'] == pytest.approx(last['nav'] / NAV_BASE - 1)
+
+def test_moving_average_strategy_stays_invested_in_whole_shares():
+    historical_data, _ = sample_portfolio()
+    strategy = MovingAverageStrategy(fast=10, slow=40, rebalance_every=15, max_positions=2, initial_capital=50_000.0)
+
+    backtest = run_backtest_variants(historical_data, {'tendance': strategy}, workers=1)['tendance']
+
+    trades, nav = backtest['trades'], backtest['nav']
+    assert not trades.empty
+    np.testing.assert_array_equal(trades['quantity'], np.round(trades['quantity']))
+    # Aucun apport au-delà du capital initial : les achats sont couverts par la valeur
+    assert nav['cash_flow'].sum() == pytest.approx(50_000.0)
+    assert (nav['cash'] >= -1e-9).all()
+    positions = trades.pivot_table(index='date', columns='symbol', values='quantity', aggfunc='sum', observed=True)
+    assert ((positions.fillna(0).cumsum() > 0).sum(axis=1) <= 2).all()
+
+def test_variants_do_not_depend_on_workers():
+    historical_data, transactions = sample_portfolio()
+    variants = {
+        'journal': 'ledger',
+        'rapide': MovingAverageStrategy(fast=5, slow=20),
+        'lente': MovingAverageStrategy(fast=20, slow=60, max_positions=1),
+    }
+
+    single = run_backtest_variants(historical_data, variants, transactions, 0.001, workers=1)
+    pooled = run_backtest_variants(historical_data, variants, transactions, 0.001, workers=2)
+
+    for name in variants:
+        pd.testing.assert_frame_equal(single[name]['nav'], pooled[name]['nav'])
+        pd.testing.assert_frame_equal(single[name]['trades'], pooled[name]['trades'])
+
+@pytest.mark.parametrize('fast, slow', [(0, 10), (20, 20), (30, 10)])
+def test_invalid_moving_average_windows_are_rejected(fast, slow):
+    with pytest.raises(ValueError):
+        MovingAverageStrategy(fast=fast, slow=slow)
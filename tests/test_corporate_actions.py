@@ -0,0 +1,121 @@
+"""
+Opérations sur titres : lecture de la table et ajustement en arrière des prix et transactions
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.corporate_actions import (
+    adjust_price_history,
+    adjust_transactions,
+    cumulative_factors,
+    dividend_events,
+    load_corporate_actions,
+)
+from modules.data_loader import PriceHistory, canonicalize_historical_data
+
+from conftest import write_corporate_actions
+from test_total_return_nav import random_prices
+
+ACTIONS = [
+    ('15/01/2024', 'AAA', 'SPLIT', 2.0),
+    ('12/02/2024', 'AAA', 'DIVIDEND', 1.5),
+    ('01/03/2024', 'AAA', 'SPLIT', 0.5),
+    ('20/02/2024', 'BBB', 'DIVIDEND', 2.0),
+    ('05/03/2024', 'ZZZ', 'SPLIT', 3.0),
+]
+
+def naive_adjustment(prices, actions, include_dividends):
+    """Ajustement de référence : boucle sur chaque opération, prix de la veille lus dans le DataFrame"""
+    adjusted = prices.sort_values(['symbol', 'date']).reset_index(drop=True)
+    factors = np.ones(len(adjusted))
+    for action in actions.itertuples():
+        if action.type == 'DIVIDEND' and not include_dividends:
+            continue
+        before = (adjusted['symbol'] == action.symbol) & (adjusted['date'] < action.date)
+        if not before.any():
+            continue
+        if action.type == 'SPLIT':
+            factors[before.to_numpy()] *= 1 / action.value
+        else:
+            previous = adjusted.loc[before, 'close'].iloc[-1]
+            factors[before.to_numpy()] *= (previous - action.value) / previous
+    return adjusted.assign(close=adjusted['close'] * factors)
+
+def test_load_corporate_actions(isolated_data):
+    path = isolated_data / 'actions.csv'
+    write_corporate_actions(path, ACTIONS + [
+        ('99/99/2024', 'AAA', 'SPLIT', 2.0),
+        ('01/04/2024', 'AAA', 'MERGER', 2.0),
+        ('02/04/2024', 'AAA', 'SPLIT', 0),
+        ('03/04/2024', ' IAM ', ' dividend ', 4.0),
+    ])
+
+    actions = load_corporate_actions(str(path))
+
+    assert list(actions.columns) == ['date', 'symbol', 'type', 'value']
+    assert len(actions) == len(ACTIONS) + 1
+    assert actions.iloc[-1].tolist() == [pd.Timestamp('2024-04-03'), 'ITISSALAT-AL-MAGHRIB', 'DIVIDEND', 4.0]
+    assert load_corporate_actions(str(isolated_data / 'absent.csv')).empty
+
+def test_cumulative_factors_multiply_later_actions():
+    action_dates = pd.to_datetime(['2024-01-10', '2024-02-10', '2024-01-20']).to_numpy()
+    dates = pd.to_datetime(['2024-01-01', '2024-01-10', '2024-01-15', '2024-02-10', '2024-01-01', '2024-01-01']).to_numpy()
+
+    factors = cumulative_factors(np.array([0, 0, 1]), action_dates, np.array([0.5, 0.8, 0.25]), np.array([0, 0, 0, 0, 1, 2]), dates)
+
+    # Opération du jour même non appliquée ; symbole sans opération inchangé
+    np.testing.assert_allclose(factors, [0.4, 0.8, 0.8, 1.0, 0.25, 1.0])
+
+@pytest.mark.parametrize('include_dividends', [False, True])
+def test_adjust_price_history_matches_naive(isolated_data, include_dividends):
+    write_corporate_actions(isolated_data / 'actions.csv', ACTIONS)
+    actions = load_corporate_actions(str(isolated_data / 'actions.csv'))
+    prices = canonicalize_historical_data(random_prices())
+
+    adjusted = adjust_price_history(PriceHistory.from_frame(prices), actions, include_dividends)
+
+    expected = naive_adjustment(prices, actions, include_dividends)
+    for symbol, group in expected.groupby('symbol', observed=True):
+        series = adjusted.series(symbol)
+        np.testing.assert_array_equal(series.index, group['date'])
+        np.testing.assert_allclose(series.to_numpy(), group['close'], rtol=1e-12)
+
+def test_unknown_symbols_keep_the_same_index(isolated_data):
+    write_corporate_actions(isolated_data / 'actions.csv', [('05/03/2024', 'ZZZ', 'SPLIT', 3.0)])
+    price_history = PriceHistory.from_frame(canonicalize_historical_data(random_prices()))
+
+    actions = load_corporate_actions(str(isolated_data / 'actions.csv'))
+
+    assert adjust_price_history(price_history, actions, include_dividends=True) is price_history
+
+def test_adjust_transactions_keeps_amounts(isolated_data):
+    write_corporate_actions(isolated_data / 'actions.csv', ACTIONS)
+    actions = load_corporate_actions(str(isolated_data / 'actions.csv'))
+    transactions = pd.DataFrame({
+        'purchase_date': pd.to_datetime(['2024-01-05', '2024-02-01', '2024-03-04', '2024-01-05']),
+        'symbol': ['AAA', 'AAA', 'AAA', 'BBB'],
+        'Type': 'BUY',
+        'quantity': [10.0, 10.0, 10.0, 10.0],
+        'purchase_price': [100.0, 100.0, 100.0, 100.0],
+    })
+
+    adjusted = adjust_transactions(transactions, actions)
+
+    # Facteurs : 1/2 × 2 avant le 15/01, 2 ensuite, aucun après le 01/03 ; dividendes ignorés
+    np.testing.assert_allclose(adjusted['quantity'], [10.0, 5.0, 10.0, 10.0])
+    np.testing.assert_allclose(adjusted['purchase_price'], [100.0, 200.0, 100.0, 100.0])
+    np.testing.assert_allclose(adjusted['quantity'] * adjusted['purchase_price'], 1000.0)
+    np.testing.assert_allclose(adjusted['raw_quantity'], transactions['quantity'])
+    assert adjust_transactions(transactions, actions[actions['type'] == 'DIVIDEND']) is transactions
+
+def test_dividends_are_expressed_in_current_shares(isolated_data):
+    write_corporate_actions(isolated_data / 'actions.csv', ACTIONS)
+    actions = load_corporate_actions(str(isolated_data / 'actions.csv'))
+
+    codes, dates, amounts = dividend_events(actions, ['AAA', 'BBB'])
+
+    assert list(codes) == [0, 1]
+    np.testing.assert_array_equal(dates, pd.to_datetime(['2024-02-12', '2024-02-20']).to_numpy())
+    # Dividende de AAA suivi d'un regroupement de 2 titres en 1
+    np.testing.assert_allclose(amounts, [3.0, 2.0])
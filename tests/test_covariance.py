@@ -0,0 +1,99 @@
+"""
+Covariance exponentielle : prolongement incrémental et calcul complet
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.covariance import _COVARIANCES, EwmCovariance, get_ewm_covariance
+from modules.data_loader import canonicalize_historical_data, ingest_prices, get_price_history
+
+from conftest import write_corporate_actions
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+SPAN = 20
+CUTOFF = pd.Timestamp('2024-03-01')
+
+def random_prices(seed=0, n_days=90):
+    """Cours aléatoires de jours ouvrés, avec des journées sans cotation"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    frames = []
+    for symbol in SYMBOLS:
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, n_days))
+        quoted = rng.random(n_days) > 0.1
+        frames.append(pd.DataFrame({'date': dates[quoted], 'symbol': symbol, 'close': np.round(closes[quoted], 2)}))
+    return pd.concat(frames, ignore_index=True)
+
+def batch_estimator(prices):
+    price_history = get_price_history(canonicalize_historical_data(prices), 'total')
+    dates, closes = price_history.close_matrix()
+    return EwmCovariance.from_prices(price_history.symbols, dates, closes, SPAN)
+
+def assert_same_estimator(actual, expected):
+    assert list(actual.symbols) == list(expected.symbols)
+    assert actual.last_date == expected.last_date
+    np.testing.assert_allclose(actual.cross, expected.cross, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(actual.weights, expected.weights, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(actual.last_prices, expected.last_prices, rtol=1e-9)
+
+@pytest.mark.parametrize('cutoff', ['2024-01-02', '2024-02-20', '2024-04-01'])
+def test_append_matches_batch(cutoff):
+    prices = canonicalize_historical_data(random_prices())
+    price_history = get_price_history(prices, 'total')
+    dates, closes = price_history.close_matrix()
+    head = dates <= np.datetime64(pd.Timestamp(cutoff))
+
+    estimator = EwmCovariance.from_prices(price_history.symbols, dates[head], closes[head], SPAN)
+    estimator.append(price_history.symbols, dates[~head], closes[~head])
+
+    assert_same_estimator(estimator, EwmCovariance.from_prices(price_history.symbols, dates, closes, SPAN))
+
+def test_append_adds_new_symbols():
+    prices = random_prices()
+    head = prices[(prices['date'] <= CUTOFF) & (prices['symbol'] != 'CCC')]
+    previous = get_ewm_covariance(canonicalize_historical_data(head), SPAN)
+
+    updated = ingest_prices(canonicalize_historical_data(head), prices[prices['date'] > CUTOFF], persist=False)
+    estimator = get_ewm_covariance(updated, SPAN)
+
+    assert estimator is not previous
+    assert list(estimator.symbols) == SYMBOLS
+    expected = batch_estimator(pd.concat([head, prices[prices['date'] > CUTOFF]]))
+    assert_same_estimator(estimator, expected)
+
+@pytest.mark.parametrize('actions', [
+    [],
+    [('15/03/2024', 'ZZZ', 'SPLIT', 2.0)],
+    [('15/01/2024', 'AAA', 'DIVIDEND', 2.5), ('20/03/2024', 'BBB', 'DIVIDEND', 1.0)],
+    [('12/03/2024', 'AAA', 'SPLIT', 2.0), ('30/04/2024', 'CCC', 'DIVIDEND', 1.5)],
+])
+def test_ingested_prices_extend_cached_estimator(isolated_data, actions):
+    write_corporate_actions(isolated_data / 'corporate_actions.csv', actions)
+    prices = random_prices()
+    head = canonicalize_historical_data(prices[prices['date'] <= CUTOFF])
+    get_ewm_covariance(head, SPAN)
+
+    updated = ingest_prices(head, prices[prices['date'] > CUTOFF], persist=False)
+
+    # Estimateur prolongé lors de l'ajout, sans calcul complet
+    assert SPAN in _COVARIANCES.get(updated)
+    assert_same_estimator(get_ewm_covariance(updated, SPAN), batch_estimator(prices))
+
+def test_corrected_bars_rebuild_on_demand():
+    prices = random_prices()
+    head = canonicalize_historical_data(prices[prices['date'] <= CUTOFF])
+    previous = get_ewm_covariance(head, SPAN)
+
+    # Cours corrigé d'une date déjà intégrée, suivi de nouvelles barres
+    corrected = prices[prices['date'] == prices.loc[prices['date'] <= CUTOFF, 'date'].max()].head(1)
+    corrected = corrected.assign(close=corrected['close'] * 1.1)
+    delta = pd.concat([corrected, prices[prices['date'] > CUTOFF]])
+    updated = ingest_prices(head, delta, persist=False)
+
+    # Estimateur écarté lors de l'ajout puis reconstruit à la demande
+    assert SPAN not in _COVARIANCES.get(updated)
+    estimator = get_ewm_covariance(updated, SPAN)
+    assert estimator is not previous
+    expected = pd.concat([prices[prices['date'] <= CUTOFF], delta]).drop_duplicates(['date', 'symbol'], keep='last')
+    assert_same_estimator(estimator, batch_estimator(expected))
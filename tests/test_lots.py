@@ -0,0 +1,98 @@
+"""
+Appariement des lots (portfolio.match_lots) comparé à une implémentation naïve
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.portfolio import match_lots
+
+def random_transactions(seed, n_transactions=60, symbols=('AAA', 'BBB', 'CCC')):
+    """Journal aléatoire d'achats et de ventes (ventes parfois supérieures à la position)"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'purchase_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 30, n_transactions), unit='D'),
+        'symbol': rng.choice(symbols, n_transactions),
+        'Type': rng.choice(['BUY', 'BUY', 'SELL'], n_transactions),
+        'quantity': rng.integers(1, 20, n_transactions).astype('float64'),
+        'purchase_price': rng.integers(50, 150, n_transactions).astype('float64'),
+    })
+
+def reference_lots(transactions, method):
+    """
+    Appariement transaction par transaction
+
+    Returns:
+        tuple: (lots ouverts {symbole: [(quantité, prix)]}, positions {symbole:
+            (quantité, coût de revient, plus-value réalisée)})
+    """
+    ordered = transactions.sort_values(['symbol', 'purchase_date'], kind='stable')
+    open_lots, positions = {}, {}
+    for symbol, group in ordered.groupby('symbol', sort=True):
+        lots, realized = [], 0.0
+        for row in group.itertuples():
+            if row.Type == 'BUY':
+                lots.append([row.quantity, row.purchase_price])
+                continue
+            held = sum(quantity for quantity, _ in lots)
+            sold = min(row.quantity, held)
+            if method == 'average':
+                average = sum(q * p for q, p in lots) / held if held else 0.0
+                realized += sold * (row.purchase_price - average)
+                lots = [[held - sold, average]] if held - sold > 0 else []
+                continue
+            while sold > 0:
+                lot = lots[0] if method == 'fifo' else lots[-1]
+                taken = min(lot[0], sold)
+                realized += taken * (row.purchase_price - lot[1])
+                lot[0] -= taken
+                sold -= taken
+                if lot[0] == 0:
+                    lots.remove(lot)
+        open_lots[symbol] = sorted((q, p) for q, p in lots)
+        positions[symbol] = (sum(q for q, _ in lots), sum(q * p for q, p in lots), realized)
+    return open_lots, positions
+
+@pytest.mark.parametrize('method', ['fifo', 'lifo', 'average'])
+@pytest.mark.parametrize('seed', range(5))
+def test_positions_match_reference(method, seed):
+    transactions = random_transactions(seed)
+    _, positions = match_lots(transactions, method)
+    _, expected = reference_lots(transactions, method)
+
+    positions = positions.set_index('symbol')
+    assert sorted(positions.index) == sorted(expected)
+    for symbol, (quantity, cost_basis, realized) in expected.items():
+        row = positions.loc[symbol]
+        assert row['quantity'] == pytest.approx(quantity)
+        assert row['cost_basis'] == pytest.approx(cost_basis)
+        assert row['realized_pl'] == pytest.approx(realized)
+
+@pytest.mark.parametrize('method', ['fifo', 'lifo'])
+@pytest.mark.parametrize('seed', range(5))
+def test_open_lots_match_reference(method, seed):
+    transactions = random_transactions(seed)
+    open_lots, _ = match_lots(transactions, method)
+    expected, _ = reference_lots(transactions, method)
+
+    for symbol, lots in expected.items():
+        group = open_lots[open_lots['symbol'] == symbol]
+        assert sorted(zip(group['quantity'], group['purchase_price'])) == pytest.approx(lots)
+
+def test_oversold_position_is_capped():
+    transactions = pd.DataFrame({
+        'purchase_date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'symbol': ['AAA', 'AAA', 'AAA'],
+        'Type': ['BUY', 'SELL', 'BUY'],
+        'quantity': [5.0, 8.0, 3.0],
+        'purchase_price': [10.0, 12.0, 11.0],
+    })
+    _, positions = match_lots(transactions, 'fifo')
+    row = positions.set_index('symbol').loc['AAA']
+    assert row['sold_quantity'] == 5
+    assert row['quantity'] == 3
+    assert row['realized_pl'] == pytest.approx(5 * (12.0 - 10.0))
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        match_lots(random_transactions(0), 'hifo')
@@ -0,0 +1,126 @@
+"""
+Optimisation du rééquilibrage : conditions d'optimalité des solveurs et paramètres
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.data_loader import canonicalize_historical_data
+from modules.optimizer import (
+    mean_variance_weights,
+    optimize_portfolio,
+    project_capped_simplex,
+    risk_contributions,
+    risk_parity_weights,
+)
+
+def random_covariance(seed, n_assets=8):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.2, (n_assets, 3))
+    return factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n_assets))
+
+def assert_kkt(weights, gradient, max_weight, atol=1e-6):
+    """Gradient égal sur les poids libres, inférieur sur les poids nuls, supérieur sur les poids au plafond"""
+    free = (weights > 1e-9) & (weights < max_weight - 1e-9)
+    if not free.any():
+        return
+    level = gradient[free].mean()
+    np.testing.assert_allclose(gradient[free], level, atol=atol)
+    assert (gradient[weights <= 1e-9] <= level + atol).all()
+    assert (gradient[weights >= max_weight - 1e-9] >= level - atol).all()
+
+@pytest.mark.parametrize('seed', range(5))
+def test_projection_is_a_capped_shift(seed):
+    values = np.random.default_rng(seed).normal(0, 1, 12)
+    weights = project_capped_simplex(values, 0.2)
+
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights.min() >= 0 and weights.max() <= 0.2 + 1e-12
+    # Les composantes libres sont décalées d'un même seuil
+    free = (weights > 1e-12) & (weights < 0.2 - 1e-12)
+    np.testing.assert_allclose(values[free] - weights[free], (values - weights)[free][0])
+
+def test_projection_rejects_an_insufficient_cap():
+    with pytest.raises(ValueError):
+        project_capped_simplex(np.ones(4), 0.2)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_mean_variance_satisfies_kkt(seed):
+    covariance = random_covariance(seed)
+    expected_returns = np.random.default_rng(seed + 100).normal(0.08, 0.05, len(covariance))
+
+    weights, _ = mean_variance_weights(expected_returns, covariance, risk_aversion=3.0, max_weight=0.3)
+
+    assert weights.sum() == pytest.approx(1.0)
+    assert_kkt(weights, expected_returns - 3.0 * covariance @ weights, 0.3)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_risk_parity_equalizes_contributions(seed):
+    covariance = random_covariance(seed)
+
+    weights, _ = risk_parity_weights(covariance, max_weight=1.0)
+
+    assert weights.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(risk_contributions(weights, covariance), 1 / len(weights), rtol=1e-6)
+
+def test_risk_parity_caps_positions():
+    covariance = np.diag([0.0004, 0.04, 0.04, 0.04])
+
+    weights, _ = risk_parity_weights(covariance, max_weight=0.3)
+
+    assert weights[0] == pytest.approx(0.3)
+    np.testing.assert_allclose(weights[1:], 0.7 / 3, rtol=1e-6)
+
+@pytest.mark.parametrize('keyword, value', [('tolerance', 0), ('max_iterations', 0)])
+def test_invalid_stopping_criteria_are_rejected(keyword, value):
+    covariance = random_covariance(0)
+    with pytest.raises(ValueError):
+        risk_parity_weights(covariance, **{keyword: value})
+    with pytest.raises(ValueError):
+        mean_variance_weights(np.zeros(len(covariance)), covariance, **{keyword: value})
+
+def sample_portfolio(n_days=300):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2023-01-02', periods=n_days)
+    symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+    prices = pd.concat([
+        pd.DataFrame({
+            'date': dates, 'symbol': symbol,
+            'close': np.round(100 * np.cumprod(1 + rng.normal(0.0005, 0.015, n_days)), 2),
+        })
+        for symbol in symbols
+    ], ignore_index=True)
+    transactions = pd.DataFrame({
+        'purchase_date': pd.to_datetime(['2023-01-03'] * len(symbols)),
+        'symbol': symbols,
+        'Type': 'BUY',
+        'quantity': [50.0, 10.0, 10.0, 10.0],
+        'purchase_price': 100.0,
+    })
+    return canonicalize_historical_data(prices), transactions
+
+@pytest.mark.parametrize('method', ['mean_variance', 'risk_parity'])
+def test_optimize_portfolio_respects_the_cap(method):
+    historical_data, transactions = sample_portfolio()
+
+    result = optimize_portfolio(historical_data, transactions, method, max_weight=0.4)
+
+    trades = result['trades']
+    assert result['effective_max_weight'] == 0.4
+    assert trades['target_weight'].sum() == pytest.approx(1.0)
+    assert trades['target_weight'].max() <= 0.4 + 1e-9
+    np.testing.assert_allclose(trades['target_value'] - trades['current_value'], trades['trade_value'])
+
+def test_optimize_portfolio_raises_an_infeasible_cap():
+    historical_data, transactions = sample_portfolio()
+
+    result = optimize_portfolio(historical_data, transactions, max_weight=0.1)
+
+    assert result['effective_max_weight'] == pytest.approx(0.25)
+    np.testing.assert_allclose(result['trades']['target_weight'], 0.25)
+
+@pytest.mark.parametrize('max_weight', [0, -0.1, 1.5])
+def test_optimize_portfolio_rejects_invalid_caps(max_weight):
+    historical_data, transactions = sample_portfolio()
+    with pytest.raises(ValueError):
+        optimize_portfolio(historical_data, transactions, max_weight=max_weight)
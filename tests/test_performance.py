@@ -0,0 +1,62 @@
+"""
+Performance du portefeuille (avec et sans indice de référence) et profits manqués
+"""
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from modules.data_loader import canonicalize_historical_data
+from modules.performance import (
+    calculate_comparative_performance,
+    calculate_missed_profit,
+    calculate_portfolio_performance,
+    has_benchmark_data,
+)
+
+from test_total_return_nav import TRANSACTIONS, random_prices
+
+def with_benchmark(prices):
+    """Ajoute un indice coté chaque jour ouvré de l'historique"""
+    dates = pd.bdate_range(prices['date'].min(), prices['date'].max())
+    closes = 1000 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.01, len(dates)))
+    benchmark = pd.DataFrame({'date': dates, 'symbol': '^MASI', 'close': np.round(closes, 2)})
+    return canonicalize_historical_data(pd.concat([prices, benchmark], ignore_index=True))
+
+@pytest.mark.parametrize('return_mode', ['price', 'total'])
+@pytest.mark.parametrize('period', ['1Y', '1M', 'MTD'])
+def test_portfolio_performance_matches_comparative(return_mode, period):
+    prices = with_benchmark(random_prices())
+
+    comparative = calculate_comparative_performance(prices, TRANSACTIONS, '^MASI', period, return_mode)
+    portfolio = calculate_portfolio_performance(prices, TRANSACTIONS, period, return_mode)
+
+    assert not portfolio.empty
+    tm.assert_frame_equal(portfolio, comparative.drop(columns='cumulative_benchmark_return'))
+
+def test_missing_benchmark_keeps_portfolio_performance():
+    prices = canonicalize_historical_data(random_prices())
+
+    assert not has_benchmark_data(prices, '^MASI')
+    assert calculate_comparative_performance(prices, TRANSACTIONS, '^MASI', '1Y').empty
+    assert not calculate_portfolio_performance(prices, TRANSACTIONS, '1Y').empty
+
+def test_missed_profit_uses_the_last_close_of_each_symbol():
+    prices = random_prices()
+    # Symbole dont la dernière cotation précède la fin de l'historique
+    prices = prices[~((prices['symbol'] == 'CCC') & (prices['date'] > '2024-03-15'))]
+    sells = pd.DataFrame({
+        'purchase_date': pd.to_datetime(['2024-01-20', '2024-02-10', '2024-02-12']),
+        'symbol': ['AAA', 'CCC', 'CCC'],
+        'Type': 'SELL',
+        'quantity': [2.0, 3.0, 1.0],
+        'purchase_price': [1.0, 2.0, 4.0],
+    })
+
+    missed = calculate_missed_profit(canonicalize_historical_data(prices), pd.concat([TRANSACTIONS, sells]))
+
+    last_close = prices.sort_values('date').groupby('symbol')['close'].last()
+    missed = missed.set_index('symbol')
+    assert missed.loc['AAA', 'current_price'] == last_close['AAA']
+    assert missed.loc['CCC', 'current_price'] == last_close['CCC']
+    assert missed.loc['CCC', 'missed_profit'] == pytest.approx(4.0 * (last_close['CCC'] - 3.0))
@@ -0,0 +1,41 @@
+"""
+Périodes d'analyse : dates de début et table des rendements par période
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from callbacks.date_callbacks import PERIOD_BUTTONS
+from modules.data_loader import canonicalize_historical_data
+from modules.portfolio import build_period_returns
+from modules.utils import get_period_start
+
+from test_total_return_nav import random_prices
+
+@pytest.mark.parametrize('period, expected', [
+    ('1M', '2024-02-29'),
+    ('3M', '2023-12-31'),
+    ('6M', '2023-09-30'),
+    ('1Y', '2023-03-31'),
+    ('Last 60 Days', '2024-01-31'),
+    ('MTD', '2024-03-01'),
+    ('YTD', '2024-01-01'),
+    ('inconnue', '2023-03-31'),
+])
+def test_period_start(period, expected):
+    assert get_period_start(period, '2024-03-31') == pd.Timestamp(expected)
+
+def test_every_period_has_a_button():
+    assert sorted(PERIOD_BUTTONS.values()) == sorted(config.TIME_PERIODS)
+
+def test_period_returns_match_windows():
+    prices = random_prices(n_days=300)
+    returns = build_period_returns(canonicalize_historical_data(prices))
+    last_date = prices['date'].max()
+
+    for period in config.TIME_PERIODS:
+        window = prices[prices['date'] >= get_period_start(period, last_date)].sort_values('date')
+        closes = window.groupby('symbol')['close']
+        expected = (closes.last() / closes.first() - 1) * 100
+        np.testing.assert_allclose(returns[period].reindex(expected.index), expected, rtol=1e-12)
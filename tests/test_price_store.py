@@ -0,0 +1,109 @@
+"""
+Stockage colonnaire : aller-retour, ajout de lignes et compactage
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from modules.price_store import (
+    append_to_price_store,
+    build_price_store,
+    compact_price_store,
+    load_price_store,
+    read_manifest,
+)
+
+def sample_prices():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03']),
+        'symbol': ['AAA', 'AAA', 'BBB', 'BBB'],
+        'close': np.array([10.5, 10.75, 20.0, 19.99], dtype='float32'),
+        'volume': np.array([100, 200, 300, 400], dtype='int32'),
+    })
+
+def load(store_dir):
+    """Charge le stockage avec les symboles en texte (catégories comparables)"""
+    data = load_price_store(store_dir)
+    return data.assign(symbol=data['symbol'].astype(str))
+
+def test_round_trip(tmp_path):
+    prices = sample_prices()
+    build_price_store(prices, str(tmp_path), {})
+
+    loaded = load(str(tmp_path))
+    tm.assert_frame_equal(loaded, prices)
+    assert read_manifest(str(tmp_path))['columns'][0]['kind'] == 'days'
+
+def test_append_keeps_types_and_adds_categories(tmp_path):
+    prices = sample_prices()
+    build_price_store(prices, str(tmp_path), {})
+    new_rows = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-04']),
+        'symbol': ['CCC'],
+        'close': [5.25],
+        'volume': [500],
+    })
+
+    manifest = append_to_price_store(str(tmp_path), new_rows)
+
+    assert manifest['rows'] == 5
+    expected = pd.concat([prices, new_rows.astype(prices.dtypes.to_dict())], ignore_index=True)
+    tm.assert_frame_equal(load(str(tmp_path)), expected)
+
+def test_append_widens_columns(tmp_path):
+    prices = sample_prices()
+    build_price_store(prices, str(tmp_path), {})
+    new_rows = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-04 10:30']),
+        'symbol': ['AAA'],
+        'close': [10.123],
+        'volume': [2**40],
+    })
+
+    append_to_price_store(str(tmp_path), new_rows)
+
+    loaded = load(str(tmp_path))
+    assert loaded['close'].dtype == np.float64
+    assert loaded['volume'].dtype == np.int64
+    assert loaded['date'].iloc[-1] == pd.Timestamp('2024-01-04 10:30')
+    assert loaded['close'].iloc[-1] == 10.123
+    tm.assert_frame_equal(loaded.iloc[:4], prices, check_dtype=False)
+
+def test_append_ignores_interrupted_append(tmp_path):
+    prices = sample_prices()
+    manifest = build_price_store(prices, str(tmp_path), {})
+    # Reste d'un ajout interrompu avant l'écriture du manifeste
+    with open(os.path.join(str(tmp_path), manifest['columns'][2]['file']), 'ab') as f:
+        f.write(np.float32(99.0).tobytes())
+
+    append_to_price_store(str(tmp_path), prices.iloc[[0]])
+
+    tm.assert_frame_equal(load(str(tmp_path)), pd.concat([prices, prices.iloc[[0]]], ignore_index=True))
+
+def test_compact(tmp_path):
+    prices = sample_prices()
+    build_price_store(prices, str(tmp_path), {})
+    keep = np.array([True, False, True, True])
+
+    manifest = compact_price_store(str(tmp_path), keep)
+
+    assert manifest['rows'] == 3
+    tm.assert_frame_equal(load(str(tmp_path)), prices[keep].reset_index(drop=True))
+
+def test_loaded_frames_survive_rewrites(tmp_path):
+    prices = sample_prices()
+    build_price_store(prices, str(tmp_path), {})
+    before = load_price_store(str(tmp_path))
+
+    append_to_price_store(str(tmp_path), pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-04 10:30']), 'symbol': ['AAA'], 'close': [1.001], 'volume': [1],
+    }))
+    compact_price_store(str(tmp_path), np.array([False, True, True, True, True]))
+
+    # Les fichiers projetés par le premier chargement ne sont ni tronqués ni réécrits
+    tm.assert_frame_equal(before.assign(symbol=before['symbol'].astype(str)), prices)
+    assert len(load_price_store(str(tmp_path))) == 4
+    referenced = {column['file'] for column in read_manifest(str(tmp_path))['columns']}
+    assert {name for name in os.listdir(str(tmp_path)) if name.startswith('col_')} == referenced
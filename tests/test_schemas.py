@@ -0,0 +1,81 @@
+"""
+Formats des fichiers de prix : détection par l'en-tête et normalisation des symboles
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.data_loader import canonicalize_historical_data, read_historical_csv, stream_historical_csv
+from modules.price_store import load_price_store
+from modules.schemas import detect_schema, normalize_symbols, read_header
+
+ADJUSTED_FEED = (
+    "﻿symbol;date;open;high;low;close;adjusted_close;volume\n"
+    "IAM.BC;03/01/2022;100,5;101;99;100,5;98,25;10\n"
+    "IAM.BC;04/01/2022;101;102;100;101,75;99,5;20\n"
+    " AKT.BC ;03/01/2022;50;51;49;50,25;50,25;5\n"
+    "AKDITAL;04/01/2022;51;52;50;51,5;51,5;6\n"
+)
+
+DAILY_FEED = (
+    "Date;Symbol;Open;High;Low;Close;Volume\n"
+    "03/01/2022;IAM;100.5;101;99;100.5;10\n"
+    "04/01/2022;IAM;101;102;100;101.75;20\n"
+)
+
+@pytest.mark.parametrize('header, expected', [
+    (['﻿symbol', 'date', 'open', 'close', 'adjusted_close'], 'bvc_adjusted'),
+    (['Date', ' Symbol ', 'Close', 'Volume'], 'bvc_daily'),
+    (['Date', 'Ticker', 'Close'], 'bvc_daily'),
+    (['date', 'symbol', 'close'], 'canonical'),
+    (['when', 'what', 'price'], None),
+])
+def test_detect_schema(header, expected):
+    schema = detect_schema(header)
+    assert (schema.name if schema is not None else None) == expected
+
+def test_rename_map_keeps_existing_canonical_columns():
+    schema = detect_schema(['Date', 'Symbol', 'Close', 'close'])
+    assert schema.rename_map(['Date', 'Symbol', 'Close', 'close']) == {'Date': 'date', 'Symbol': 'symbol'}
+
+def test_normalize_symbols_merges_suffixes_and_aliases():
+    symbols = pd.Series(['IAM.BC', ' AKT.BC', 'AKDITAL', 'IAM.BC', None], index=[5, 6, 7, 8, 9])
+
+    normalized = normalize_symbols(symbols, '.BC')
+
+    assert isinstance(normalized.dtype, pd.CategoricalDtype)
+    assert list(normalized.index) == [5, 6, 7, 8, 9]
+    assert normalized.iloc[:4].tolist() == ['ITISSALAT-AL-MAGHRIB', 'AKDITAL', 'AKDITAL', 'ITISSALAT-AL-MAGHRIB']
+    assert pd.isna(normalized.iloc[4])
+    assert sorted(normalized.cat.categories) == ['AKDITAL', 'ITISSALAT-AL-MAGHRIB']
+
+def test_normalized_categorical_is_returned_as_is():
+    symbols = normalize_symbols(pd.Series(['AKDITAL', 'MANAGEM']))
+    assert normalize_symbols(symbols) is symbols
+
+@pytest.mark.parametrize('feed', [ADJUSTED_FEED, DAILY_FEED])
+def test_feed_loads_to_canonical_prices(tmp_path, feed):
+    path = tmp_path / 'prices.csv'
+    path.write_text(feed, encoding='utf-8')
+
+    prices = canonicalize_historical_data(read_historical_csv(str(path)))
+
+    assert prices['date'].min() == pd.Timestamp('2022-01-03')
+    assert prices['date'].max() == pd.Timestamp('2022-01-04')
+    iam = prices[prices['symbol'] == 'ITISSALAT-AL-MAGHRIB'].sort_values('date')
+    np.testing.assert_allclose(iam['close'], [100.5, 101.75])
+
+def test_streamed_store_matches_frame_loading(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text(ADJUSTED_FEED, encoding='utf-8')
+    assert read_header(str(path))[0] == 'symbol'
+
+    stream_historical_csv(str(path), str(tmp_path / 'store'), {}, chunk_rows=2)
+    streamed = canonicalize_historical_data(load_price_store(str(tmp_path / 'store')))
+    loaded = canonicalize_historical_data(read_historical_csv(str(path)))
+
+    columns = ['date', 'symbol', 'close']
+    key = ['symbol', 'date']
+    streamed = streamed[columns].astype({'symbol': str}).sort_values(key, ignore_index=True)
+    loaded = loaded[columns].astype({'symbol': str}).sort_values(key, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, loaded, check_dtype=False)
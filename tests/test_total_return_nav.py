@@ -0,0 +1,76 @@
+"""
+Valeur liquidative en rendement total : prolongement incrémental et calcul complet
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.data_loader import canonicalize_historical_data, ingest_prices, get_price_history
+from modules.performance import build_total_return_nav, get_total_return_nav
+
+from conftest import write_corporate_actions
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+def random_prices(seed=0, n_days=80):
+    """Cours aléatoires de jours ouvrés, avec des journées sans cotation"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    frames = []
+    for symbol in SYMBOLS:
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, n_days))
+        quoted = rng.random(n_days) > 0.1
+        frames.append(pd.DataFrame({'date': dates[quoted], 'symbol': symbol, 'close': np.round(closes[quoted], 2)}))
+    return pd.concat(frames, ignore_index=True)
+
+TRANSACTIONS = pd.DataFrame({
+    'purchase_date': pd.to_datetime(['2024-01-03', '2024-01-10', '2024-02-05', '2024-03-12', '2024-04-02']),
+    'symbol': ['AAA', 'BBB', 'CCC', 'AAA', 'BBB'],
+    'Type': ['BUY', 'BUY', 'BUY', 'SELL', 'BUY'],
+    'quantity': [10.0, 5.0, 8.0, 4.0, 6.0],
+    'purchase_price': [100.0, 101.0, 99.0, 105.0, 102.0],
+})
+
+@pytest.fixture
+def dividends(isolated_data):
+    """Dividendes détachés avant et après la date de coupure"""
+    write_corporate_actions(isolated_data / 'corporate_actions.csv', [
+        ('15/01/2024', 'AAA', 'DIVIDEND', 2.5),
+        ('20/03/2024', 'BBB', 'DIVIDEND', 1.0),
+    ])
+
+def assert_same_series(actual, expected):
+    actual, expected = actual.frame(), expected.frame()
+    assert list(actual['date']) == list(expected['date'])
+    for column in ['portfolio_value', 'cash_flow', 'dividend_income', 'nav']:
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize('cutoff', ['2024-01-02', '2024-02-20', '2024-04-01'])
+def test_extend_matches_batch(dividends, cutoff):
+    prices = canonicalize_historical_data(random_prices())
+    cutoff = pd.Timestamp(cutoff)
+    head = canonicalize_historical_data(prices[prices['date'] <= cutoff])
+
+    nav = build_total_return_nav(head, TRANSACTIONS)
+    calendar = get_price_history(prices).calendar
+    nav.extend(get_price_history(prices), calendar[calendar > np.datetime64(cutoff)])
+
+    expected = build_total_return_nav(prices, TRANSACTIONS)
+    assert expected.frame()['dividend_income'].sum() > 0
+    assert_same_series(nav, expected)
+
+def test_ingested_prices_extend_cached_nav(dividends):
+    prices = random_prices()
+    cutoff = pd.Timestamp('2024-03-01')
+    head = canonicalize_historical_data(prices[prices['date'] <= cutoff])
+    previous = get_total_return_nav(head, TRANSACTIONS)
+    before = previous.frame()
+
+    updated = ingest_prices(head, prices[prices['date'] > cutoff], persist=False)
+    nav = get_total_return_nav(updated, TRANSACTIONS)
+
+    # Copie prolongée : la série du jeu précédent reste lisible telle quelle
+    assert nav is not previous and len(nav) > len(previous)
+    assert get_total_return_nav(head, TRANSACTIONS) is previous
+    pd.testing.assert_frame_equal(previous.frame(), before)
+    assert_same_series(nav, build_total_return_nav(canonicalize_historical_data(prices), TRANSACTIONS))
@@ -0,0 +1,97 @@
+"""
+Valeur en risque : méthodes historique, paramétrique et Monte-Carlo
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+import config
+from modules.covariance import get_covariance_matrix
+from modules.performance import (
+    calculate_value_at_risk,
+    covariance_factor,
+    portfolio_exposures,
+    simulate_portfolio_pnl,
+    value_at_risk,
+)
+from modules.utils import get_period_start
+
+from test_optimizer import random_covariance, sample_portfolio
+
+def test_value_at_risk_of_known_losses():
+    pnl = np.arange(-50.0, 50.0)
+
+    var, expected_shortfall = value_at_risk(pnl, 0.95)
+
+    assert var == pytest.approx(-np.quantile(pnl, 0.05))
+    assert expected_shortfall == pytest.approx(-pnl[pnl <= np.quantile(pnl, 0.05)].mean())
+    assert expected_shortfall >= var
+    assert all(np.isnan(value_at_risk(np.zeros(0), 0.95)))
+
+def test_covariance_factor_tolerates_singular_matrices():
+    covariance = random_covariance(0, n_assets=4)
+    # Symbole redondant : matrice semi-définie
+    covariance = np.pad(covariance, ((0, 1), (0, 1)))
+    covariance[4, :4] = covariance[:4, 4] = covariance[0, :4]
+    covariance[4, 4] = covariance[0, 0]
+
+    factor = covariance_factor(covariance)
+
+    np.testing.assert_allclose(factor @ factor.T, covariance, atol=1e-12)
+
+def test_simulation_does_not_depend_on_workers():
+    factor = covariance_factor(random_covariance(1, n_assets=4) / 250)
+    values = np.array([1000.0, 2000.0, 500.0, 1500.0])
+
+    single = simulate_portfolio_pnl(factor, values, horizon=5, n_paths=5000, seed=7, chunk_paths=1000, workers=1)
+    pooled = simulate_portfolio_pnl(factor, values, horizon=5, n_paths=5000, seed=7, chunk_paths=1000, workers=2)
+
+    assert len(single) == 5000
+    np.testing.assert_array_equal(single, pooled)
+
+@pytest.mark.parametrize('horizon', [1, 5])
+def test_historical_var_revalues_current_positions(horizon):
+    historical_data, transactions = sample_portfolio()
+    symbols, values = portfolio_exposures(historical_data, transactions)
+
+    result = calculate_value_at_risk(historical_data, transactions, 'historical', 0.95, horizon)
+
+    closes = historical_data.pivot(index='date', columns='symbol', values='close')[symbols]
+    closes = closes[closes.index >= get_period_start(config.VAR_LOOKBACK_PERIOD, closes.index.max())]
+    growth = np.vstack([np.ones(len(symbols)), (closes / closes.iloc[0]).to_numpy()])
+    pnl = (growth[horizon:] / growth[:-horizon] - 1) @ values
+    var, expected_shortfall = value_at_risk(pnl, 0.95)
+
+    assert result['scenarios'] == len(pnl)
+    assert result['portfolio_value'] == pytest.approx(values.sum())
+    assert result['var'] == pytest.approx(var)
+    assert result['expected_shortfall'] == pytest.approx(expected_shortfall)
+    assert result['var_percent'] == pytest.approx(100 * var / values.sum())
+
+def test_parametric_var_is_a_normal_quantile():
+    historical_data, transactions = sample_portfolio()
+    symbols, values = portfolio_exposures(historical_data, transactions)
+    covariance = get_covariance_matrix(historical_data, symbols).to_numpy() / config.TRADING_DAYS_PER_YEAR
+
+    result = calculate_value_at_risk(historical_data, transactions, 'parametric', 0.99, 10)
+
+    deviation = np.sqrt(values @ covariance @ values * 10)
+    assert result['var'] == pytest.approx(NormalDist().inv_cdf(0.99) * deviation)
+    assert result['expected_shortfall'] > result['var']
+
+def test_monte_carlo_converges_to_parametric(monkeypatch):
+    monkeypatch.setattr(config, 'MONTE_CARLO_WORKERS', 1)
+    historical_data, transactions = sample_portfolio()
+
+    parametric = calculate_value_at_risk(historical_data, transactions, 'parametric', 0.95, 1)
+    simulated = calculate_value_at_risk(historical_data, transactions, 'monte_carlo', 0.95, 1, n_paths=200_000, seed=3)
+
+    assert simulated['scenarios'] == 200_000
+    assert simulated['var'] == pytest.approx(parametric['var'], rel=0.02)
+    assert simulated['expected_shortfall'] == pytest.approx(parametric['expected_shortfall'], rel=0.02)
+
+def test_unknown_method_is_rejected():
+    historical_data, transactions = sample_portfolio()
+    with pytest.raises(ValueError):
+        calculate_value_at_risk(historical_data, transactions, 'bootstrap')
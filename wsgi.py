@@ -0,0 +1,25 @@
+"""
+Point d'entrée WSGI de production
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Avec preload_app (voir gunicorn.conf.py), ce module est importé une seule fois
+par le processus maître : les prix sont projetés en mémoire depuis le stockage
+colonnaire et les vues sont précalculées avant le fork. Les workers partagent
+ces pages (copie à l'écriture) au lieu de recharger chacun les CSV.
+"""
+import logging
+
+import config
+from app import create_app, load_portfolio_data
+
+# Messages des modules (précalcul du maître et des workers) sur la sortie d'erreur
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+
+# Données chargées une seule fois, avant le fork des workers
+historical_data, transactions_data = load_portfolio_data()
+
+# Le précalcul est lancé par gunicorn.conf.py (maître avant fork, ou chaque worker)
+app = create_app(historical_data, transactions_data, precompute=False)
+server = app.server